@@ -1,6 +1,18 @@
 import random
-import matplotlib.pyplot as plt
-from deap import base, creator, tools, algorithms
+from deap import base, creator, tools
+
+from engine import GenerationEngine
+import experiments
+import islands
+import parallel
+from fitness_cache import BATCH_CACHE_SIZE, cached_evaluation
+import population_eval
+from problem import ProblemInstance
+from population_eval import population_to_matrix
+import rendering
+from telemetry import TelemetrySink
+from termination import TerminationPolicy
+import variation
 
 # Конфигурация задачи
 NUM_OPERATORS = 10
@@ -44,11 +56,14 @@ SHIFT_TYPES = [
     [1, 2], [4, 7], [6, 0]
 ]
 
+# Таблицы навыков и предпочтений, скомпилированные в битовые маски (см. problem.py)
+PROBLEM = ProblemInstance(NUM_OPERATORS, NUM_SHIFTS, OPERATOR_SKILLS, PREFERENCES, SHIFT_TYPES)
+
 def prefers_shift(operator, shift):
-    return shift in PREFERENCES.get(operator, [])
+    return PROBLEM.prefers_shift(operator, shift)
 
 def can_perform_shift(operator, shift):
-    return all(skill in OPERATOR_SKILLS[operator] for skill in SHIFT_TYPES[shift])
+    return PROBLEM.can_perform_shift(operator, shift)
 
 def evaluate(individual):
     fitness = 0
@@ -76,17 +91,34 @@ def evaluate(individual):
 
 creator.create("FitnessMax", base.Fitness, weights=(1.0,))
 creator.create("Individual", list, fitness=creator.FitnessMax)
+INDIVIDUAL = creator.Individual
 
 toolbox = base.Toolbox()
-toolbox.register("attr_int", random.randint, 0, NUM_OPERATORS - 1)
-toolbox.register("individual", tools.initRepeat, creator.Individual, toolbox.attr_int, NUM_SHIFTS)
-toolbox.register("population", tools.initRepeat, list, toolbox.individual)
-toolbox.register("mate", tools.cxTwoPoint)
-toolbox.register("mutate", tools.mutFlipBit, indpb=0.05)
+# Гены берутся из операторов, допущенных к смене; кроссовер режет по границам дней;
+# доля WARM_START_FRACTION стартовой популяции — жадные расписания (см. variation.py)
+EXPLORATION_RATE = 0.1
+WARM_START_FRACTION = 0.1
+GENE_SHIFTS = tuple(range(NUM_SHIFTS))
+variation.register_eligible(toolbox, INDIVIDUAL, PROBLEM, GENE_SHIFTS, SHIFTS_PER_DAY, EXPLORATION_RATE,
+                            max_shifts=MAX_SHIFTS_PER_OPERATOR, warm_start=WARM_START_FRACTION)
 toolbox.register("select", tools.selTournament, tournsize=3)
 toolbox.register("evaluate", evaluate)
 
+# Пакетная оценка всей популяции за один проход (см. population_eval.py)
+PREFERENCE_MATRIX, SKILL_MATRIX = population_eval.build_lookup_tables(PROBLEM)
+
+def evaluate_population(pop_matrix):
+    return population_eval.evaluate_population(
+        pop_matrix, PREFERENCE_MATRIX, SKILL_MATRIX, SHIFTS_PER_DAY, MAX_SHIFTS_PER_OPERATOR)
+
+def evaluate_many(individuals):
+    return population_eval.fitness_tuples(evaluate_population(population_to_matrix(individuals)))
+
+toolbox.register("evaluate_population", evaluate_population)
+toolbox.register("evaluate_many", evaluate_many)
+
 def visualize_schedule(schedule):
+    plt = rendering.pyplot()
     fig, ax = plt.subplots()
     colors = plt.get_cmap("tab10")
     for shift in range(NUM_SHIFTS):
@@ -101,12 +133,13 @@ def visualize_schedule(schedule):
     ax.set_xlabel("Смен")
     ax.set_ylabel("Дней")
     ax.set_title("График работы колл-центра")
-    plt.show()
+    rendering.show("visualize_schedule")
 
 def random_schedule():
     return [random.randint(0, NUM_OPERATORS - 1) for _ in range(NUM_SHIFTS)]
 
 def plot_fitness_dynamics(avg_fitness, max_fitness, label_prefix=""):
+    plt = rendering.pyplot()
     plt.plot(avg_fitness, label=f"{label_prefix}Средняя")
     plt.plot(max_fitness, label=f"{label_prefix}Макс")
     plt.xlabel("Поколение")
@@ -115,54 +148,68 @@ def plot_fitness_dynamics(avg_fitness, max_fitness, label_prefix=""):
     plt.legend()
     plt.grid(True)
 
-def experiment_suite():
+# Все конфигурации и повторы запускаются параллельно в пуле процессов, каждый
+# со своим потоком случайных чисел (см. experiments.py). На графике — средние
+# по повторам кривые, возвращается полная статистика по поколениям.
+def experiment_suite(replicates=1, ngen=100, processes=None):
+    plt = rendering.pyplot()
     configs = [
         {"cxpb": 0.5, "mutpb": 0.1, "label": "CX=0.5, MUT=0.1"},
         {"cxpb": 0.9, "mutpb": 0.05, "label": "CX=0.9, MUT=0.05"},
         {"cxpb": 0.7, "mutpb": 0.2, "label": "CX=0.7, MUT=0.2"},
         {"cxpb": 1, "mutpb": 1, "label": "CX=1.0, MUT=1.0"},
     ]
+    results = experiments.run_suite(__name__, configs, replicates, ngen, processes)
     plt.figure(figsize=(10, 6))
-    for config in configs:
-        best, avg_hist, max_hist = run_experiment(config["cxpb"], config["mutpb"])
-        plot_fitness_dynamics(avg_hist, max_hist, label_prefix=f"{config['label']} ")
-    plt.show()
-
-def run_experiment(cxpb, mutpb, ngen=100):
-    random.seed(126)
+    for result in results:
+        plot_fitness_dynamics(result["avg_history"]["mean"], result["best_history"]["mean"],
+                              label_prefix=f"{result['config']['label']} ")
+    rendering.show("experiment_suite")
+    return results
+
+def run_experiment(cxpb, mutpb, ngen=100, parallel_eval=False, processes=None,
+                   cache_size=BATCH_CACHE_SIZE, seed=126, termination=None, checkpointer=None,
+                   resume_from=None, engine=None):
+    random.seed(seed)
     population = toolbox.population(n=300)
     avg_fitness_history = []
     max_fitness_history = []
-    for gen in range(ngen):
-        offspring = algorithms.varAnd(population, toolbox, cxpb=cxpb, mutpb=mutpb)
-        fits = list(map(toolbox.evaluate, offspring))
-        for ind, fit in zip(offspring, fits):
-            ind.fitness.values = fit
-        population = toolbox.select(offspring, k=len(population))
-        fitnesses = [ind.fitness.values[0] for ind in population]
-        avg_fitness_history.append(sum(fitnesses) / len(fitnesses))
-        max_fitness_history.append(max(fitnesses))
+    termination = termination or TerminationPolicy()
+    termination.start()
+    engine = engine or GenerationEngine()
+    with parallel.parallel_evaluation(toolbox, __name__, parallel_eval, processes), \
+            cached_evaluation(toolbox, cache_size) as cache:
+        population = engine.run(population, toolbox, cxpb, mutpb, ngen, termination=termination,
+                                checkpointer=checkpointer, resume_from=resume_from, cache=cache,
+                                avg_history=avg_fitness_history, max_history=max_fitness_history)
     best = tools.selBest(population, 1)[0]
     return best, avg_fitness_history, max_fitness_history
 
-def main():
+# Островная модель: num_islands подпопуляций в отдельных процессах с миграцией
+# лучших особей каждые migration_interval поколений (см. islands.py)
+def run_island_experiment(cxpb, mutpb, ngen=100, num_islands=4, migration_interval=10, migrants=5,
+                          topology="ring", seed=126):
+    return islands.run_islands(__name__, cxpb, mutpb, ngen, num_islands, 300,
+                               migration_interval, migrants, topology, seed)
+
+def main(parallel_eval=False, processes=None, cache_size=BATCH_CACHE_SIZE, telemetry=None,
+         termination=None, checkpointer=None, resume_from=None, engine=None):
     random.seed(126)
     population = toolbox.population(n=300)
     NGEN = 100
     CXPB, MUTPB = 1, 1
     avg_fitness_history = []
     max_fitness_history = []
-    for gen in range(NGEN):
-        offspring = algorithms.varAnd(population, toolbox, cxpb=CXPB, mutpb=MUTPB)
-        fits = list(map(toolbox.evaluate, offspring))
-        for fit, ind in zip(fits, offspring):
-            ind.fitness.values = fit
-        population = toolbox.select(offspring, k=len(population))
-        fitnesses = [ind.fitness.values[0] for ind in population]
-        avg_fitness_history.append(sum(fitnesses) / len(fitnesses))
-        max_fitness_history.append(max(fitnesses))
-        best_ind = tools.selBest(population, 1)[0]
-        print(f"Поколение {gen}: Лучший результат: {best_ind}, Фитнес: {best_ind.fitness.values}")
+    telemetry = telemetry or TelemetrySink()
+    termination = termination or TerminationPolicy()
+    termination.start()
+    engine = engine or GenerationEngine()
+    with parallel.parallel_evaluation(toolbox, __name__, parallel_eval, processes), \
+            cached_evaluation(toolbox, cache_size) as cache:
+        population = engine.run(population, toolbox, CXPB, MUTPB, NGEN, telemetry, termination, checkpointer,
+                                resume_from, cache, avg_fitness_history, max_fitness_history)
+    telemetry.close()
+    print(termination.report())
     best_ind = tools.selBest(population, 1)[0]
     print("Лучший результат: %s, %s" % (best_ind, best_ind.fitness.values))
     visualize_schedule(best_ind)
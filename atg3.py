@@ -1,6 +1,21 @@
+import array
 import random
-import matplotlib.pyplot as plt
-from deap import base, creator, tools, algorithms
+from deap import base, creator, tools
+
+from engine import GenerationEngine
+import flow
+import genome
+import instances
+import parallel
+from fitness_cache import BATCH_CACHE_SIZE, cached_evaluation
+import population_eval
+from problem import ProblemInstance
+import repair
+from population_eval import population_to_matrix
+import rendering
+from telemetry import TelemetrySink
+from termination import TerminationPolicy
+import variation
 
 # Конфигурация задачи
 NUM_OPERATORS = 10
@@ -12,29 +27,23 @@ SKILLS_PER_OPERATOR = 5
 PREFERENCES_PER_OPERATOR = 3
 SKILLS_PER_SHIFT = 2
 
-# Генерация OPERATOR_SKILLS
-OPERATOR_SKILLS = {
-    i: random.sample(range(NUM_SKILLS), SKILLS_PER_OPERATOR)
-    for i in range(NUM_OPERATORS)
-}
+INSTANCE_SEED = None  # Зерно генератора экземпляра; None — новый экземпляр при каждом запуске
 
-# Генерация PREFERENCES
-PREFERENCES = {
-    i: random.sample(range(NUM_SHIFTS), PREFERENCES_PER_OPERATOR)
-    for i in range(NUM_OPERATORS)
-}
+# Генерация OPERATOR_SKILLS, PREFERENCES и SHIFT_TYPES (см. instances.py)
+INSTANCE = instances.generate_instance(
+    NUM_OPERATORS, NUM_SKILLS, weeks=NUM_SHIFTS // (7 * SHIFTS_PER_DAY), shifts_per_day=SHIFTS_PER_DAY,
+    skill_density=SKILLS_PER_OPERATOR / NUM_SKILLS, preference_density=PREFERENCES_PER_OPERATOR / NUM_SHIFTS,
+    skills_per_shift=SKILLS_PER_SHIFT, seed=INSTANCE_SEED)
+OPERATOR_SKILLS, PREFERENCES, SHIFT_TYPES = instances.to_tables(INSTANCE)
 
-# Генерация SHIFT_TYPES
-SHIFT_TYPES = [
-    random.sample(range(NUM_SKILLS), SKILLS_PER_SHIFT)
-    for _ in range(NUM_SHIFTS)
-]
+# Таблицы навыков и предпочтений, скомпилированные в битовые маски (см. problem.py)
+PROBLEM = ProblemInstance(NUM_OPERATORS, NUM_SHIFTS, OPERATOR_SKILLS, PREFERENCES, SHIFT_TYPES)
 
 def prefers_shift(operator, shift):
-    return shift in PREFERENCES.get(operator, [])
+    return PROBLEM.prefers_shift(operator, shift)
 
 def can_perform_shift(operator, shift):
-    return all(skill in OPERATOR_SKILLS[operator] for skill in SHIFT_TYPES[shift])
+    return PROBLEM.can_perform_shift(operator, shift)
 
 def evaluate(individual):
     fitness = 0
@@ -62,17 +71,40 @@ def evaluate(individual):
 
 creator.create("FitnessMax", base.Fitness, weights=(1.0,))
 creator.create("Individual", list, fitness=creator.FitnessMax)
+creator.create("ArrayIndividual", array.array, typecode=genome.TYPECODE, fitness=creator.FitnessMax)
+INDIVIDUAL = creator.Individual
+ARRAY_INDIVIDUAL = creator.ArrayIndividual
 
 toolbox = base.Toolbox()
-toolbox.register("attr_int", random.randint, 0, NUM_OPERATORS - 1)
-toolbox.register("individual", tools.initRepeat, creator.Individual, toolbox.attr_int, NUM_SHIFTS)
-toolbox.register("population", tools.initRepeat, list, toolbox.individual)
-
-toolbox.register("mate", tools.cxTwoPoint)
-toolbox.register("mutate", tools.mutFlipBit, indpb=0.05)
+# Гены берутся из операторов, допущенных к смене; кроссовер режет по границам дней;
+# доля WARM_START_FRACTION стартовой популяции — жадные расписания (см. variation.py)
+EXPLORATION_RATE = 0.1
+WARM_START_FRACTION = 0.1
+GENE_SHIFTS = tuple(range(NUM_SHIFTS))
+variation.register_eligible(toolbox, INDIVIDUAL, PROBLEM, GENE_SHIFTS, SHIFTS_PER_DAY, EXPLORATION_RATE,
+                            max_shifts=MAX_SHIFTS_PER_OPERATOR, warm_start=WARM_START_FRACTION)
 toolbox.register("select", tools.selTournament, tournsize=3)
 toolbox.register("evaluate", evaluate)
 
+# Пакетная оценка всей популяции за один проход (см. population_eval.py)
+PREFERENCE_MATRIX, SKILL_MATRIX = population_eval.build_lookup_tables(PROBLEM)
+
+def evaluate_population(pop_matrix):
+    return population_eval.evaluate_population(
+        pop_matrix, PREFERENCE_MATRIX, SKILL_MATRIX, SHIFTS_PER_DAY, MAX_SHIFTS_PER_OPERATOR)
+
+def evaluate_many(individuals):
+    return population_eval.fitness_tuples(evaluate_population(population_to_matrix(individuals)))
+
+toolbox.register("evaluate_population", evaluate_population)
+toolbox.register("evaluate_many", evaluate_many)
+
+# Компактный геном uint16 с копированием буфера вместо deepcopy (см. genome.py)
+def use_array_genome():
+    genome.register_array_genome(toolbox, ARRAY_INDIVIDUAL, PROBLEM, GENE_SHIFTS, SHIFTS_PER_DAY,
+                                 exploration=EXPLORATION_RATE, max_shifts=MAX_SHIFTS_PER_OPERATOR,
+                                 warm_start=WARM_START_FRACTION)
+
 def random_scheduler():
     return [random.randint(0, NUM_OPERATORS - 1) for _ in range(NUM_SHIFTS)]
 
@@ -80,8 +112,8 @@ def greedy_scheduler():
     schedule = [-1] * NUM_SHIFTS
     shifts_per_operator = [0] * NUM_OPERATORS
     for shift in range(NUM_SHIFTS):
-        for operator in range(NUM_OPERATORS):
-            if can_perform_shift(operator, shift) and shifts_per_operator[operator] < MAX_SHIFTS_PER_OPERATOR:
+        for operator in PROBLEM.eligible_operators[shift]:
+            if shifts_per_operator[operator] < MAX_SHIFTS_PER_OPERATOR:
                 schedule[shift] = operator
                 shifts_per_operator[operator] += 1
                 break
@@ -89,7 +121,19 @@ def greedy_scheduler():
             schedule[shift] = random.randint(0, NUM_OPERATORS - 1)
     return schedule
 
+# Точное решение потоком минимальной стоимости и верхняя граница фитнеса (см. flow.py)
+def exact_scheduler():
+    return flow.solve_assignment(PROBLEM, max_shifts=MAX_SHIFTS_PER_OPERATOR, shifts_per_day=SHIFTS_PER_DAY,
+                                 day_penalty=1)
+
+# Починка расписания после изменения (недоступность оператора, новые навыки
+# смены): переназначаются только затронутые смены (см. repair.py)
+def repair_schedule(schedule, change, unavailable=()):
+    return repair.repair(PROBLEM, schedule, change, max_shifts=MAX_SHIFTS_PER_OPERATOR,
+                         shifts_per_day=SHIFTS_PER_DAY, unavailable=unavailable)
+
 def plot_schedule(schedule, title):
+    plt = rendering.pyplot()
     fig, ax = plt.subplots()
     colors = plt.get_cmap("tab10")
     for shift in range(NUM_SHIFTS):
@@ -106,6 +150,7 @@ def plot_schedule(schedule, title):
     ax.set_title(title)
 
 def plot_fitness_dynamics(avg_fitness_history, max_fitness_history):
+    plt = rendering.pyplot()
     plt.plot(avg_fitness_history, label="Средняя приспособленность")
     plt.plot(max_fitness_history, label="Максимальная приспособленность")
     plt.xlabel("Поколение")
@@ -113,9 +158,9 @@ def plot_fitness_dynamics(avg_fitness_history, max_fitness_history):
     plt.title("Динамика обучения ГА")
     plt.legend()
     plt.grid()
-    plt.show()
+    rendering.show("plot_fitness_dynamics")
 
-def compare_with_heuristics(best_individual, greedy, rand):
+def compare_with_heuristics(best_individual, greedy, rand, exact=None):
     rand_fitness = evaluate(rand)
     greedy_fitness = evaluate(greedy)
     ga_fitness = evaluate(best_individual)
@@ -123,34 +168,41 @@ def compare_with_heuristics(best_individual, greedy, rand):
     print(f"Генетический алгоритм: {ga_fitness[0]}")
     print(f"Жадное решение:         {greedy_fitness[0]}")
     print(f"Случайное решение:     {rand_fitness[0]}")
+    if exact is not None:
+        print(f"Поток мин. стоимости:   {evaluate(exact.genome())[0]} (верхняя граница {exact.upper_bound})")
 
 def compare_algorithms_plot(ga_score, greedy_score, random_score):
+    plt = rendering.pyplot()
     labels = ['Генетический', 'Жадный', 'Случайный']
     scores = [ga_score, greedy_score, random_score]
     plt.bar(labels, scores, color=['green', 'orange', 'red'])
     plt.ylabel("Фитнес")
     plt.title("Сравнение подходов")
-    plt.show()
+    rendering.show("compare_algorithms_plot")
 
-def main():
+def main(parallel_eval=False, processes=None, cache_size=BATCH_CACHE_SIZE, telemetry=None,
+         termination=None, checkpointer=None, resume_from=None, array_genome=False, engine=None):
     random.seed(126)
-    population = toolbox.population(n=300)
     NGEN = 100
     CXPB, MUTPB = 1, 1
     avg_fitness_history = []
     max_fitness_history = []
-
-    for gen in range(NGEN):
-        offspring = algorithms.varAnd(population, toolbox, cxpb=CXPB, mutpb=MUTPB)
-        fits = list(map(toolbox.evaluate, offspring))
-        for fit, ind in zip(fits, offspring):
-            ind.fitness.values = fit
-        population = toolbox.select(offspring, k=len(population))
-        best_ind = tools.selBest(population, 1)[0]
-        avg_fit = sum(ind.fitness.values[0] for ind in population) / len(population)
-        avg_fitness_history.append(avg_fit)
-        max_fitness_history.append(best_ind.fitness.values[0])
-        print(f"Поколение {gen}: Лучший результат: {best_ind}, Фитнес: {best_ind.fitness.values}")
+    exact = exact_scheduler()
+    telemetry = telemetry or TelemetrySink()
+    # ГА останавливается, как только достигает верхней границы фитнеса
+    termination = termination or TerminationPolicy(target_fitness=exact.upper_bound)
+    termination.start()
+    engine = engine or GenerationEngine()
+
+    # Компактный геном только на этот запуск (см. genome.py)
+    with genome.array_genome_scope(toolbox, array_genome, use_array_genome), \
+            parallel.parallel_evaluation(toolbox, __name__, parallel_eval, processes), \
+            cached_evaluation(toolbox, cache_size) as cache:
+        population = toolbox.population(n=300)
+        population = engine.run(population, toolbox, CXPB, MUTPB, NGEN, telemetry, termination, checkpointer,
+                                resume_from, cache, avg_fitness_history, max_fitness_history)
+    telemetry.close()
+    print(termination.report())
 
     best_ind = tools.selBest(population, 1)[0]
     #print("Лучший результат ГА:", best_ind, "Приспособленность:", best_ind.fitness.values[0])
@@ -162,12 +214,12 @@ def main():
 
     #print("Жадный алгоритм:", greedy, "Приспособленность:", evaluate(greedy)[0])
     #print("Случайный алгоритм:", random_sched, "Приспособленность:", evaluate(random_sched)[0])
-    compare_with_heuristics(best_ind, greedy, random_sched)
+    compare_with_heuristics(best_ind, greedy, random_sched, exact)
 
     plot_schedule(best_ind, "Генетический алгоритм")
     plot_schedule(greedy, "Жадный алгоритм")
     plot_schedule(random_sched, "Случайный алгоритм")
-    plt.show()
+    rendering.show("schedules")
     compare_algorithms_plot(best_ind.fitness.values[0], evaluate(greedy)[0], evaluate(random_sched)[0])
 
 if __name__ == "__main__":
@@ -0,0 +1,223 @@
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import random
+import time
+import tracemalloc
+
+from engine import GenerationEngine
+import instances
+import profiling
+import roster
+
+# Набор бенчмарков для отслеживания регрессий производительности. Для каждого
+# размера экземпляра (операторы x недели) измеряются:
+#   evals_per_sec        — скорость evaluate (и пакетной evaluate_many) каждого скрипта
+#   generations_per_sec  — скорость цикла поколений
+#   peak_memory_bytes    — пиковая память цикла поколений (tracemalloc)
+#   time_to_target_sec   — время достижения целевого фитнеса: ГА, жадный и случайный
+# Каждое измерение выполняется в отдельном свежем процессе, результаты пишутся
+# в JSON и могут сравниваться с сохранённым базовым файлом.
+
+DEFAULT_SIZES = ((10, 1), (100, 4), (1000, 8))
+EVAL_SAMPLE = 2000
+BENCH_POPULATION = 300
+BENCH_GENERATIONS = 20
+TARGET_MAX_GENERATIONS = 200
+NUM_SKILLS = 10
+
+# Модули, их число смен в день и вероятности кроссовера и мутации из их main
+MODELS = {
+    "bless": (3, 1, 1),
+    "best_fitness": (3, 1, 1),
+    "sevenshifts": (1, 1, 1),
+    "sevenshiftsgenetic": (1, 0.7, 0.3),
+}
+
+# Метрики, для которых больше — лучше; для остальных лучше меньшее значение
+HIGHER_IS_BETTER = ("evals_per_sec", "generations_per_sec")
+
+
+# Подставляет в модуль скрипта сгенерированный экземпляр заданного размера
+# прямо из его битовых матриц (см. roster.apply_instance)
+def apply_instance(module, num_operators, weeks, seed=0):
+    shifts_per_day = MODELS.get(module.__name__, (3,))[0]
+    instance = instances.generate_instance(num_operators, NUM_SKILLS, weeks=weeks, shifts_per_day=shifts_per_day,
+                                           skill_density=0.5, preference_density=3 / (7 * shifts_per_day),
+                                           seed=seed)
+    return roster.apply_instance(module, instance, max_shifts=3 * weeks)
+
+
+# Поколение общего цикла скриптов (см. engine.py)
+def run_generation(engine, toolbox, population, cxpb, mutpb):
+    return engine.step(population, toolbox, cxpb, mutpb)[0]
+
+
+def timed_rate(func, count):
+    start = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - start)
+
+
+def measure_evaluate(module):
+    individuals = module.toolbox.population(n=EVAL_SAMPLE)
+    results = {f"{module.__name__}.evaluate": timed_rate(lambda: list(map(module.evaluate, individuals)),
+                                                         len(individuals))}
+    if hasattr(module, "evaluate_population"):
+        results[f"{module.__name__}.evaluate_many"] = timed_rate(lambda: module.evaluate_many(individuals),
+                                                                 len(individuals))
+    return [{"metric": "evals_per_sec", "variant": variant, "value": value} for variant, value in results.items()]
+
+
+def measure_generations(module):
+    _, cxpb, mutpb = MODELS[module.__name__]
+    population = module.toolbox.population(n=BENCH_POPULATION)
+    engine = GenerationEngine()
+    engine.start()
+
+    def loop():
+        nonlocal population
+        for _ in range(BENCH_GENERATIONS):
+            population = run_generation(engine, module.toolbox, population, cxpb, mutpb)
+
+    rate = timed_rate(loop, BENCH_GENERATIONS)
+    # Сводка по фазам (при --profile или BLESS_PROFILE=1)
+    if engine.profiler.enabled:
+        print(f"Профиль цикла поколений: {module.__name__}")
+        engine.profiler.finish()
+
+    # Память измеряется отдельным коротким прогоном: tracemalloc заметно замедляет цикл
+    tracemalloc.start()
+    run_generation(engine, module.toolbox, population, cxpb, mutpb)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return [{"metric": "generations_per_sec", "variant": module.__name__, "value": rate},
+            {"metric": "peak_memory_bytes", "variant": module.__name__, "value": peak}]
+
+
+# ГА, жадный и случайный планировщики atg3.py против общей цели. По умолчанию
+# цель — фитнес жадного решения. Случайный поиск получает тот же бюджет
+# оценок, что и ГА.
+def measure_time_to_target(module, target=None):
+    start = time.perf_counter()
+    greedy_fitness = module.evaluate(module.greedy_scheduler())[0]
+    greedy_time = time.perf_counter() - start
+    if target is None:
+        target = greedy_fitness
+
+    start = time.perf_counter()
+    population = module.toolbox.population(n=BENCH_POPULATION)
+    engine = GenerationEngine()
+    engine.start()
+    ga_fitness = float("-inf")
+    for _ in range(TARGET_MAX_GENERATIONS):
+        population = run_generation(engine, module.toolbox, population, 1, 1)
+        ga_fitness = max(ind.fitness.values[0] for ind in population)
+        if ga_fitness >= target:
+            break
+    ga_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    random_fitness = float("-inf")
+    for _ in range(BENCH_POPULATION * TARGET_MAX_GENERATIONS):
+        random_fitness = max(random_fitness, module.evaluate(module.random_scheduler())[0])
+        if random_fitness >= target:
+            break
+    random_time = time.perf_counter() - start
+
+    return [{"metric": "time_to_target_sec", "variant": f"atg3.{solver}", "value": elapsed,
+             "reached": fitness >= target, "fitness": fitness, "target": target}
+            for solver, elapsed, fitness in (("ga", ga_time, ga_fitness), ("greedy", greedy_time, greedy_fitness),
+                                             ("random", random_time, random_fitness))]
+
+
+def _run_task(task):
+    kind, module_name, num_operators, weeks, target = task
+    random.seed(0)
+    module = apply_instance(importlib.import_module(module_name), num_operators, weeks)
+    if kind == "evaluate":
+        records = measure_evaluate(module)
+    elif kind == "generations":
+        records = measure_generations(module)
+    else:
+        records = measure_time_to_target(module, target)
+    for record in records:
+        record.update(operators=num_operators, weeks=weeks)
+    return records
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, target=None):
+    tasks = []
+    for num_operators, weeks in sizes:
+        for module_name in MODELS:
+            tasks.append(("evaluate", module_name, num_operators, weeks, target))
+            tasks.append(("generations", module_name, num_operators, weeks, target))
+        tasks.append(("target", "atg3", num_operators, weeks, target))
+
+    # Каждая задача — в новом процессе: чистый импорт модулей и независимые замеры
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        return [record for records in pool.imap(_run_task, tasks) for record in records]
+
+
+def record_key(record):
+    return record["metric"], record["variant"], record["operators"], record["weeks"]
+
+
+# Сравнение с базовым прогоном: регрессия — ухудшение больше чем на tolerance
+def compare(results, baseline, tolerance=0.2):
+    baseline_values = {record_key(record): record["value"] for record in baseline}
+    report = []
+    for record in results:
+        base = baseline_values.get(record_key(record))
+        if not base:
+            continue
+        ratio = record["value"] / base
+        if record["metric"] in HIGHER_IS_BETTER:
+            regressed = ratio < 1 - tolerance
+        else:
+            regressed = ratio > 1 + tolerance
+        report.append(dict(record, baseline=base, ratio=ratio, regressed=regressed))
+    return report
+
+
+def parse_sizes(text):
+    return tuple(tuple(int(part) for part in size.split("x")) for size in text.split(","))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки оценки, цикла поколений и решателей")
+    parser.add_argument("--sizes", type=parse_sizes, default=DEFAULT_SIZES,
+                        help="размеры экземпляров: операторы x недели, например 10x1,100x4")
+    parser.add_argument("--target", type=float, default=None, help="целевой фитнес (по умолчанию — жадное решение)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="JSON предыдущего прогона для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--profile", action="store_true", help="печатать время фаз цикла поколений")
+    args = parser.parse_args()
+    if args.profile:
+        os.environ[profiling.PROFILE_ENV] = "1"
+
+    results = run_benchmarks(args.sizes, args.target)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for record in results:
+        print(f"{record['metric']:22} {record['variant']:32} {record['operators']:>6}x{record['weeks']:<3}"
+              f" {record['value']:.4g}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report = compare(results, json.load(f), args.tolerance)
+        regressions = [record for record in report if record["regressed"]]
+        for record in regressions:
+            print(f"Регрессия: {record['metric']} {record['variant']} {record['operators']}x{record['weeks']}:"
+                  f" {record['value']:.4g} против {record['baseline']:.4g}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
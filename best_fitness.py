@@ -1,6 +1,16 @@
 import random
-import matplotlib.pyplot as plt
-from deap import base, creator, tools, algorithms
+from deap import base, creator, tools
+
+import parallel
+import pareto
+from delta_eval import DeltaEvaluator, TrackedGenome, delta_evaluation
+from engine import GenerationEngine
+from fitness_cache import DEFAULT_CACHE_SIZE, cached_evaluation
+from problem import ProblemInstance
+import rendering
+from telemetry import TelemetrySink
+from termination import TerminationPolicy
+import variation
 
 # Конфигурация задачи
 NUM_OPERATORS = 10  # Количество операторов
@@ -47,11 +57,14 @@ SHIFT_TYPES = [
     [7, 8], [1, 3], [0, 8]   # День 7
 ]
 
+# Таблицы навыков и предпочтений, скомпилированные в битовые маски (см. problem.py)
+PROBLEM = ProblemInstance(NUM_OPERATORS, NUM_SHIFTS, OPERATOR_SKILLS, PREFERENCES, SHIFT_TYPES)
+
 def prefers_shift(operator, shift):
-    return shift in PREFERENCES.get(operator, [])
+    return PROBLEM.prefers_shift(operator, shift)
 
 def can_perform_shift(operator, shift):
-    return all(skill in OPERATOR_SKILLS[operator] for skill in SHIFT_TYPES[shift])
+    return PROBLEM.can_perform_shift(operator, shift)
 
 # Функция оценки приспособленности
 def evaluate(individual):
@@ -84,45 +97,83 @@ def evaluate(individual):
     return (preference_score, -invalid_skill_penalty, -overload_penalty, -duplicate_shift_penalty)
 
 
+# Цели: evaluate уже возвращает штрафы со знаком минус, поэтому все веса
+# положительные — каждая цель максимизируется
+OBJECTIVES = ("preference_score", "invalid_skill_penalty", "overload_penalty", "duplicate_shift_penalty")
+
 # Настройка генетического алгоритма
-creator.create("FitnessMulti", base.Fitness, weights=(1.0, -1.0, -1.0, -1.0))
-creator.create("Individual", list, fitness=creator.FitnessMulti)
+creator.create("FitnessMulti", base.Fitness, weights=(1.0, 1.0, 1.0, 1.0))
+creator.create("Individual", TrackedGenome, fitness=creator.FitnessMulti)
+INDIVIDUAL = creator.Individual
 
 toolbox = base.Toolbox()
-toolbox.register("attr_int", random.randint, 0, NUM_OPERATORS - 1)
-toolbox.register("individual", tools.initRepeat, creator.Individual, toolbox.attr_int, NUM_SHIFTS)
-toolbox.register("population", tools.initRepeat, list, toolbox.individual)
-
-toolbox.register("mate", tools.cxTwoPoint)
-toolbox.register("mutate", tools.mutFlipBit, indpb=0.05)
+# Гены берутся из операторов, допущенных к смене; кроссовер режет по границам дней;
+# доля WARM_START_FRACTION стартовой популяции — жадные расписания (см. variation.py)
+EXPLORATION_RATE = 0.1
+WARM_START_FRACTION = 0.1
+GENE_SHIFTS = tuple(range(NUM_SHIFTS))
+variation.register_eligible(toolbox, INDIVIDUAL, PROBLEM, GENE_SHIFTS, SHIFTS_PER_DAY, EXPLORATION_RATE,
+                            max_shifts=MAX_SHIFTS_PER_OPERATOR, warm_start=WARM_START_FRACTION)
 toolbox.register("select", tools.selTournament, tournsize=3)
+# Режим Парето: NSGA-II отбирает из родителей и потомков, а родителей для
+# вариации выбирает турнир по рангу и скученности (см. pareto.py)
+toolbox.register("select_pareto", pareto.sel_nsga2)
+toolbox.register("select_parents", pareto.sel_parents)
 toolbox.register("evaluate", evaluate)
 
+# Оценка списка особей; в параллельном режиме подменяется пулом (см. parallel.py)
+def evaluate_many(individuals):
+    return list(map(evaluate, individuals))
+
+toolbox.register("evaluate_many", evaluate_many)
+
+# Инкрементальная оценка мутировавших особей (см. delta_eval.py)
+DELTA_EVALUATOR = DeltaEvaluator(
+    PROBLEM, SHIFTS_PER_DAY, MAX_SHIFTS_PER_OPERATOR,
+    lambda preference, invalid_skill, overload, duplicates: (preference, -invalid_skill, -overload, -duplicates))
+
 # Основной цикл алгоритма
-def main():
+def main(parallel_eval=False, processes=None, cache_size=DEFAULT_CACHE_SIZE, delta_eval=False, telemetry=None,
+         termination=None, checkpointer=None, resume_from=None, pareto_mode=False, front_path=None,
+         engine=None):
+    # Пул процессов подменил бы evaluate_many инкрементальной оценки полной оценкой
+    if delta_eval and parallel_eval:
+        raise ValueError("Инкрементальная оценка (delta_eval) несовместима с параллельной (parallel_eval)")
     random.seed(23)                         # Установка начального значения для генератора случайных чисел для воспроизводимости результатов.
     population = toolbox.population(n=300)  # Создание начальной популяции из 300 индивидов.
     NGEN = 450                              # Количество поколений для выполнения генетического алгоритма.
     CXPB, MUTPB = 1, 1                  # Вероятности кроссовера и мутации соответственно.
-
-    for gen in range(NGEN):
-        offspring = algorithms.varAnd(population, toolbox, cxpb=CXPB, mutpb=MUTPB)
-        fits = map(toolbox.evaluate, offspring)
-
-        for fit, ind in zip(fits, offspring):
-            ind.fitness.values = fit
-
-        population = toolbox.select(offspring, k=len(population))
-        
-        # Отображение лучшего результата каждого поколения
-        best_ind = tools.selBest(population, 1)[0]
-        print(f"Поколение {gen}: Лучший фитнес: {best_ind.fitness.values}")
+    telemetry = telemetry or TelemetrySink()  # Запись статистики поколений (см. telemetry.py)
+    termination = termination or TerminationPolicy()  # Критерии досрочного останова (см. termination.py)
+    termination.start()
+    # Цикл поколений с элитами (см. engine.py); в режиме Парето — NSGA-II
+    # по родителям и потомкам вместе, элиты не нужны
+    if pareto_mode:
+        engine = engine or GenerationEngine(elitism=0, replacement="plus")
+    engine = engine or GenerationEngine()
+
+    with delta_evaluation(toolbox, DELTA_EVALUATOR, delta_eval), \
+            parallel.parallel_evaluation(toolbox, __name__, parallel_eval, processes), \
+            cached_evaluation(toolbox, cache_size) as cache:
+        population = engine.run(population, toolbox, CXPB, MUTPB, NGEN, telemetry, termination, checkpointer,
+                                resume_from, cache, select=toolbox.select_pareto if pareto_mode else None,
+                                select_parents=toolbox.select_parents if pareto_mode else None)
+
+    telemetry.close()
+    print(termination.report())
 
     best_ind = tools.selBest(population, 1)[0]
     print("Лучший результат: %s, %s" % (best_ind, best_ind.fitness.values))
     visualize_schedule(best_ind)
 
+    if pareto_mode:
+        front = pareto.pareto_front(population)
+        print(f"Фронт Парето: {len(front)} расписаний")
+        if front_path:
+            pareto.export_front(front, front_path, OBJECTIVES)
+
 def visualize_schedule(schedule):
+    plt = rendering.pyplot()
     fig, ax = plt.subplots()
     colors = plt.get_cmap("tab10")
 
@@ -140,7 +191,7 @@ def visualize_schedule(schedule):
     ax.set_xlabel("Смен")
     ax.set_ylabel("Дней")
     ax.set_title("График работы колл-центра")
-    plt.show()
+    rendering.show("visualize_schedule")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,99 @@
+import random
+
+from problem import to_mask
+
+# Битовое представление модели с бригадами переменного размера
+# (sevenshiftsgenetic.py): ген смены — целое число, бит op которого означает,
+# что оператор op работает в этой смене. Python int не ограничен 64 битами,
+# поэтому в бригаде могут быть сотни операторов. Повторов в бригаде не бывает
+# по построению, а все подсчёты сводятся к popcount (int.bit_count) по
+# пересечениям с заранее собранными масками смен.
+
+
+class CrewMasks:
+    def __init__(self, problem):
+        self.num_operators = problem.num_operators
+        self.num_shifts = problem.num_shifts
+        # Смена -> маска допущенных операторов и маска операторов, предпочитающих смену
+        self.eligible = list(problem.eligible_operator_masks)
+        self.preferring = [to_mask(op for op in range(problem.num_operators)
+                                   if (problem.preferred_shifts[op] >> shift) & 1)
+                           for shift in range(problem.num_shifts)]
+
+
+def to_crews(individual):
+    return [[op for op in range(crew.bit_length()) if (crew >> op) & 1] for crew in individual]
+
+
+def from_crews(container, crews):
+    return container(to_mask(operators) for operators in crews)
+
+
+# Номер index-го (с нуля) установленного бита: двоичный поиск по popcount половин
+def nth_set_bit(mask, index):
+    position = 0
+    width = mask.bit_length()
+    while width > 1:
+        half = width // 2
+        low = mask & ((1 << half) - 1)
+        count = low.bit_count()
+        if index < count:
+            mask, width = low, half
+        else:
+            index -= count
+            mask >>= half
+            position += half
+            width -= half
+    return position
+
+
+def init_crews(container, num_operators, num_shifts, min_crew=1, max_crew=5):
+    return container(to_mask(random.sample(range(num_operators), random.randint(min_crew, max_crew)))
+                     for _ in range(num_shifts))
+
+
+# Как mutate в sevenshiftsgenetic.py: в случайной смене с вероятностью 0.5
+# убирается случайный оператор бригады, иначе добавляется случайный оператор
+def mut_crew(individual, num_operators):
+    shift = random.randint(0, len(individual) - 1)
+    crew = individual[shift]
+    if random.random() < 0.5 and crew:
+        individual[shift] = crew & ~(1 << nth_set_bit(crew, random.randint(0, crew.bit_count() - 1)))
+    else:
+        individual[shift] = crew | (1 << random.randint(0, num_operators - 1))
+    return individual,
+
+
+# Двухточечный кроссовер по строке битов смена x оператор: биты между
+# точками разреза меняются местами через XOR
+def cx_two_point_bits(ind1, ind2, num_operators):
+    size = len(ind1) * num_operators
+    if size < 2:
+        return ind1, ind2
+    start, end = sorted(random.sample(range(size + 1), 2))
+    for shift in range(start // num_operators, min(-(-end // num_operators), len(ind1))):
+        low = max(start - shift * num_operators, 0)
+        high = min(end - shift * num_operators, num_operators)
+        mask = ((1 << high) - 1) ^ ((1 << low) - 1)
+        diff = (ind1[shift] ^ ind2[shift]) & mask
+        ind1[shift] ^= diff
+        ind2[shift] ^= diff
+    return ind1, ind2
+
+
+# Размер бригады, число предпочитающих смену и допущенных операторов для каждой смены
+def crew_counts(individual, masks):
+    return [(crew.bit_count(), (crew & masks.preferring[shift]).bit_count(),
+             (crew & masks.eligible[shift]).bit_count())
+            for shift, crew in enumerate(individual)]
+
+
+# Сумма превышений лимита смен по операторам. levels[k] — маска операторов,
+# стоящих хотя бы в k + 1 сменах (вертикальный счётчик по битам всех смен)
+def overload(individual, max_shifts):
+    levels = [0] * len(individual)
+    for processed, crew in enumerate(individual):
+        for k in range(processed, 0, -1):
+            levels[k] |= levels[k - 1] & crew
+        levels[0] |= crew
+    return sum(level.bit_count() for level in levels[max_shifts:])
@@ -1,6 +1,19 @@
+import array
 import random
-import matplotlib.pyplot as plt
-from deap import base, creator, tools, algorithms
+from deap import base, creator, tools
+
+import genome
+import parallel
+from delta_eval import DeltaEvaluator, TrackedGenome, delta_evaluation
+from engine import GenerationEngine
+from fitness_cache import BATCH_CACHE_SIZE, cached_evaluation
+import population_eval
+from problem import ProblemInstance
+from population_eval import population_to_matrix
+import rendering
+from telemetry import TelemetrySink
+from termination import TerminationPolicy
+import variation
 
 # Конфигурация задачи
 NUM_OPERATORS = 10  # Количество операторов
@@ -47,11 +60,14 @@ SHIFT_TYPES = [
     [7, 8], [1, 3], [0, 8]   # День 7
 ]
 
+# Таблицы навыков и предпочтений, скомпилированные в битовые маски (см. problem.py)
+PROBLEM = ProblemInstance(NUM_OPERATORS, NUM_SHIFTS, OPERATOR_SKILLS, PREFERENCES, SHIFT_TYPES)
+
 def prefers_shift(operator, shift):
-    return shift in PREFERENCES.get(operator, [])
+    return PROBLEM.prefers_shift(operator, shift)
 
 def can_perform_shift(operator, shift):
-    return all(skill in OPERATOR_SKILLS[operator] for skill in SHIFT_TYPES[shift])
+    return PROBLEM.can_perform_shift(operator, shift)
 
 # Функция оценки приспособленности
 def evaluate(individual):
@@ -84,43 +100,80 @@ def evaluate(individual):
 
 # Настройка генетического алгоритма
 creator.create("FitnessMax", base.Fitness, weights=(1.0,))
-creator.create("Individual", list, fitness=creator.FitnessMax)
+creator.create("Individual", TrackedGenome, fitness=creator.FitnessMax)
+creator.create("ArrayIndividual", array.array, typecode=genome.TYPECODE, fitness=creator.FitnessMax)
+# Свои ссылки на классы: creator — общее пространство имён, и после импорта
+# другого скрипта creator.Individual указывал бы на его класс
+INDIVIDUAL = creator.Individual
+ARRAY_INDIVIDUAL = creator.ArrayIndividual
 
 toolbox = base.Toolbox()
-toolbox.register("attr_int", random.randint, 0, NUM_OPERATORS - 1)
-toolbox.register("individual", tools.initRepeat, creator.Individual, toolbox.attr_int, NUM_SHIFTS)
-toolbox.register("population", tools.initRepeat, list, toolbox.individual)
-
-toolbox.register("mate", tools.cxTwoPoint)
-toolbox.register("mutate", tools.mutFlipBit, indpb=0.05)
+# Гены берутся из операторов, допущенных к смене; кроссовер режет по границам дней;
+# доля WARM_START_FRACTION стартовой популяции — жадные расписания (см. variation.py)
+EXPLORATION_RATE = 0.1
+WARM_START_FRACTION = 0.1
+GENE_SHIFTS = tuple(range(NUM_SHIFTS))
+variation.register_eligible(toolbox, INDIVIDUAL, PROBLEM, GENE_SHIFTS, SHIFTS_PER_DAY, EXPLORATION_RATE,
+                            max_shifts=MAX_SHIFTS_PER_OPERATOR, warm_start=WARM_START_FRACTION)
 toolbox.register("select", tools.selTournament, tournsize=3)
 toolbox.register("evaluate", evaluate)
 
+# Пакетная оценка всей популяции за один проход (см. population_eval.py)
+PREFERENCE_MATRIX, SKILL_MATRIX = population_eval.build_lookup_tables(PROBLEM)
+
+def evaluate_population(pop_matrix):
+    return population_eval.evaluate_population(
+        pop_matrix, PREFERENCE_MATRIX, SKILL_MATRIX, SHIFTS_PER_DAY, MAX_SHIFTS_PER_OPERATOR)
+
+def evaluate_many(individuals):
+    return population_eval.fitness_tuples(evaluate_population(population_to_matrix(individuals)))
+
+toolbox.register("evaluate_population", evaluate_population)
+toolbox.register("evaluate_many", evaluate_many)
+
+# Компактный геном uint16 с копированием буфера вместо deepcopy (см. genome.py)
+def use_array_genome():
+    genome.register_array_genome(toolbox, ARRAY_INDIVIDUAL, PROBLEM, GENE_SHIFTS, SHIFTS_PER_DAY,
+                                 exploration=EXPLORATION_RATE, max_shifts=MAX_SHIFTS_PER_OPERATOR,
+                                 warm_start=WARM_START_FRACTION)
+
+# Инкрементальная оценка мутировавших особей (см. delta_eval.py)
+DELTA_EVALUATOR = DeltaEvaluator(
+    PROBLEM, SHIFTS_PER_DAY, MAX_SHIFTS_PER_OPERATOR,
+    lambda preference, invalid_skill, overload, duplicates: (preference - 5 * invalid_skill - duplicates - 5 * overload,))
+
 # Основной цикл алгоритма
-def main():
+def main(parallel_eval=False, processes=None, cache_size=BATCH_CACHE_SIZE, delta_eval=False, telemetry=None,
+         termination=None, checkpointer=None, resume_from=None, array_genome=False, engine=None):
+    # Пул процессов подменил бы evaluate_many инкрементальной оценки полной оценкой
+    if delta_eval and parallel_eval:
+        raise ValueError("Инкрементальная оценка (delta_eval) несовместима с параллельной (parallel_eval)")
     random.seed(23)                         # Установка начального значения для генератора случайных чисел для воспроизводимости результатов.
-    population = toolbox.population(n=300)  # Создание начальной популяции из 300 индивидов.
     NGEN = 450                              # Количество поколений для выполнения генетического алгоритма.
     CXPB, MUTPB = 1, 1                  # Вероятности кроссовера и мутации соответственно.
-
-    for gen in range(NGEN):
-        offspring = algorithms.varAnd(population, toolbox, cxpb=CXPB, mutpb=MUTPB)
-        fits = map(toolbox.evaluate, offspring)
-
-        for fit, ind in zip(fits, offspring):
-            ind.fitness.values = fit
-
-        population = toolbox.select(offspring, k=len(population))
-        
-        # Отображение лучшего результата каждого поколения
-        best_ind = tools.selBest(population, 1)[0]
-        print(f"Поколение {gen}: Лучший результат: {best_ind}, Фитнес: {best_ind.fitness.values}")
+    telemetry = telemetry or TelemetrySink()  # Запись статистики поколений (см. telemetry.py)
+    termination = termination or TerminationPolicy()  # Критерии досрочного останова (см. termination.py)
+    termination.start()
+    engine = engine or GenerationEngine()  # Цикл поколений с элитами (см. engine.py)
+
+    # Компактный геном только на этот запуск (см. genome.py)
+    with genome.array_genome_scope(toolbox, array_genome, use_array_genome, delta_eval), \
+            delta_evaluation(toolbox, DELTA_EVALUATOR, delta_eval), \
+            parallel.parallel_evaluation(toolbox, __name__, parallel_eval, processes), \
+            cached_evaluation(toolbox, cache_size) as cache:
+        population = toolbox.population(n=300)  # Создание начальной популяции из 300 индивидов.
+        population = engine.run(population, toolbox, CXPB, MUTPB, NGEN, telemetry, termination, checkpointer,
+                                resume_from, cache)
+
+    telemetry.close()
+    print(termination.report())
 
     best_ind = tools.selBest(population, 1)[0]
     print("Лучший результат: %s, %s" % (best_ind, best_ind.fitness.values))
     visualize_schedule(best_ind)
 
 def visualize_schedule(schedule):
+    plt = rendering.pyplot()
     fig, ax = plt.subplots()
     colors = plt.get_cmap("tab10")
 
@@ -138,7 +191,7 @@ def visualize_schedule(schedule):
     ax.set_xlabel("Смен")
     ax.set_ylabel("Дней")
     ax.set_title("График работы колл-центра")
-    plt.show()
+    rendering.show("visualize_schedule")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
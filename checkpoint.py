@@ -0,0 +1,183 @@
+import json
+import os
+import queue
+import random
+import threading
+
+import numpy as np
+
+# Контрольные точки длинных запусков ГА. Состояние поколения: геномы и фитнес
+# популяции, состояние генераторов random и numpy.random, истории среднего и
+# лучшего фитнеса, номер поколения, элиты и состояние политики останова. Снимок
+# делается в цикле (копия массивов), а запись на диск идёт в фоновом потоке:
+# если предыдущая запись ещё не закончилась, ожидающий снимок заменяется
+# более новым, поэтому цикл никогда не ждёт диск. Файл — несжатый .npz,
+# записывается во временный файл и атомарно переименовывается.
+# Продолжение с контрольной точки даёт тот же результат, что и запуск без перерыва.
+
+DEFAULT_INTERVAL = 100
+CLOSE_POLL_INTERVAL = 0.1
+
+
+# Плоские геномы — матрица особи x гены. Геномы из списков (sevenshiftsgenetic.py)
+# хранятся плоско: значения, длины внутренних списков и их число в каждой особи.
+# Элиты (engine.py) хранятся так же, с префиксом "elite_".
+def encode_population(population, prefix=""):
+    arrays = {
+        prefix + "fitness": np.array([ind.fitness.values for ind in population], dtype=np.float64),
+        prefix + "fitness_valid": np.array([ind.fitness.valid for ind in population], dtype=bool),
+    }
+    if population and isinstance(population[0][0], list):
+        arrays[prefix + "genes"] = np.array([gene for ind in population for inner in ind for gene in inner],
+                                            dtype=np.int64)
+        arrays[prefix + "inner_lengths"] = np.array([len(inner) for ind in population for inner in ind],
+                                                    dtype=np.int64)
+        arrays[prefix + "genome_lengths"] = np.array([len(ind) for ind in population], dtype=np.int64)
+    else:
+        genomes = [list(ind) for ind in population]
+        width = max((gene.bit_length() for genome in genomes for gene in genome), default=0)
+        if width < 64:
+            arrays[prefix + "genomes"] = np.array(genomes, dtype=np.int64)
+        else:
+            # Гены шире int64 (маски бригад, bitcrew.py) хранятся байтами little-endian
+            num_bytes = (width + 7) // 8
+            data = b"".join(gene.to_bytes(num_bytes, "little") for genome in genomes for gene in genome)
+            arrays[prefix + "genome_bytes"] = np.frombuffer(data, dtype=np.uint8).reshape(len(genomes), -1, num_bytes)
+    return arrays
+
+
+def decode_population(arrays, container, prefix=""):
+    if prefix + "fitness" not in arrays:
+        return []
+    if prefix + "genomes" in arrays:
+        genomes = arrays[prefix + "genomes"].tolist()
+    elif prefix + "genome_bytes" in arrays:
+        genomes = [[int.from_bytes(gene.tobytes(), "little") for gene in genome]
+                   for genome in arrays[prefix + "genome_bytes"]]
+    else:
+        genes = iter(arrays[prefix + "genes"].tolist())
+        inner_lengths = iter(arrays[prefix + "inner_lengths"].tolist())
+        genomes = [[[next(genes) for _ in range(next(inner_lengths))] for _ in range(length)]
+                   for length in arrays[prefix + "genome_lengths"].tolist()]
+    population = []
+    for genome, values, valid in zip(genomes, arrays[prefix + "fitness"].tolist(),
+                                     arrays[prefix + "fitness_valid"].tolist()):
+        ind = container(genome)
+        if valid:
+            ind.fitness.values = tuple(values)
+        population.append(ind)
+    return population
+
+
+# Состояние random: (версия, 625 слов Мерсенна, gauss_next)
+def encode_rng():
+    version, words, gauss_next = random.getstate()
+    kind, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+    return {
+        "python_rng": np.array(words, dtype=np.uint64),
+        "numpy_rng": keys.copy(),
+        "rng_meta": {"python_version": version, "python_gauss_next": gauss_next, "numpy_kind": kind,
+                     "numpy_pos": pos, "numpy_has_gauss": has_gauss, "numpy_cached_gaussian": cached_gaussian},
+    }
+
+
+def restore_rng(arrays, meta):
+    random.setstate((meta["python_version"], tuple(arrays["python_rng"].tolist()), meta["python_gauss_next"]))
+    np.random.set_state((meta["numpy_kind"], arrays["numpy_rng"], meta["numpy_pos"], meta["numpy_has_gauss"],
+                         meta["numpy_cached_gaussian"]))
+
+
+def write_checkpoint(path, snapshot):
+    arrays, meta = snapshot
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        np.savez(f, meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8), **arrays)
+    os.replace(temp_path, path)
+
+
+def load_checkpoint(path):
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files}
+    meta = json.loads(arrays.pop("meta").tobytes())
+    return arrays, meta
+
+
+class Checkpointer:
+    def __init__(self, path, interval=DEFAULT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.pending = queue.Queue(maxsize=1)
+        self.written = 0
+        self.error = None
+        self.closed = False
+        self.thread = threading.Thread(target=self._writer, daemon=True)
+        self.thread.start()
+
+    # Ошибка записи не останавливает поток: он продолжает разбирать очередь,
+    # а ошибка поднимается в цикле из следующего save или из close
+    def _writer(self):
+        while True:
+            snapshot = self.pending.get()
+            if snapshot is None:
+                return
+            try:
+                write_checkpoint(self.path, snapshot)
+                self.written += 1
+            except Exception as error:
+                self.error = error
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise self.error
+
+    # Снимок после поколения gen; пишется каждые interval поколений
+    def save(self, gen, population, avg_history=(), max_history=(), termination=None, elites=(), force=False):
+        if self.closed:
+            raise ValueError(f"Контрольные точки {self.path} уже закрыты")
+        self._raise_error()
+        if not force and (gen + 1) % self.interval:
+            return
+        rng = encode_rng()
+        arrays = dict(encode_population(population), **encode_population(elites, "elite_"),
+                      avg_history=np.array(avg_history, dtype=np.float64),
+                      max_history=np.array(max_history, dtype=np.float64),
+                      python_rng=rng["python_rng"], numpy_rng=rng["numpy_rng"])
+        meta = dict(rng["rng_meta"], generation=gen,
+                    termination=termination.state() if termination is not None else None)
+        snapshot = (arrays, meta)
+        try:
+            self.pending.put_nowait(snapshot)
+        except queue.Full:
+            # Фоновая запись занята: ожидающий снимок заменяется новым
+            try:
+                self.pending.get_nowait()
+            except queue.Empty:
+                pass
+            self.pending.put_nowait(snapshot)
+
+    # Дожидается записи последнего снимка. Повторный вызов только поднимает
+    # ошибку записи; ожидание очереди прерывается, если поток уже завершился
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            while self.thread.is_alive():
+                try:
+                    self.pending.put(None, timeout=CLOSE_POLL_INTERVAL)
+                    break
+                except queue.Full:
+                    pass
+            self.thread.join()
+        self._raise_error()
+
+
+# Восстанавливает состояние запуска: популяцию, генераторы случайных чисел и
+# политику останова. Возвращает (популяция, avg_history, max_history,
+# следующее поколение, элиты).
+def resume(path, container, termination=None):
+    arrays, meta = load_checkpoint(path)
+    restore_rng(arrays, meta)
+    if termination is not None and meta["termination"] is not None:
+        termination.restore(meta["termination"])
+    return (decode_population(arrays, container), arrays["avg_history"].tolist(),
+            arrays["max_history"].tolist(), meta["generation"] + 1,
+            decode_population(arrays, container, "elite_"))
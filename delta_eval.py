@@ -0,0 +1,212 @@
+import copy
+from contextlib import contextmanager
+
+import numpy as np
+
+import population_eval
+
+# Инкрементальная оценка для моделей "одна смена — один оператор".
+# После varAnd мутированный потомок обычно отличается от родителя одним-двумя
+# генами, поэтому вместо полного пересчёта каждая особь хранит промежуточное
+# состояние (счётчики смен по операторам, повторы по дням, частичные суммы)
+# и обновляет его только по изменённым позициям.
+
+DEFAULT_MAX_CHANGES = 4
+
+
+# Геном, который запоминает изменённые позиции. Запись по индексу (мутация)
+# и запись срезом (кроссовер обменивает дни) попадают в журнал позициями,
+# где значение действительно изменилось, вместе со старым значением. Только
+# срез, меняющий длину генома, сбрасывает состояние до полной оценки.
+class TrackedGenome(list):
+    def __setitem__(self, index, value):
+        state = self.__dict__.get("delta_state")
+        if state is not None:
+            if isinstance(index, slice):
+                value = list(value)
+                positions = range(*index.indices(len(self)))
+                if len(positions) != len(value):
+                    self.delta_state = None
+                else:
+                    for position, new in zip(positions, value):
+                        old = list.__getitem__(self, position)
+                        if old != new:
+                            state.changes.setdefault(position, old)
+            else:
+                if index < 0:
+                    index += len(self)
+                state.changes.setdefault(index, list.__getitem__(self, index))
+        list.__setitem__(self, index, value)
+
+    # toolbox.clone копирует каждого родителя: гены и счётчики состояния —
+    # списки целых, поэтому ни обобщённый обход deepcopy, ни __init__ класса
+    # из creator (он создаёт фитнес, который тут же заменится копией) не нужны
+    def __deepcopy__(self, memo):
+        clone = self.__class__.__new__(self.__class__)
+        list.extend(clone, self)
+        for name, value in self.__dict__.items():
+            clone.__dict__[name] = copy.deepcopy(value, memo)
+        return clone
+
+
+class ScheduleState:
+    def __init__(self, problem, genome, shifts_per_day, max_shifts_per_operator):
+        self.shifts_per_day = shifts_per_day
+        self.max_shifts_per_operator = max_shifts_per_operator
+        self.changes = {}
+
+        self.preference_score = 0
+        self.invalid_skill_penalty = 0
+        self.shifts_per_operator = [0] * problem.num_operators
+        for shift, operator in enumerate(genome):
+            self.shifts_per_operator[operator] += 1
+            if problem.prefers_shift(operator, shift):
+                self.preference_score += 1
+            if not problem.can_perform_shift(operator, shift):
+                self.invalid_skill_penalty += 1
+
+        self.overload_penalty = sum(max(count - max_shifts_per_operator, 0)
+                                    for count in self.shifts_per_operator)
+        self.duplicate_days = [self.day_has_duplicates(genome, start)
+                               for start in range(0, len(genome), shifts_per_day)]
+        self.duplicate_shift_penalty = sum(self.duplicate_days)
+
+    # Состояния целой пачки особей по строкам матрицы популяции (см. population_eval.py)
+    @classmethod
+    def from_matrix(cls, pop_matrix, preference_matrix, skill_matrix, shifts_per_day, max_shifts_per_operator):
+        shift_index = np.arange(pop_matrix.shape[1])
+        preference = preference_matrix[pop_matrix, shift_index].sum(axis=1).tolist()
+        invalid_skill = (~skill_matrix[pop_matrix, shift_index]).sum(axis=1).tolist()
+        counts = population_eval.operator_counts(pop_matrix, preference_matrix.shape[0])
+        overload = np.maximum(counts - max_shifts_per_operator, 0).sum(axis=1).tolist()
+        duplicate_days = population_eval.day_duplicates(pop_matrix, shifts_per_day).astype(np.int64)
+
+        states = []
+        for row in range(len(pop_matrix)):
+            state = cls.__new__(cls)
+            state.shifts_per_day = shifts_per_day
+            state.max_shifts_per_operator = max_shifts_per_operator
+            state.changes = {}
+            state.preference_score = preference[row]
+            state.invalid_skill_penalty = invalid_skill[row]
+            state.shifts_per_operator = counts[row].tolist()
+            state.overload_penalty = overload[row]
+            state.duplicate_days = duplicate_days[row].tolist()
+            state.duplicate_shift_penalty = sum(state.duplicate_days)
+            states.append(state)
+        return states
+
+    def __deepcopy__(self, memo):
+        clone = ScheduleState.__new__(ScheduleState)
+        clone.__dict__.update(self.__dict__)
+        clone.changes = dict(self.changes)
+        clone.shifts_per_operator = list(self.shifts_per_operator)
+        clone.duplicate_days = list(self.duplicate_days)
+        return clone
+
+    def day_has_duplicates(self, genome, start):
+        day_shifts = list.__getitem__(genome, slice(start, start + self.shifts_per_day))
+        return len(set(day_shifts)) < len(day_shifts)
+
+    # Применяет журнал изменений генома: O(число изменённых генов)
+    def apply_changes(self, problem, genome):
+        changed_days = set()
+        for shift, old in self.changes.items():
+            new = list.__getitem__(genome, shift)
+            if new == old:
+                continue
+            changed_days.add(shift // self.shifts_per_day)
+
+            if self.shifts_per_operator[old] > self.max_shifts_per_operator:
+                self.overload_penalty -= 1
+            self.shifts_per_operator[old] -= 1
+            self.shifts_per_operator[new] += 1
+            if self.shifts_per_operator[new] > self.max_shifts_per_operator:
+                self.overload_penalty += 1
+
+            self.preference_score += problem.prefers_shift(new, shift) - problem.prefers_shift(old, shift)
+            self.invalid_skill_penalty += (problem.can_perform_shift(old, shift)
+                                           - problem.can_perform_shift(new, shift))
+
+        for day in changed_days:
+            duplicated = self.day_has_duplicates(genome, day * self.shifts_per_day)
+            self.duplicate_shift_penalty += duplicated - self.duplicate_days[day]
+            self.duplicate_days[day] = duplicated
+        self.changes = {}
+
+    def components(self):
+        return (self.preference_score, self.invalid_skill_penalty,
+                self.overload_penalty, self.duplicate_shift_penalty)
+
+
+# Оценка через состояние особи. score превращает компоненты
+# (предпочтения, нехватка навыков, перегрузка, повторы в дне) в кортеж фитнеса
+# конкретного скрипта. Особи без состояния (новые) оцениваются полностью.
+# В evaluate_many полная оценка идёт одной пачкой по матрице популяции; туда же
+# попадают особи с журналом длиннее max_changes: на коротких геномах разбор
+# длинного журнала в Python дороже векторной оценки всей строки.
+class DeltaEvaluator:
+    def __init__(self, problem, shifts_per_day, max_shifts_per_operator, score, lookup=None,
+                 max_changes=DEFAULT_MAX_CHANGES):
+        self.problem = problem
+        self.shifts_per_day = shifts_per_day
+        self.max_shifts_per_operator = max_shifts_per_operator
+        self.score = score
+        self.lookup = lookup
+        self.max_changes = max_changes
+        self.full_evaluations = 0
+        self.delta_evaluations = 0
+
+    def __call__(self, individual):
+        state = getattr(individual, "delta_state", None)
+        if state is None:
+            self.full_evaluations += 1
+            state = ScheduleState(self.problem, individual, self.shifts_per_day, self.max_shifts_per_operator)
+            if isinstance(individual, TrackedGenome):
+                individual.delta_state = state
+        else:
+            self.delta_evaluations += 1
+            state.apply_changes(self.problem, individual)
+        return self.score(*state.components())
+
+    def evaluate_many(self, individuals):
+        fitnesses = [None] * len(individuals)
+        batch = []
+        for position, individual in enumerate(individuals):
+            state = getattr(individual, "delta_state", None)
+            if state is None or len(state.changes) > self.max_changes:
+                batch.append(position)
+            else:
+                self.delta_evaluations += 1
+                state.apply_changes(self.problem, individual)
+                fitnesses[position] = self.score(*state.components())
+
+        if batch:
+            if self.lookup is None:
+                self.lookup = population_eval.build_lookup_tables(self.problem)
+            members = [individuals[position] for position in batch]
+            states = ScheduleState.from_matrix(population_eval.population_to_matrix(members), *self.lookup,
+                                               self.shifts_per_day, self.max_shifts_per_operator)
+            self.full_evaluations += len(batch)
+            for position, individual, state in zip(batch, members, states):
+                if isinstance(individual, TrackedGenome):
+                    individual.delta_state = state
+                fitnesses[position] = self.score(*state.components())
+        return fitnesses
+
+
+# Временно переключает toolbox.evaluate/evaluate_many на инкрементальную оценку
+@contextmanager
+def delta_evaluation(toolbox, evaluator, enabled=True):
+    if not enabled:
+        yield None
+        return
+
+    evaluate, evaluate_many = toolbox.evaluate, toolbox.evaluate_many
+    toolbox.register("evaluate", evaluator)
+    toolbox.register("evaluate_many", evaluator.evaluate_many)
+    try:
+        yield evaluator
+    finally:
+        toolbox.register("evaluate", evaluate)
+        toolbox.register("evaluate_many", evaluate_many)
@@ -0,0 +1,180 @@
+from contextlib import ExitStack, contextmanager, nullcontext
+
+import numpy as np
+from deap import algorithms, tools
+
+import checkpoint
+import profiling
+
+# Общий цикл поколений для всех скриптов.
+#   - Оцениваются только особи с недействительным фитнесом. Потомок, геном
+#     которого совпал с родителем (скрещивание одинаковых особей, мутация,
+#     не изменившая ни одного гена), получает фитнес родителя без оценки —
+#     в сошедшейся популяции таких заметная доля.
+#   - Элитизм: elitism лучших особей за весь запуск (tools.HallOfFame)
+#     возвращаются в каждое новое поколение, поэтому лучшее расписание не теряется.
+#   - Замещение: "comma" — (μ,λ), новое поколение отбирается из потомков;
+#     "plus" — (μ+λ), из родителей и потомков вместе. offspring_size (λ)
+#     по умолчанию равен размеру популяции; иначе родители для varAnd
+#     выбираются случайно с возвращением. select_parents, переданный в run,
+#     выбирает родителей сам (турнир NSGA-II в режиме Парето best_fitness.py).
+#   - Истории среднего и лучшего фитнеса считаются одним проходом по массиву
+#     значений первой цели.
+#   - Кэш приспособленности (fitness_cache.py), переданный в run, закрывает
+#     поколение после каждого шага; статистика поколений — в cache_history.
+#   - Время фаз и счётчики (оценки, унаследованный фитнес, поколения) всегда
+#     собирает profiling.Profiler; сводка печатается в конце run, если
+#     профилирование включено (см. profiling.py).
+
+REPLACEMENTS = ("comma", "plus")
+DEFAULT_ELITISM = 1
+
+
+def null_phase(name):
+    return nullcontext()
+
+
+# Фаза, засекаемая сразу несколькими таймерами (телеметрия и профилировщик)
+def combine_phases(*phases):
+    @contextmanager
+    def phase(name):
+        with ExitStack() as stack:
+            for timer in phases:
+                stack.enter_context(timer(name))
+            yield
+    return phase
+
+
+# Оценивает особи без фитнеса; возвращает число оценок
+def evaluate_invalid(toolbox, individuals):
+    invalid = [ind for ind in individuals if not ind.fitness.valid]
+    if invalid:
+        for fit, ind in zip(toolbox.evaluate_many(invalid), invalid):
+            ind.fitness.values = fit
+    return len(invalid)
+
+
+# varAnd клонирует родителей по порядку, поэтому потомок i сравнивается с родителем i.
+# Возвращает число потомков, получивших фитнес родителя
+def inherit_fitness(parents, offspring):
+    inherited = 0
+    for parent, child in zip(parents, offspring):
+        if not child.fitness.valid and parent.fitness.valid and child == parent:
+            child.fitness.values = parent.fitness.values
+            inherited += 1
+    return inherited
+
+
+# Средний и лучший фитнес по первой цели
+def fitness_stats(population):
+    values = np.fromiter((ind.fitness.values[0] for ind in population), dtype=np.float64, count=len(population))
+    return float(values.mean()), float(values.max())
+
+
+class GenerationEngine:
+    def __init__(self, elitism=DEFAULT_ELITISM, replacement="comma", offspring_size=None, profiler=None):
+        if replacement not in REPLACEMENTS:
+            raise ValueError(f"Неизвестная схема замещения: {replacement}")
+        self.elitism = elitism
+        self.replacement = replacement
+        self.offspring_size = offspring_size
+        self.hall_of_fame = None
+        self.evaluations = 0
+        self.cache_history = []
+        self.profiler = profiler or profiling.Profiler.from_env()
+
+    # Сбрасывает зал славы (или восстанавливает его из контрольной точки)
+    # и профилировщик: движок можно использовать для нескольких запусков
+    def start(self, elites=()):
+        self.hall_of_fame = tools.HallOfFame(self.elitism) if self.elitism else None
+        self.evaluations = 0
+        self.cache_history = []
+        self.profiler.reset()
+        # Вставка от худшего к лучшему сохраняет порядок равных по фитнесу особей;
+        # без элитизма (elitism=0) элиты из контрольной точки не нужны
+        if self.hall_of_fame is not None:
+            for ind in reversed(elites):
+                self.hall_of_fame.insert(ind)
+
+    def elites(self):
+        return list(self.hall_of_fame) if self.hall_of_fame is not None else []
+
+    # Одно поколение: вариация, оценка, отбор с элитами. Возвращает новую
+    # популяцию и число оценок
+    def step(self, population, toolbox, cxpb, mutpb, select=None, phase=None, select_parents=None):
+        select = select or toolbox.select
+        phase = phase or self.profiler.phase
+        with phase("variation"):
+            parents = population
+            if select_parents is not None:
+                parents = select_parents(population, self.offspring_size or len(population))
+            elif self.offspring_size is not None:
+                parents = tools.selRandom(population, self.offspring_size)
+            offspring = algorithms.varAnd(parents, toolbox, cxpb=cxpb, mutpb=mutpb)
+            inherited = inherit_fitness(parents, offspring)
+        with phase("evaluation"):
+            evaluated = evaluate_invalid(toolbox, offspring)
+        with phase("selection"):
+            candidates = population + offspring if self.replacement == "plus" else offspring
+            elites = []
+            if self.hall_of_fame is not None:
+                self.hall_of_fame.update(offspring)
+                elites = [toolbox.clone(ind) for ind in self.hall_of_fame]
+            population = select(candidates, len(population) - len(elites)) + elites
+        self.evaluations += evaluated
+        self.profiler.count("evaluations", evaluated)
+        self.profiler.count("inherited", inherited)
+        return population, evaluated
+
+    # Цикл поколений gen = 0..ngen-1 (с resume_from — с поколения после контрольной
+    # точки). avg_history и max_history дополняются на месте. Возвращает популяцию.
+    def run(self, population, toolbox, cxpb, mutpb, ngen, telemetry=None, termination=None, checkpointer=None,
+            resume_from=None, cache=None, avg_history=None, max_history=None, select=None, select_parents=None):
+        profiler = self.profiler
+        phase = combine_phases(telemetry.phase, profiler.phase) if telemetry else profiler.phase
+        start_gen = 0
+        if resume_from:
+            population, avg, max_, start_gen, elites = checkpoint.resume(resume_from, type(population[0]),
+                                                                          termination)
+            self.start(elites)
+            if telemetry:
+                telemetry.resume(start_gen)
+            if avg_history is not None:
+                avg_history[:], max_history[:] = avg, max_
+        else:
+            self.start()
+            # При (μ+λ) родители соревнуются с потомками, поэтому им нужен фитнес
+            if self.replacement == "plus":
+                with profiler.phase("evaluation"):
+                    profiler.count("evaluations", evaluate_invalid(toolbox, population))
+
+        try:
+            for gen in range(start_gen, ngen):
+                profiler.begin_generation(gen)
+                population, evaluated = self.step(population, toolbox, cxpb, mutpb, select, phase, select_parents)
+                if avg_history is not None:
+                    with phase("stats"):
+                        mean, best = fitness_stats(population)
+                        avg_history.append(mean)
+                        max_history.append(best)
+                cache_stats = cache.end_generation() if cache else None
+                if cache_stats:
+                    self.cache_history.append(cache_stats)
+                # Запись телеметрии и контрольных точек — фаза io (только в профилировщике)
+                if telemetry:
+                    with profiler.phase("io"):
+                        telemetry.record(gen, population, evaluated, cache_stats)
+                stop = termination is not None and termination.should_stop(gen, population, evaluated)
+                if checkpointer and not stop:
+                    with profiler.phase("io"):
+                        checkpointer.save(gen, population, avg_history or (), max_history or (), termination,
+                                          elites=self.elites())
+                profiler.end_generation(gen)
+                if stop:
+                    break
+        finally:
+            if checkpointer:
+                with profiler.phase("io"):
+                    checkpointer.close()
+        profiler.finish()
+        return population
@@ -0,0 +1,68 @@
+import multiprocessing
+
+import numpy as np
+
+import parallel
+
+# Параллельный перебор конфигураций ГА: каждая пара (конфигурация, повтор)
+# запускается в отдельном процессе пула со своим независимым и
+# воспроизводимым потоком случайных чисел.
+
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+_worker_module = None
+
+
+# Зерно для random.seed: ветка SeedSequence, однозначно заданная базовым зерном,
+# номером конфигурации и номером повтора. Не зависит от порядка выполнения задач.
+def run_seed(base_seed, config_index, replicate):
+    state = np.random.SeedSequence(base_seed, spawn_key=(config_index, replicate)).generate_state(4)
+    return int.from_bytes(state.tobytes(), "little")
+
+
+def _init_worker(module_name, tables):
+    global _worker_module
+    _worker_module = parallel.load_module(module_name, tables)
+
+
+def _run_task(task):
+    config_index, replicate, config, ngen, seed = task
+    best, avg_hist, max_hist = _worker_module.run_experiment(config["cxpb"], config["mutpb"], ngen, seed=seed)
+    return config_index, replicate, list(best), best.fitness.values, avg_hist, max_hist
+
+
+# Статистика по повторам для каждого поколения: строки — повторы, столбцы — поколения
+def aggregate_histories(histories):
+    values = np.asarray(histories, dtype=float)
+    return {
+        "mean": values.mean(axis=0).tolist(),
+        "std": values.std(axis=0).tolist(),
+        "quantiles": {q: np.quantile(values, q, axis=0).tolist() for q in QUANTILES},
+    }
+
+
+# Возвращает по каждой конфигурации лучшее расписание и его фитнес среди повторов,
+# итоговый лучший фитнес каждого повтора и статистику по поколениям для лучшего
+# ("best_history") и среднего ("avg_history") фитнеса популяции
+def run_suite(module_name, configs, replicates=1, ngen=100, processes=None, base_seed=126):
+    tasks = [(config_index, replicate, config, ngen, run_seed(base_seed, config_index, replicate))
+             for config_index, config in enumerate(configs)
+             for replicate in range(replicates)]
+
+    with multiprocessing.Pool(processes, initializer=_init_worker,
+                              initargs=(module_name, parallel.shared_tables(module_name))) as pool:
+        runs = pool.map(_run_task, tasks, chunksize=1)
+
+    results = []
+    for config_index, config in enumerate(configs):
+        config_runs = [run for run in runs if run[0] == config_index]
+        best_run = max(config_runs, key=lambda run: run[3])
+        results.append({
+            "config": config,
+            "best_schedule": best_run[2],
+            "best_fitness": best_run[3],
+            "final_best_fitness": [run[5][-1] for run in config_runs],
+            "best_history": aggregate_histories([run[5] for run in config_runs]),
+            "avg_history": aggregate_histories([run[4] for run in config_runs]),
+        })
+    return results
@@ -0,0 +1,125 @@
+import array
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Кэш приспособленности с вытеснением давно не использованных записей (LRU).
+# При cxpb=1, mutpb=1 популяция быстро сходится к множеству одинаковых
+# геномов, и повторная оценка каждого из них каждое поколение избыточна.
+
+DEFAULT_CACHE_SIZE = 100000
+# Скрипты с пакетной оценкой (evaluate_population) оценивают всё поколение
+# быстрее, чем кэш строит ключи и ищет их, поэтому у них кэш по умолчанию выключен
+BATCH_CACHE_SIZE = 0
+
+
+def default_cache_size(toolbox):
+    return BATCH_CACHE_SIZE if hasattr(toolbox, "evaluate_population") else DEFAULT_CACHE_SIZE
+
+
+# Ключ кэша: плоский геном — кортеж генов, геном из списков (sevenshiftsgenetic.py) —
+# кортеж кортежей, компактный геном (genome.py) — байты буфера
+def genome_key(individual):
+    if isinstance(individual, array.array):
+        return individual.tobytes()
+    return tuple(tuple(gene) if isinstance(gene, list) else gene for gene in individual)
+
+
+class FitnessCache:
+    def __init__(self, evaluate, maxsize=DEFAULT_CACHE_SIZE, evaluate_many=None):
+        self.evaluate = evaluate
+        self.evaluate_many_uncached = evaluate_many or (lambda individuals: list(map(evaluate, individuals)))
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.history = []
+
+    def _store(self, key, fitness):
+        self.entries[key] = fitness
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def __call__(self, individual):
+        key = genome_key(individual)
+        fitness = self.entries.get(key)
+        if fitness is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return fitness
+        self.misses += 1
+        fitness = self.evaluate(individual)
+        self._store(key, fitness)
+        return fitness
+
+    # Пакетный вариант: в evaluate_many уходят только отсутствующие в кэше
+    # геномы, одинаковые геномы внутри поколения оцениваются один раз
+    def evaluate_many(self, individuals):
+        keys = [genome_key(ind) for ind in individuals]
+        fits = [None] * len(keys)
+        pending = {}
+        for i, key in enumerate(keys):
+            fitness = self.entries.get(key)
+            if fitness is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                fits[i] = fitness
+            elif key in pending:
+                self.hits += 1
+                pending[key].append(i)
+            else:
+                self.misses += 1
+                pending[key] = [i]
+
+        if pending:
+            new_fits = self.evaluate_many_uncached([individuals[positions[0]] for positions in pending.values()])
+            for (key, positions), fitness in zip(pending.items(), new_fits):
+                self._store(key, fitness)
+                for i in positions:
+                    fits[i] = fitness
+        return fits
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self.entries)}
+
+    # Закрывает поколение: счётчики поколения уходят в history и обнуляются
+    def end_generation(self):
+        stats = self.stats()
+        self.history.append(stats)
+        self.hits = self.misses = self.evictions = 0
+        return stats
+
+
+# Временно оборачивает toolbox.evaluate и toolbox.evaluate_many одним общим кэшем.
+# maxsize=0 отключает кэш, тогда вместо него возвращается None.
+@contextmanager
+def cached_evaluation(toolbox, maxsize=DEFAULT_CACHE_SIZE):
+    if not maxsize:
+        yield None
+        return
+
+    evaluate, evaluate_many = toolbox.evaluate, toolbox.evaluate_many
+    cache = FitnessCache(evaluate, maxsize, evaluate_many)
+    toolbox.register("evaluate", cache)
+    toolbox.register("evaluate_many", cache.evaluate_many)
+    try:
+        yield cache
+    finally:
+        toolbox.register("evaluate", evaluate)
+        toolbox.register("evaluate_many", evaluate_many)
+
+
+# Сумма статистики по поколениям (history кэша или GenerationEngine.cache_history)
+def total_stats(history):
+    return {"hits": sum(stats["hits"] for stats in history),
+            "misses": sum(stats["misses"] for stats in history),
+            "evictions": sum(stats["evictions"] for stats in history),
+            "size": history[-1]["size"] if history else 0}
+
+
+def format_cache_stats(stats):
+    total = stats["hits"] + stats["misses"]
+    hit_rate = stats["hits"] / total if total else 0.0
+    return (f"кэш: попаданий {stats['hits']}, промахов {stats['misses']}, "
+            f"вытеснений {stats['evictions']}, доля попаданий {hit_rate:.1%}")
@@ -0,0 +1,236 @@
+import heapq
+import math
+
+# Точное решение базовой задачи назначения через поток минимальной стоимости.
+# Сеть: исток -> оператор -> смена -> сток.
+#   исток -> оператор:  MAX_SHIFTS_PER_OPERATOR единиц бесплатно, сверх лимита —
+#                       по overload_penalty за смену (None — лимит жёсткий)
+#   оператор -> смена:  -preference_weight за предпочитаемую смену и
+#                       invalid_penalty за смену без нужных навыков
+#                       (None — недопущенные операторы не назначаются)
+#   смена -> сток:      требуемое число операторов смены
+# Поток величиной в сумму требований — расписание, -стоимость — его фитнес.
+# Точное решение ставит оператора в смену не больше одного раза, а при заданном
+# shifts_per_day — не больше одной смены в день. Верхняя граница фитнеса ГА —
+# оптимум релаксации, где повторы разрешены, а штраф за смену (день) с повторами
+# раскладывается на лишние назначения: их не больше требования смены (числа
+# смен в дне) минус один, поэтому доля штрафа не превышает настоящий штраф.
+# Если операторов меньше, чем смен в дне (или чем требование смены), точного
+# решения без повторов нет: тогда повторы разрешаются рёбрами с запретительно
+# высокой стоимостью, и поток сначала минимизирует их число, а затем фитнес.
+
+INFINITY = float("inf")
+
+
+class MinCostFlow:
+    def __init__(self, num_nodes):
+        self.graph = [[] for _ in range(num_nodes)]
+
+    # Ребро хранится как [куда, остаток пропускной способности, стоимость, индекс обратного ребра]
+    def add_edge(self, source, target, capacity, cost):
+        self.graph[source].append([target, capacity, cost, len(self.graph[target])])
+        self.graph[target].append([source, 0, -cost, len(self.graph[source]) - 1])
+        return len(self.graph[source]) - 1
+
+    # Поток по ребру — остаток обратного ребра
+    def edge_flow(self, node, index):
+        target, _, _, reverse = self.graph[node][index]
+        return self.graph[target][reverse][1]
+
+    # Последовательные кратчайшие пути (Дейкстра с потенциалами).
+    # Стоимости рёбер должны быть неотрицательными.
+    def flow(self, source, sink, max_flow):
+        num_nodes = len(self.graph)
+        potential = [0] * num_nodes
+        total_flow = total_cost = 0
+        while total_flow < max_flow:
+            dist = [INFINITY] * num_nodes
+            prev = [None] * num_nodes
+            dist[source] = 0
+            heap = [(0, source)]
+            while heap:
+                d, node = heapq.heappop(heap)
+                if d > dist[node]:
+                    continue
+                for index, (target, capacity, cost, _) in enumerate(self.graph[node]):
+                    nd = d + cost + potential[node] - potential[target]
+                    if capacity > 0 and nd < dist[target]:
+                        dist[target] = nd
+                        prev[target] = (node, index)
+                        heapq.heappush(heap, (nd, target))
+            if dist[sink] == INFINITY:
+                break
+            for node in range(num_nodes):
+                if dist[node] < INFINITY:
+                    potential[node] += dist[node]
+
+            push = max_flow - total_flow
+            node = sink
+            while node != source:
+                parent, index = prev[node]
+                push = min(push, self.graph[parent][index][1])
+                node = parent
+            node = sink
+            while node != source:
+                parent, index = prev[node]
+                edge = self.graph[parent][index]
+                edge[1] -= push
+                self.graph[node][edge[3]][1] += push
+                total_cost += push * edge[2]
+                node = parent
+            total_flow += push
+        return total_flow, total_cost
+
+
+class FlowSolution:
+    def __init__(self, schedule, value, upper_bound):
+        self.schedule = schedule          # операторы каждой смены
+        self.value = value                # фитнес расписания (повторы — только если без них нельзя)
+        self.upper_bound = upper_bound    # верхняя граница фитнеса любого расписания
+
+    @property
+    def optimal(self):
+        return self.value >= self.upper_bound
+
+    # Плоский геном: операторы смен подряд (как в sevenshifts.py, для одного оператора на смену — как в atg3.py)
+    def genome(self):
+        return [operator for operators in self.schedule for operator in operators]
+
+
+# Без штрафов за повторы (duplicate_penalty, day_penalty равны None) — точное решение:
+# оператор стоит в смене не больше одного раза и, если задан shifts_per_day,
+# не больше одной смены в день. Иначе строится релаксация для верхней границы.
+# Стоимости умножаются на scale, чтобы доли штрафов за повторы оставались целыми.
+# max_shifts — общий лимит или список лимитов по операторам; пары (оператор, смена)
+# из forbidden не назначаются. Смены с нулевым требованием в сеть не входят.
+# При soft_repeats запрещённые повторы (и пары из occupied — смена или день, где
+# оператор уже занят) допускаются за стоимость выше любой другой части решения;
+# в возвращаемый фитнес она не входит — штрафы за повторы начисляет вызывающий.
+def assignment_flow(problem, requirements, max_shifts, preference_weight, invalid_penalty, overload_penalty,
+                    shifts_per_day=None, duplicate_penalty=None, day_penalty=None, forbidden=frozenset(),
+                    occupied=frozenset(), soft_repeats=False):
+    num_operators, num_shifts = problem.num_operators, problem.num_shifts
+    if isinstance(max_shifts, int):
+        max_shifts = [max_shifts] * num_operators
+    active_shifts = [shift for shift in range(num_shifts) if requirements[shift] > 0]
+    source, sink = num_operators + num_shifts, num_operators + num_shifts + 1
+    total = sum(requirements)
+    scale = 1
+    if duplicate_penalty is not None:
+        scale = math.lcm(scale, *(required - 1 for required in requirements if required > 1))
+    if shifts_per_day is not None and day_penalty is not None and shifts_per_day > 1:
+        scale = math.lcm(scale, shifts_per_day - 1)
+    repeat_cost = None
+    if soft_repeats:
+        repeat_cost = (total * (preference_weight + (invalid_penalty or 0) + (overload_penalty or 0)) + 1) * scale
+    repeat_edges = []
+
+    # Узел назначения: сам оператор или, при shifts_per_day, пара (оператор, день)
+    num_days = -(-num_shifts // shifts_per_day) if shifts_per_day else 0
+    active_days = sorted({shift // shifts_per_day for shift in active_shifts}) if shifts_per_day else []
+    network = MinCostFlow(num_operators + num_shifts + 2 + num_operators * num_days)
+
+    def assignment_node(operator, shift):
+        if not shifts_per_day:
+            return operator
+        return sink + 1 + operator * num_days + shift // shifts_per_day
+
+    # Каждая единица потока проходит ровно одно ребро оператор -> смена, поэтому
+    # сдвиг их стоимостей на preference_weight делает их неотрицательными, не меняя оптимума
+    for operator in range(num_operators):
+        network.add_edge(source, operator, max_shifts[operator], 0)
+        if overload_penalty is not None:
+            network.add_edge(source, operator, total, overload_penalty * scale)
+        for day in active_days:
+            node = assignment_node(operator, day * shifts_per_day)
+            network.add_edge(operator, node, 1, 0)
+            if day_penalty is not None and shifts_per_day > 1:
+                network.add_edge(operator, node, shifts_per_day - 1, day_penalty * scale // (shifts_per_day - 1))
+            elif repeat_cost is not None and shifts_per_day > 1:
+                repeat_edges.append((operator, network.add_edge(operator, node, shifts_per_day - 1, repeat_cost)))
+        for shift in active_shifts:
+            eligible = problem.can_perform_shift(operator, shift)
+            if (operator, shift) in forbidden or not eligible and invalid_penalty is None:
+                continue
+            if (operator, shift) in occupied and repeat_cost is None:
+                continue
+            cost = preference_weight * (1 - problem.prefers_shift(operator, shift))
+            if not eligible:
+                cost += invalid_penalty
+            node = assignment_node(operator, shift)
+            index = network.add_edge(node, num_operators + shift, 1,
+                                     cost * scale + (repeat_cost if (operator, shift) in occupied else 0))
+            if (operator, shift) in occupied:
+                repeat_edges.append((node, index))
+            required = requirements[shift]
+            if duplicate_penalty is not None and required > 1:
+                network.add_edge(node, num_operators + shift, required - 1,
+                                 cost * scale + duplicate_penalty * scale // (required - 1))
+            elif repeat_cost is not None and required > 1:
+                repeat_edges.append((node, network.add_edge(node, num_operators + shift, required - 1,
+                                                            cost * scale + repeat_cost)))
+    for shift in active_shifts:
+        network.add_edge(num_operators + shift, sink, requirements[shift], 0)
+
+    flow, cost = network.flow(source, sink, total)
+    if flow < total:
+        raise ValueError("Нет расписания, удовлетворяющего жёстким ограничениям")
+    cost -= sum(network.edge_flow(node, index) for node, index in repeat_edges) * (repeat_cost or 0)
+
+    schedule = [[] for _ in range(num_shifts)]
+    for operator in range(num_operators):
+        nodes = [assignment_node(operator, day * shifts_per_day) for day in active_days] or [operator]
+        for node in nodes:
+            for index, (target, _, _, _) in enumerate(network.graph[node]):
+                if num_operators <= target < num_operators + num_shifts:
+                    schedule[target - num_operators].extend([operator] * network.edge_flow(node, index))
+    # Фитнес целый, поэтому дробная граница округляется вниз
+    return schedule, preference_weight * total - -(-cost // scale)
+
+
+# Штрафы за повторы, как в фитнесе скриптов: duplicate_penalty за смену с
+# повторами, day_penalty за день, где кто-то стоит дважды (None — повтор запрещён)
+def repeat_penalty(schedule, shifts_per_day, duplicate_penalty, day_penalty):
+    penalty = 0
+    duplicated = sum(len(set(operators)) < len(operators) for operators in schedule)
+    if duplicated:
+        if duplicate_penalty is None:
+            raise ValueError("Нет расписания без повторов операторов в смене")
+        penalty += duplicate_penalty * duplicated
+    if shifts_per_day:
+        days = [[operator for operators in schedule[start:start + shifts_per_day] for operator in operators]
+                for start in range(0, len(schedule), shifts_per_day)]
+        repeated = sum(len(set(operators)) < len(operators) for operators in days)
+        if repeated:
+            if day_penalty is None:
+                raise ValueError("Нет расписания без повторов операторов в дне")
+            penalty += day_penalty * repeated
+    return penalty
+
+
+# Штраф None для invalid_penalty и overload_penalty делает ограничение жёстким.
+# Значения по умолчанию — веса sevenshifts.py; для bless.py и atg3.py нужно
+# задать shifts_per_day и day_penalty=1. Если без повторов расписания нет
+# (операторов меньше, чем смен в дне), точное решение ищется с наименьшим
+# числом повторов, а его фитнес учитывает штрафы за них.
+def solve_assignment(problem, requirements=None, max_shifts=3, preference_weight=1, invalid_penalty=5,
+                     overload_penalty=5, duplicate_penalty=3, shifts_per_day=None, day_penalty=None):
+    if requirements is None:
+        requirements = [1] * problem.num_shifts
+    penalties = (preference_weight, invalid_penalty, overload_penalty)
+    try:
+        schedule, value = assignment_flow(problem, requirements, max_shifts, *penalties, shifts_per_day)
+    except ValueError:
+        schedule, value = assignment_flow(problem, requirements, max_shifts, *penalties, shifts_per_day,
+                                          soft_repeats=True)
+        value -= repeat_penalty(schedule, shifts_per_day, duplicate_penalty, day_penalty)
+
+    relax_duplicates = duplicate_penalty is not None and max(requirements) > 1
+    relax_days = shifts_per_day is not None and day_penalty is not None
+    if relax_duplicates or relax_days:
+        _, upper_bound = assignment_flow(problem, requirements, max_shifts, *penalties, shifts_per_day,
+                                         duplicate_penalty if relax_duplicates else None,
+                                         day_penalty if relax_days else None)
+    else:
+        upper_bound = value
+    return FlowSolution(schedule, value, upper_bound)
@@ -0,0 +1,79 @@
+import array
+from contextlib import contextmanager
+
+import numpy as np
+
+import variation
+
+# Компактный геном: номера операторов в типизированном буфере uint16
+# (array.array с typecode "H") вместо списка объектов int. Класс особи
+# создаётся через creator с базой array.array:
+#   creator.create("ArrayIndividual", array.array, typecode=genome.TYPECODE, fitness=...)
+# Операторы variation.py работают с ним без изменений: мутация пишет по индексу,
+# кроссовер меняет срезы на месте. clone копирует буфер одним вызовом и
+# переносит фитнес, не проходя через copy.deepcopy.
+# С инкрементальной оценкой (delta_eval.py) не совместим: запись в массив
+# не попадает в журнал изменений TrackedGenome.
+# Переключение toolbox действует только внутри array_genome_scope: на выходе
+# возвращаются прежние операторы, и следующий запуск в том же процессе снова
+# идёт со списками.
+
+TYPECODE = "H"
+DTYPE = np.uint16
+MAX_OPERATORS = 1 << 16
+GENOME_OPERATORS = ("individual", "population", "mutate", "mate", "clone")
+
+
+def check_operators(num_operators):
+    if num_operators > MAX_OPERATORS:
+        raise ValueError(f"Геном uint16 вмещает не больше {MAX_OPERATORS} операторов, задано {num_operators}")
+
+
+# Конструктор array.array копирует буфер массива того же типа через memcpy
+def clone(individual):
+    copy_ = individual.__class__(individual)
+    if individual.fitness.valid:
+        copy_.fitness.wvalues = individual.fitness.wvalues
+    return copy_
+
+
+def is_array_genome(individual):
+    return isinstance(individual, array.array)
+
+
+# Популяция из массивов -> матрица N x длина генома одним проходом по буферам
+def array_matrix(individuals):
+    length = len(individuals[0])
+    flat = np.frombuffer(b"".join(individuals), dtype=DTYPE)
+    return flat.reshape(len(individuals), length)
+
+
+# Переключает toolbox скрипта на компактный геном: individual, population,
+# mutate и mate регистрируются заново для container, clone — копия буфера
+def register_array_genome(toolbox, container, problem, gene_shifts, shifts_per_day, **kwargs):
+    check_operators(problem.num_operators)
+    variation.register_eligible(toolbox, container, problem, gene_shifts, shifts_per_day, **kwargs)
+    toolbox.register("clone", clone)
+
+
+# Тип особи из toolbox.individual (register_eligible передаёт класс первым аргументом)
+def registered_array_genome(toolbox):
+    args = getattr(toolbox.individual, "args", ())
+    return bool(args) and isinstance(args[0], type) and issubclass(args[0], array.array)
+
+
+# Компактный геном на время запуска: register() переключает toolbox (при enabled),
+# на выходе операторы GENOME_OPERATORS восстанавливаются как есть (register
+# обернул бы их ещё в один partial)
+@contextmanager
+def array_genome_scope(toolbox, enabled, register, delta_eval=False):
+    saved = {name: getattr(toolbox, name) for name in GENOME_OPERATORS}
+    try:
+        if enabled:
+            register()
+        if delta_eval and registered_array_genome(toolbox):
+            raise ValueError("Компактный геном несовместим с инкрементальной оценкой (delta_eval)")
+        yield
+    finally:
+        for name, function in saved.items():
+            setattr(toolbox, name, function)
@@ -0,0 +1,191 @@
+import json
+
+import numpy as np
+
+# Синтетические экземпляры задачи произвольного размера. Вместо словарей
+# и списков (как OPERATOR_SKILLS/PREFERENCES/SHIFT_TYPES в скриптах) экземпляр
+# хранится упакованными битовыми матрицами:
+#   operator_skills  — операторы x навыки
+#   preferences      — операторы x смены
+#   shift_skills     — смены x навыки (требования смены)
+# Генерация идёт блоками операторов, поэтому большой экземпляр можно
+# писать прямо в файл, не держа его целиком в памяти.
+# Экземпляры из выгрузок (см. roster.py) дополнительно хранят:
+#   shift_requirements — требуемое число операторов на смену (uint16)
+#   eligibility        — операторы x смены, оператор владеет всеми навыками смены
+
+MAGIC = b"BLESSINS"
+ALIGNMENT = 64
+DEFAULT_BLOCK_SIZE = 4096
+SECTIONS = ("operator_skills", "preferences", "shift_skills")
+OPTIONAL_SECTIONS = ("shift_requirements", "eligibility")
+SECTION_DTYPES = {"shift_requirements": "<u2"}
+
+
+def packed_width(bits):
+    return (bits + 7) // 8
+
+
+class Instance:
+    def __init__(self, num_operators, num_skills, num_shifts, shifts_per_day,
+                 operator_skills, preferences, shift_skills, shift_requirements=None, eligibility=None):
+        self.num_operators = num_operators
+        self.num_skills = num_skills
+        self.num_shifts = num_shifts
+        self.shifts_per_day = shifts_per_day
+        self.operator_skills = operator_skills
+        self.preferences = preferences
+        self.shift_skills = shift_skills
+        self.shift_requirements = shift_requirements
+        self.eligibility = eligibility
+
+    def section_names(self):
+        return SECTIONS + tuple(name for name in OPTIONAL_SECTIONS if getattr(self, name) is not None)
+
+    def header(self):
+        return {
+            "num_operators": self.num_operators,
+            "num_skills": self.num_skills,
+            "num_shifts": self.num_shifts,
+            "shifts_per_day": self.shifts_per_day,
+        }
+
+
+def section_shapes(num_operators, num_skills, num_shifts):
+    return {
+        "operator_skills": (num_operators, packed_width(num_skills)),
+        "preferences": (num_operators, packed_width(num_shifts)),
+        "shift_skills": (num_shifts, packed_width(num_skills)),
+        "shift_requirements": (num_shifts,),
+        "eligibility": (num_operators, packed_width(num_shifts)),
+    }
+
+
+# Ровно count случайных единиц в каждой строке (как random.sample в atg3.py)
+def random_rows(rng, rows, width, count):
+    order = rng.random((rows, width)).argsort(axis=1)[:, :count]
+    bits = np.zeros((rows, width), dtype=bool)
+    np.put_along_axis(bits, order, True, axis=1)
+    return np.packbits(bits, axis=1, bitorder="little")
+
+
+# У каждой секции свой поток случайных чисел, поэтому результат не зависит от block_size
+def fill_instance(arrays, seed, num_operators, num_skills, num_shifts, skills_per_operator,
+                  preferences_per_operator, skills_per_shift, block_size):
+    shift_rng, skill_rng, preference_rng = (np.random.default_rng(child)
+                                            for child in np.random.SeedSequence(seed).spawn(3))
+    arrays["shift_skills"][:] = random_rows(shift_rng, num_shifts, num_skills, skills_per_shift)
+    for start in range(0, num_operators, block_size):
+        rows = min(block_size, num_operators - start)
+        arrays["operator_skills"][start:start + rows] = random_rows(skill_rng, rows, num_skills, skills_per_operator)
+        arrays["preferences"][start:start + rows] = random_rows(preference_rng, rows, num_shifts,
+                                                                preferences_per_operator)
+
+
+def instance_counts(num_skills, num_shifts, skill_density, preference_density, skills_per_shift):
+    skills_per_operator = min(num_skills, max(1, round(skill_density * num_skills)))
+    preferences_per_operator = min(num_shifts, round(preference_density * num_shifts))
+    return skills_per_operator, preferences_per_operator, min(num_skills, skills_per_shift)
+
+
+# Генерирует экземпляр в памяти. skill_density и preference_density — доля
+# навыков и смен, которые получает каждый оператор.
+def generate_instance(num_operators, num_skills, weeks=1, shifts_per_day=3, skill_density=0.5,
+                      preference_density=0.15, skills_per_shift=2, seed=None, block_size=DEFAULT_BLOCK_SIZE):
+    num_shifts = weeks * 7 * shifts_per_day
+    counts = instance_counts(num_skills, num_shifts, skill_density, preference_density, skills_per_shift)
+    shapes = section_shapes(num_operators, num_skills, num_shifts)
+    arrays = {name: np.zeros(shapes[name], dtype=np.uint8) for name in SECTIONS}
+    fill_instance(arrays, seed, num_operators, num_skills, num_shifts, *counts, block_size)
+    return Instance(num_operators, num_skills, num_shifts, shifts_per_day, **arrays)
+
+
+# Раскладка файла: MAGIC, длина заголовка (8 байт), JSON-заголовок с размерами,
+# смещениями и типами секций, затем секции, выровненные по ALIGNMENT байт
+def file_layout(header, names=SECTIONS):
+    shapes = section_shapes(header["num_operators"], header["num_skills"], header["num_shifts"])
+    header = dict(header, sections={})
+    offset = 0
+    for name in names:
+        dtype = SECTION_DTYPES.get(name, "|u1")
+        header["sections"][name] = {"offset": offset, "shape": list(shapes[name]), "dtype": dtype}
+        offset += -(-int(np.prod(shapes[name])) * np.dtype(dtype).itemsize // ALIGNMENT) * ALIGNMENT
+    encoded = json.dumps(header, sort_keys=True).encode()
+    data_start = -(-(len(MAGIC) + 8 + len(encoded)) // ALIGNMENT) * ALIGNMENT
+    return encoded, data_start, data_start + offset
+
+
+def write_header(path, header, names=SECTIONS):
+    encoded, data_start, total_size = file_layout(header, names)
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(encoded)
+        f.truncate(total_size)
+    return json.loads(encoded), data_start
+
+
+def open_sections(path, header, data_start, mode):
+    return {name: np.memmap(path, dtype=section.get("dtype", "|u1"), mode=mode,
+                            offset=data_start + section["offset"], shape=tuple(section["shape"]))
+            for name, section in header["sections"].items()}
+
+
+# Генерирует экземпляр блоками прямо в файл: в памяти одновременно находится
+# только один блок операторов. Для одного и того же seed результат совпадает
+# с generate_instance.
+def write_generated_instance(path, num_operators, num_skills, weeks=1, shifts_per_day=3, skill_density=0.5,
+                             preference_density=0.15, skills_per_shift=2, seed=None,
+                             block_size=DEFAULT_BLOCK_SIZE):
+    num_shifts = weeks * 7 * shifts_per_day
+    counts = instance_counts(num_skills, num_shifts, skill_density, preference_density, skills_per_shift)
+    header, data_start = write_header(path, {"num_operators": num_operators, "num_skills": num_skills,
+                                             "num_shifts": num_shifts, "shifts_per_day": shifts_per_day})
+    arrays = open_sections(path, header, data_start, "r+")
+    fill_instance(arrays, seed, num_operators, num_skills, num_shifts, *counts, block_size)
+    for array in arrays.values():
+        array.flush()
+
+
+# extra_header — дополнительные поля JSON-заголовка (например, хэш исходных данных)
+def save_instance(instance, path, extra_header=None):
+    header, data_start = write_header(path, dict(instance.header(), **(extra_header or {})),
+                                      instance.section_names())
+    arrays = open_sections(path, header, data_start, "r+")
+    for name, array in arrays.items():
+        array[:] = getattr(instance, name)
+        array.flush()
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: не файл экземпляра задачи")
+        length = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(length))
+    data_start = -(-(len(MAGIC) + 8 + length) // ALIGNMENT) * ALIGNMENT
+    return header, data_start
+
+
+# Открывает экземпляр из файла через memory map, данные читаются с диска по мере обращения
+def load_instance(path):
+    header, data_start = read_header(path)
+    arrays = open_sections(path, header, data_start, "r")
+    return Instance(header["num_operators"], header["num_skills"], header["num_shifts"],
+                    header["shifts_per_day"], **arrays)
+
+
+def unpack_rows(packed, width):
+    return np.unpackbits(packed, axis=1, count=width, bitorder="little").astype(bool)
+
+
+# Таблицы в формате скриптов: OPERATOR_SKILLS, PREFERENCES, SHIFT_TYPES
+def to_tables(instance):
+    operator_skills = unpack_rows(instance.operator_skills, instance.num_skills)
+    preferences = unpack_rows(instance.preferences, instance.num_shifts)
+    shift_skills = unpack_rows(instance.shift_skills, instance.num_skills)
+    return (
+        {op: np.flatnonzero(row).tolist() for op, row in enumerate(operator_skills)},
+        {op: np.flatnonzero(row).tolist() for op, row in enumerate(preferences)},
+        [np.flatnonzero(row).tolist() for row in shift_skills],
+    )
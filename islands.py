@@ -0,0 +1,142 @@
+import multiprocessing
+import queue
+import random
+import traceback
+
+from deap import tools
+
+from engine import GenerationEngine, fitness_stats
+import parallel
+
+# Островная модель ГА: несколько подпопуляций эволюционируют в отдельных
+# процессах и каждые migration_interval поколений обмениваются лучшими
+# особями. Топология "ring" — остров i отправляет мигрантов острову i + 1,
+# "all" — всем остальным островам.
+# Очереди опрашиваются с таймаутом: если процесс острова упал (исключение,
+# нехватка памяти), основной процесс завершает остальные острова и поднимает
+# RuntimeError, а остров, ждущий мигрантов, завершается вместе с основным процессом.
+
+TOPOLOGIES = ("ring", "all")
+POLL_SECONDS = 1.0
+
+
+def migration_targets(island, num_islands, topology):
+    if topology == "ring":
+        return [(island + 1) % num_islands]
+    if topology == "all":
+        return [other for other in range(num_islands) if other != island]
+    raise ValueError(f"Неизвестная топология миграции: {topology}")
+
+
+# Ожидание сообщения, пока жив основной процесс
+def receive(inbox):
+    while True:
+        try:
+            return inbox.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            if not multiprocessing.parent_process().is_alive():
+                raise RuntimeError("Основной процесс завершился, мигранты не придут")
+
+
+def _run_island(module_name, tables, island, seed, params, inboxes, results):
+    try:
+        results.put(("done", island, *evolve_island(module_name, tables, island, seed, params, inboxes)))
+    except Exception:
+        results.put(("error", island, traceback.format_exc()))
+        raise
+
+
+def evolve_island(module_name, tables, island, seed, params, inboxes):
+    module = parallel.load_module(module_name, tables)
+    toolbox = module.toolbox
+    random.seed(seed)
+
+    num_islands = len(inboxes)
+    targets = migration_targets(island, num_islands, params["topology"])
+    num_senders = sum(island in migration_targets(other, num_islands, params["topology"])
+                      for other in range(num_islands) if other != island)
+
+    population = toolbox.population(n=params["population_size"])
+    avg_fitness_history = []
+    max_fitness_history = []
+    engine = GenerationEngine()
+    engine.start()
+    for gen in range(params["ngen"]):
+        population, _ = engine.step(population, toolbox, params["cxpb"], params["mutpb"])
+        mean, best = fitness_stats(population)
+        avg_fitness_history.append(mean)
+        max_fitness_history.append(best)
+
+        # Миграция: лучшие уходят соседям, пришедшие заменяют худших. Сообщения
+        # упорядочиваются по номеру острова-отправителя, чтобы запуск был воспроизводимым
+        if num_islands > 1 and (gen + 1) % params["migration_interval"] == 0 and gen + 1 < params["ngen"]:
+            emigrants = [toolbox.clone(ind) for ind in tools.selBest(population, params["migrants"])]
+            for target in targets:
+                inboxes[target].put((island, emigrants))
+            messages = sorted((receive(inboxes[island]) for _ in range(num_senders)), key=lambda message: message[0])
+            immigrants = [ind for _, individuals in messages for ind in individuals]
+            population = tools.selBest(population, len(population) - len(immigrants)) + immigrants
+
+    return tools.selBest(population, 1)[0], avg_fitness_history, max_fitness_history
+
+
+# Результаты всех островов; падение любого острова — RuntimeError
+def collect_results(processes, results):
+    collected = []
+    while len(collected) < len(processes):
+        try:
+            result = results.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            failed = [island for island, process in enumerate(processes)
+                      if process.exitcode is not None and process.exitcode != 0]
+            if failed:
+                raise RuntimeError(f"Остров {failed[0]} завершился с кодом {processes[failed[0]].exitcode}")
+            continue
+        if result[0] == "error":
+            raise RuntimeError(f"Ошибка на острове {result[1]}:\n{result[2]}")
+        collected.append(result[1:])
+    return sorted(collected, key=lambda result: result[0])
+
+
+# Запускает num_islands подпопуляций по population_size // num_islands особей.
+# Возвращает лучшую особь среди всех островов, историю средней (среднее по
+# островам) и максимальной (максимум по островам) приспособленности и
+# истории каждого острова по отдельности.
+def run_islands(module_name, cxpb, mutpb, ngen=100, num_islands=4, population_size=300,
+                migration_interval=10, migrants=5, topology="ring", seed=126):
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Неизвестная топология миграции: {topology}")
+
+    params = {
+        "cxpb": cxpb,
+        "mutpb": mutpb,
+        "ngen": ngen,
+        "population_size": population_size // num_islands,
+        "migration_interval": migration_interval,
+        "migrants": migrants,
+        "topology": topology,
+    }
+    tables = parallel.shared_tables(module_name)
+    inboxes = [multiprocessing.Queue() for _ in range(num_islands)]
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=_run_island,
+                                args=(module_name, tables, island, seed + island, params, inboxes, results))
+        for island in range(num_islands)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        island_results = collect_results(processes, results)
+    except BaseException:
+        for process in processes:
+            process.terminate()
+        raise
+    for process in processes:
+        process.join()
+
+    island_histories = [(avg_hist, max_hist) for _, _, avg_hist, max_hist in island_results]
+    best = tools.selBest([best for _, best, _, _ in island_results], 1)[0]
+    avg_fitness_history = [sum(values) / len(values) for values in zip(*(avg for avg, _ in island_histories))]
+    max_fitness_history = [max(values) for values in zip(*(max_hist for _, max_hist in island_histories))]
+    return best, avg_fitness_history, max_fitness_history, island_histories
@@ -0,0 +1,93 @@
+import importlib
+import multiprocessing
+import os
+from contextlib import contextmanager
+
+# Параллельная оценка приспособленности в пуле процессов. Таблицы задачи
+# передаются каждому процессу один раз при запуске (initializer), а в задачах
+# пересылаются только сами особи, разбитые на крупные порции.
+# С инкрементальной оценкой (delta_eval.py) не совмещается: пул заменил бы её
+# evaluate_many полной оценкой, поэтому скрипты отклоняют такую комбинацию.
+
+# Глобальные таблицы скриптов, которые копируются в процессы пула. В atg3.py они
+# генерируются случайно при импорте, поэтому процесс обязан получить копию
+# из основного процесса, а не построить свою.
+SHARED_TABLES = (
+    "OPERATOR_SKILLS",
+    "PREFERENCES",
+    "SHIFT_TYPES",
+    "SHIFT_OPERATOR_REQUIREMENTS",
+    "PROBLEM",
+    "PREFERENCE_MATRIX",
+    "SKILL_MATRIX",
+)
+
+CHUNKS_PER_PROCESS = 4
+
+_worker_module = None
+
+
+def shared_tables(module_name):
+    module = importlib.import_module(module_name)
+    return {name: getattr(module, name) for name in SHARED_TABLES if hasattr(module, name)}
+
+
+# Импортирует скрипт в дочернем процессе и подставляет таблицы основного процесса
+def load_module(module_name, tables):
+    module = importlib.import_module(module_name)
+    for name, value in tables.items():
+        setattr(module, name, value)
+    return module
+
+
+def _init_worker(module_name, tables):
+    global _worker_module
+    _worker_module = load_module(module_name, tables)
+
+
+def _evaluate_chunk(chunk):
+    return _worker_module.evaluate_many(chunk)
+
+
+def split_chunks(individuals, num_chunks):
+    size = max(1, -(-len(individuals) // num_chunks))
+    return [individuals[i:i + size] for i in range(0, len(individuals), size)]
+
+
+class EvaluationPool:
+    def __init__(self, module_name, processes=None):
+        tables = shared_tables(module_name)
+        self.processes = processes or os.cpu_count() or 1
+        self.pool = multiprocessing.Pool(self.processes, initializer=_init_worker,
+                                         initargs=(module_name, tables))
+
+    # Порядок результатов совпадает с порядком особей, поэтому итог
+    # не отличается от последовательного запуска
+    def evaluate_many(self, individuals):
+        chunks = split_chunks(list(individuals), self.processes * CHUNKS_PER_PROCESS)
+        fits = []
+        for chunk_fits in self.pool.map(_evaluate_chunk, chunks):
+            fits.extend(chunk_fits)
+        return fits
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+# Временно подменяет toolbox.evaluate_many параллельной версией.
+# При parallel=False ничего не меняет: пул включается только явно.
+@contextmanager
+def parallel_evaluation(toolbox, module_name, parallel=False, processes=None):
+    if not parallel:
+        yield toolbox
+        return
+
+    serial_evaluate_many = toolbox.evaluate_many
+    pool = EvaluationPool(module_name, processes)
+    toolbox.register("evaluate_many", pool.evaluate_many)
+    try:
+        yield toolbox
+    finally:
+        toolbox.register("evaluate_many", serial_evaluate_many)
+        pool.close()
@@ -0,0 +1,121 @@
+import csv
+
+import numpy as np
+from deap import tools
+
+# Многокритериальный отбор NSGA-II с быстрой сортировкой по фронтам.
+# Сравнение идёт по взвешенным значениям (wvalues), поэтому больше — всегда лучше.
+# Целевые функции расписаний целочисленные и принимают немного различных
+# значений, поэтому сортируются только уникальные векторы фитнеса: даже при
+# популяции в 5–20 тыс. особей их обычно сотни. Сортировка — ENS-BS
+# (Zhang et al., 2015): точки обходятся в лексикографически убывающем порядке,
+# поэтому доминировать точку могут только уже распределённые; фронт точки
+# ищется двоичным поиском, а проверка "доминирует ли кто-то из фронта"
+# векторизована. Вместо O(MN²) сравнений — O(MN log F) вызовов по фронтам.
+
+
+def fitness_matrix(individuals):
+    return np.array([ind.fitness.wvalues for ind in individuals], dtype=np.float64)
+
+
+# Номер фронта каждой строки values (0 — недоминируемые)
+def front_ranks(values):
+    unique, inverse = np.unique(values, axis=0, return_inverse=True)
+    unique_ranks = np.empty(len(unique), dtype=np.int64)
+    fronts, sizes = [], []
+    # Среди различных точек q >= p покомпонентно означает, что q доминирует p
+    for index in range(len(unique) - 1, -1, -1):
+        point = unique[index]
+        low, high = 0, len(fronts)
+        while low < high:
+            middle = (low + high) // 2
+            if (fronts[middle][:sizes[middle]] >= point).all(axis=1).any():
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(fronts):
+            fronts.append(np.empty((16, unique.shape[1])))
+            sizes.append(0)
+        elif sizes[low] == len(fronts[low]):
+            fronts[low] = np.concatenate([fronts[low], np.empty_like(fronts[low])])
+        fronts[low][sizes[low]] = point
+        sizes[low] += 1
+        unique_ranks[index] = low
+    return unique_ranks[inverse.reshape(-1)]
+
+
+# Расстояние скученности внутри фронта; крайние точки по каждой цели — бесконечность
+def crowding_distance(values):
+    n, m = values.shape
+    distance = np.zeros(n)
+    if n <= 2:
+        distance[:] = np.inf
+        return distance
+    for objective in range(m):
+        order = np.argsort(values[:, objective], kind="stable")
+        column = values[order, objective]
+        span = column[-1] - column[0]
+        distance[order[0]] = distance[order[-1]] = np.inf
+        if span > 0:
+            distance[order[1:-1]] += (column[2:] - column[:-2]) / span
+    return distance
+
+
+# Отбор k особей: целые фронты по порядку, последний — по убыванию скученности.
+# Ранг и скученность сохраняются в fitness (как в tools.selNSGA2), чтобы
+# их мог использовать турнир tools.selTournamentDCD.
+def sel_nsga2(individuals, k):
+    values = fitness_matrix(individuals)
+    ranks = front_ranks(values)
+    chosen = []
+    for rank in range(ranks.max() + 1):
+        if len(chosen) >= k:
+            break
+        members = np.flatnonzero(ranks == rank)
+        distance = crowding_distance(values[members])
+        for index, dist in zip(members, distance):
+            individuals[index].fitness.rank = rank
+            individuals[index].fitness.crowding_dist = dist
+        if len(chosen) + len(members) > k:
+            order = np.argsort(-distance, kind="stable")
+            members = members[order[:k - len(chosen)]]
+        chosen.extend(individuals[index] for index in members)
+    return chosen
+
+
+# Родители для вариации: турнир tools.selTournamentDCD (доминирование, затем
+# скученность). Ранги стартовой или восстановленной популяции назначает
+# sel_nsga2. Турнир разбирает особей четвёрками и не больше двух раз каждую,
+# поэтому повторяется на кратной четырём части популяции, пока не наберётся k
+def sel_parents(individuals, k):
+    if not all(hasattr(ind.fitness, "crowding_dist") for ind in individuals):
+        sel_nsga2(individuals, len(individuals))
+    usable = len(individuals) - len(individuals) % 4
+    if not usable:
+        return tools.selRandom(individuals, k)
+    chosen = []
+    while len(chosen) < k:
+        chosen.extend(tools.selTournamentDCD(individuals, usable))
+    return chosen[:k]
+
+
+# Первый фронт без повторяющихся геномов
+def pareto_front(individuals):
+    ranks = front_ranks(fitness_matrix(individuals))
+    front, seen = [], set()
+    for index in np.flatnonzero(ranks == 0):
+        key = tuple(individuals[index])
+        if key not in seen:
+            seen.add(key)
+            front.append(individuals[index])
+    return front
+
+
+# CSV: значения целей (в исходном виде fitness.values) и расписание через ";"
+def export_front(front, path, objective_names):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(list(objective_names) + ["schedule"])
+        for ind in sorted(front, key=lambda ind: ind.fitness.wvalues, reverse=True):
+            writer.writerow(list(ind.fitness.values) + [";".join(map(str, ind))])
+    return path
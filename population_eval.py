@@ -0,0 +1,124 @@
+import itertools
+
+import numpy as np
+
+import genome
+import instances
+
+# Пакетная оценка популяции для моделей "одна смена — один оператор"
+# (bless.py, alltogether.py, atg3.py). Вся популяция передаётся матрицей
+# N x NUM_SHIFTS, а проверки навыков и предпочтений сводятся к выборке
+# из заранее построенных матриц оператор x смена.
+
+PAIRWISE_DUPLICATE_LIMIT = 6
+
+
+def mask_to_row(mask, width):
+    return np.array([(mask >> i) & 1 for i in range(width)], dtype=bool)
+
+
+# Матрицы оператор x смена разворачиваются из битовых масок ProblemInstance
+def build_lookup_tables(problem):
+    preference_matrix = np.zeros((problem.num_operators, problem.num_shifts), dtype=bool)
+    skill_matrix = np.zeros((problem.num_operators, problem.num_shifts), dtype=bool)
+
+    for operator in range(problem.num_operators):
+        # Предпочтения вне горизонта никогда не срабатывают и просто отбрасываются
+        preference_matrix[operator] = mask_to_row(problem.preferred_shifts[operator], problem.num_shifts)
+    for shift, operators in enumerate(problem.eligible_operators):
+        skill_matrix[list(operators), shift] = True
+
+    return preference_matrix, skill_matrix
+
+
+# Те же матрицы прямо из упакованных битов экземпляра (см. instances.py)
+def lookup_tables_from_bits(preferences, eligibility, num_shifts):
+    return instances.unpack_rows(preferences, num_shifts), instances.unpack_rows(eligibility, num_shifts)
+
+
+def population_to_matrix(individuals):
+    if isinstance(individuals, np.ndarray):
+        return individuals.astype(np.intp, copy=False)
+    if not individuals:
+        return np.zeros((0, 0), dtype=np.intp)
+    if genome.is_array_genome(individuals[0]):
+        return genome.array_matrix(individuals).astype(np.intp)
+    # Все особи одной длины: плоский fromiter заметно быстрее np.asarray по списку списков
+    length = len(individuals[0])
+    flat = np.fromiter(itertools.chain.from_iterable(individuals), dtype=np.intp,
+                       count=len(individuals) * length)
+    return flat.reshape(len(individuals), length)
+
+
+# Матрица N x число дней: есть ли в дне повтор оператора
+def day_duplicates(pop_matrix, shifts_per_day):
+    num_shifts = pop_matrix.shape[1]
+    full = num_shifts - num_shifts % shifts_per_day
+    columns = []
+
+    # Полные дни: при малом числе смен в дне попарное сравнение дешевле сортировки
+    if full:
+        days = pop_matrix[:, :full].reshape(len(pop_matrix), -1, shifts_per_day)
+        if shifts_per_day <= PAIRWISE_DUPLICATE_LIMIT:
+            repeated = np.zeros(days.shape[:2], dtype=bool)
+            for i, j in itertools.combinations(range(shifts_per_day), 2):
+                repeated |= days[:, :, i] == days[:, :, j]
+        else:
+            days = np.sort(days, axis=2)
+            repeated = (days[:, :, 1:] == days[:, :, :-1]).any(axis=2)
+        columns.append(repeated)
+
+    # Неполный последний день, если NUM_SHIFTS не кратно SHIFTS_PER_DAY
+    if full < num_shifts:
+        tail = np.sort(pop_matrix[:, full:], axis=1)
+        columns.append((tail[:, 1:] == tail[:, :-1]).any(axis=1)[:, None])
+
+    if not columns:
+        return np.zeros((pop_matrix.shape[0], 0), dtype=bool)
+    return np.concatenate(columns, axis=1)
+
+
+def count_day_duplicates(pop_matrix, shifts_per_day):
+    return day_duplicates(pop_matrix, shifts_per_day).sum(axis=1)
+
+
+def operator_counts(pop_matrix, num_operators):
+    rows = np.arange(len(pop_matrix))[:, None] * num_operators
+    counts = np.bincount((rows + pop_matrix).ravel(), minlength=len(pop_matrix) * num_operators)
+    return counts.reshape(len(pop_matrix), num_operators)
+
+
+def count_overload(pop_matrix, num_operators, max_shifts_per_operator):
+    counts = operator_counts(pop_matrix, num_operators)
+    return np.maximum(counts - max_shifts_per_operator, 0).sum(axis=1)
+
+
+def score_components(pop_matrix, preference_matrix, skill_matrix, shifts_per_day, max_shifts_per_operator):
+    pop_matrix = population_to_matrix(pop_matrix)
+    shift_index = np.arange(pop_matrix.shape[1])
+
+    preference_hits = preference_matrix[pop_matrix, shift_index].sum(axis=1)
+    skill_violations = (~skill_matrix[pop_matrix, shift_index]).sum(axis=1)
+    overload = count_overload(pop_matrix, preference_matrix.shape[0], max_shifts_per_operator)
+    duplicates = count_day_duplicates(pop_matrix, shifts_per_day)
+
+    return preference_hits, skill_violations, overload, duplicates
+
+
+# Та же формула, что и в evaluate: +1 за предпочтение, -5 за нехватку навыков,
+# -1 за повтор оператора в дне, -5 за каждую смену сверх MAX_SHIFTS_PER_OPERATOR
+def evaluate_population(pop_matrix, preference_matrix, skill_matrix, shifts_per_day, max_shifts_per_operator,
+                        skill_penalty=5, duplicate_penalty=1, overload_penalty=5):
+    pop_matrix = population_to_matrix(pop_matrix)
+    # Вклад каждого гена сводится в одну матрицу, чтобы обойтись одной выборкой
+    gene_scores = preference_matrix.astype(np.int64) - skill_penalty * (~skill_matrix)
+    scores = gene_scores[pop_matrix, np.arange(pop_matrix.shape[1])].sum(axis=1)
+    scores -= duplicate_penalty * count_day_duplicates(pop_matrix, shifts_per_day)
+    scores -= overload_penalty * count_overload(pop_matrix, preference_matrix.shape[0], max_shifts_per_operator)
+    return scores
+
+
+# Замена map(toolbox.evaluate, offspring) в цикле поколений: возвращает список
+# кортежей фитнеса в том же виде, что и evaluate
+def fitness_tuples(scores):
+    return [(score,) for score in scores.tolist()]
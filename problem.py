@@ -0,0 +1,97 @@
+import copy
+
+import numpy as np
+
+# Скомпилированное описание задачи: навыки, предпочтения и допустимость
+# операторов для смен собираются один раз в битовые маски, чтобы
+# can_perform_shift и prefers_shift не просматривали списки на каждом гене.
+
+
+def to_mask(items):
+    mask = 0
+    for item in items:
+        mask |= 1 << item
+    return mask
+
+
+# Строки packbits(bitorder="little") — те же маски в байтах, младший бит первым.
+# Матрица (в том числе memmap) копируется в bytes один раз, строки режутся срезами
+def bits_to_masks(packed):
+    width = packed.shape[1]
+    data = np.ascontiguousarray(packed).tobytes()
+    return [int.from_bytes(data[start:start + width], "little") for start in range(0, len(data), width)]
+
+
+class ProblemInstance:
+    def __init__(self, num_operators, num_shifts, operator_skills, preferences, shift_types):
+        self.num_operators = num_operators
+        self.num_shifts = num_shifts
+
+        # Навыки оператора и требования смены: бит i означает навык i
+        self.operator_skill_masks = [to_mask(operator_skills[op]) for op in range(num_operators)]
+        self.shift_skill_masks = [to_mask(shift_types[shift]) for shift in range(num_shifts)]
+
+        # Для каждого оператора: бит s означает, что оператор предпочитает смену s
+        self.preferred_shifts = [to_mask(preferences.get(op, [])) for op in range(num_operators)]
+
+        # Матрица допустимости оператор x смена, хранится построчно битовыми масками
+        self.eligible_shifts = [0] * num_operators
+        # Обратный индекс: смена -> допустимые операторы (по возрастанию номера) и их маска
+        self.eligible_operators = []
+        self.eligible_operator_masks = []
+
+        for shift, required in enumerate(self.shift_skill_masks):
+            operators = []
+            operator_mask = 0
+            for op, skills in enumerate(self.operator_skill_masks):
+                if skills & required == required:
+                    self.eligible_shifts[op] |= 1 << shift
+                    operators.append(op)
+                    operator_mask |= 1 << op
+            self.eligible_operators.append(tuple(operators))
+            self.eligible_operator_masks.append(operator_mask)
+
+    # Экземпляр из упакованных битовых матриц (см. instances.py): маски берутся
+    # прямо из байтов строк, без разворачивания в списки номеров
+    @classmethod
+    def from_bits(cls, num_operators, num_shifts, operator_skills, shift_skills, preferences, eligibility):
+        problem = cls.__new__(cls)
+        problem.num_operators = num_operators
+        problem.num_shifts = num_shifts
+        problem.operator_skill_masks = bits_to_masks(operator_skills)
+        problem.shift_skill_masks = bits_to_masks(shift_skills)
+        problem.preferred_shifts = bits_to_masks(preferences)
+        problem.eligible_shifts = bits_to_masks(eligibility)
+        columns = np.unpackbits(eligibility, axis=1, count=num_shifts, bitorder="little").T
+        problem.eligible_operators = [tuple(np.flatnonzero(column).tolist()) for column in columns]
+        problem.eligible_operator_masks = bits_to_masks(np.packbits(columns, axis=1, bitorder="little"))
+        return problem
+
+    def can_perform_shift(self, operator, shift):
+        return (self.eligible_shifts[operator] >> shift) & 1 == 1
+
+    def prefers_shift(self, operator, shift):
+        return (self.preferred_shifts[operator] >> shift) & 1 == 1
+
+    # Копия экземпляра с новыми требованиями навыков одной смены: пересчитывается
+    # только столбец допустимости этой смены, остальные таблицы общие с оригиналом
+    def with_shift_skills(self, shift, skills):
+        problem = copy.copy(self)
+        required = to_mask(skills)
+        problem.shift_skill_masks = list(self.shift_skill_masks)
+        problem.shift_skill_masks[shift] = required
+        problem.eligible_shifts = list(self.eligible_shifts)
+        operators = []
+        operator_mask = 0
+        for op, skills_mask in enumerate(self.operator_skill_masks):
+            if skills_mask & required == required:
+                problem.eligible_shifts[op] |= 1 << shift
+                operators.append(op)
+                operator_mask |= 1 << op
+            else:
+                problem.eligible_shifts[op] &= ~(1 << shift)
+        problem.eligible_operators = list(self.eligible_operators)
+        problem.eligible_operators[shift] = tuple(operators)
+        problem.eligible_operator_masks = list(self.eligible_operator_masks)
+        problem.eligible_operator_masks[shift] = operator_mask
+        return problem
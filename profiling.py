@@ -0,0 +1,137 @@
+import cProfile
+import csv
+import io
+import json
+import os
+import pstats
+import time
+from contextlib import contextmanager
+
+# Встроенное профилирование цикла поколений (engine.py). Таймеры фаз
+# (variation, evaluation, selection, stats, io) и счётчики работают всегда:
+# это пара вызовов perf_counter на фазу. Дополнительно для окна поколений
+# [start, stop) можно включить cProfile. Сводная таблица печатается и/или
+# экспортируется в конце запуска, если профилирование включено флагом
+# (Profiler(enabled=True)) или переменными окружения:
+#   BLESS_PROFILE=1              — печать сводки
+#   BLESS_PROFILE_WINDOW=10:20   — cProfile для поколений 10..19
+#   BLESS_PROFILE_OUTPUT=path    — экспорт сводки (.json или .csv);
+#                                  статистика cProfile — в path.prof
+
+PROFILE_ENV = "BLESS_PROFILE"
+PROFILE_WINDOW_ENV = "BLESS_PROFILE_WINDOW"
+PROFILE_OUTPUT_ENV = "BLESS_PROFILE_OUTPUT"
+PHASES = ("variation", "evaluation", "selection", "stats", "io")
+SUMMARY_FIELDS = ("phase", "calls", "total_sec", "mean_ms", "max_ms", "share")
+TOP_FUNCTIONS = 15
+
+
+def parse_window(text):
+    if not text:
+        return None
+    start, _, stop = text.partition(":")
+    return int(start), int(stop) if stop else int(start) + 1
+
+
+class Profiler:
+    def __init__(self, enabled=False, window=None, output=None, top=TOP_FUNCTIONS):
+        self.enabled = enabled or window is not None or output is not None
+        self.window = window
+        self.output = output
+        self.top = top
+        self.reset()
+
+    # Обнуляет накопленное к началу нового запуска (engine.py вызывает при старте)
+    def reset(self):
+        self.totals = dict.fromkeys(PHASES, 0.0)
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.maxima = dict.fromkeys(PHASES, 0.0)
+        self.counters = {}
+        self.profile = None
+        self.profiled_generations = 0
+        self.start_time = time.perf_counter()
+
+    @classmethod
+    def from_env(cls):
+        enabled = os.environ.get(PROFILE_ENV, "") not in ("", "0")
+        return cls(enabled, parse_window(os.environ.get(PROFILE_WINDOW_ENV)),
+                   os.environ.get(PROFILE_OUTPUT_ENV) or None)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.totals[name] = self.totals.get(name, 0.0) + elapsed
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.maxima[name] = max(self.maxima.get(name, 0.0), elapsed)
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    # cProfile включается только на поколения из окна
+    def begin_generation(self, gen):
+        if self.window is not None and self.window[0] <= gen < self.window[1]:
+            if self.profile is None:
+                self.profile = cProfile.Profile()
+            self.profile.enable()
+            self.profiled_generations += 1
+
+    def end_generation(self, gen):
+        self.count("generations")
+        if self.profile is not None:
+            self.profile.disable()
+
+    def summary(self):
+        measured = sum(self.totals.values())
+        return [{
+            "phase": name,
+            "calls": self.calls[name],
+            "total_sec": total,
+            "mean_ms": 1000 * total / self.calls[name] if self.calls[name] else 0.0,
+            "max_ms": 1000 * self.maxima[name],
+            "share": total / measured if measured else 0.0,
+        } for name, total in self.totals.items()]
+
+    def profile_stats(self):
+        if self.profile is None:
+            return ""
+        out = io.StringIO()
+        pstats.Stats(self.profile, stream=out).sort_stats("cumulative").print_stats(self.top)
+        return out.getvalue()
+
+    def report(self):
+        lines = [f"{'фаза':<12}{'вызовов':>9}{'всего, с':>11}{'сред., мс':>11}{'макс., мс':>11}{'доля':>8}"]
+        for row in self.summary():
+            lines.append(f"{row['phase']:<12}{row['calls']:>9}{row['total_sec']:>11.3f}{row['mean_ms']:>11.3f}"
+                         f"{row['max_ms']:>11.3f}{row['share']:>8.1%}")
+        lines.append(f"Время запуска: {time.perf_counter() - self.start_time:.3f} с")
+        lines.extend(f"{name}: {value}" for name, value in self.counters.items())
+        if self.profile is not None:
+            lines.append(f"cProfile, поколений: {self.profiled_generations}")
+            lines.append(self.profile_stats())
+        return "\n".join(lines)
+
+    def export(self, path):
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+                writer.writeheader()
+                writer.writerows(self.summary())
+        else:
+            with open(path, "w") as f:
+                json.dump({"phases": self.summary(), "counters": self.counters,
+                           "elapsed_sec": time.perf_counter() - self.start_time}, f, indent=2)
+        if self.profile is not None:
+            self.profile.dump_stats(path + ".prof")
+        return path
+
+    # Вызывается в конце запуска
+    def finish(self):
+        if not self.enabled:
+            return
+        print(self.report())
+        if self.output:
+            self.export(self.output)
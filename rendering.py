@@ -0,0 +1,61 @@
+import os
+
+# Ленивая работа с matplotlib. Библиотека импортируется только при первом
+# построении графика, поэтому запуск решателя её не касается. В headless-режиме
+# (переменная окружения BLESS_FIGURE_DIR или configure(output_dir=...)) вместо
+# окна plt.show() графики сохраняются в файлы PNG или SVG.
+
+FIGURE_DIR_ENV = "BLESS_FIGURE_DIR"
+FIGURE_FORMAT_ENV = "BLESS_FIGURE_FORMAT"
+FORMATS = ("png", "svg")
+
+
+def check_format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"Неподдерживаемый формат графиков: {fmt} (допустимы: {', '.join(FORMATS)})")
+    return fmt
+
+
+_output_dir = os.environ.get(FIGURE_DIR_ENV) or None
+_format = check_format(os.environ.get(FIGURE_FORMAT_ENV) or "png")
+_saved = 0
+
+
+def configure(output_dir=None, fmt="png"):
+    global _output_dir, _format
+    _output_dir = output_dir
+    _format = check_format(fmt)
+
+
+def is_headless():
+    return _output_dir is not None
+
+
+def pyplot():
+    import matplotlib
+    if is_headless():
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+# Замена plt.show(): в headless-режиме все открытые фигуры записываются
+# в файлы <номер>_<name>[_<фигура>].<формат> и закрываются. Возвращает пути файлов.
+def show(name="figure"):
+    global _saved
+    plt = pyplot()
+    if not is_headless():
+        plt.show()
+        return []
+
+    os.makedirs(_output_dir, exist_ok=True)
+    figures = plt.get_fignums()
+    paths = []
+    _saved += 1
+    for index, number in enumerate(figures):
+        suffix = f"_{index + 1}" if len(figures) > 1 else ""
+        path = os.path.join(_output_dir, f"{_saved:03d}_{name}{suffix}.{_format}")
+        plt.figure(number).savefig(path, format=_format)
+        paths.append(path)
+    plt.close("all")
+    return paths
@@ -0,0 +1,129 @@
+import flow
+
+# Починка готового расписания после изменения в течение недели. Изменение
+# освобождает только затронутые слоты; остальные назначения фиксируются,
+# а освобождённые слоты заполняются оптимально потоком минимальной стоимости
+# (см. flow.py) с учётом уже занятых операторов:
+#   - лимит смен оператора уменьшается на его фиксированные смены;
+#   - оператор не ставится второй раз в ту же смену и, при shifts_per_day,
+#     в день, где у него уже есть смена; если иначе слоты не заполнить
+#     (операторов меньше, чем смен в дне), повтор допускается, но только
+#     когда без него нельзя (см. soft_repeats в flow.py);
+#   - недоступность операторов (unavailable) — жёсткое ограничение.
+# Решается подзадача размером в затронутые смены, поэтому ответ приходит
+# за доли секунды даже на больших экземплярах.
+
+
+class OperatorUnavailable:
+    def __init__(self, operator, first_shift, last_shift):
+        self.operator = operator
+        self.first_shift = first_shift
+        self.last_shift = last_shift
+
+
+class ShiftSkillsChanged:
+    def __init__(self, shift, skills):
+        self.shift = shift
+        self.skills = skills
+
+
+class RequirementChanged:
+    def __init__(self, shift, required):
+        self.shift = shift
+        self.required = required
+
+
+class RepairResult:
+    def __init__(self, genome, problem, requirements, unavailable, changed_genes, value):
+        self.genome = genome                # новый плоский геном
+        self.problem = problem              # экземпляр с учётом изменения навыков
+        self.requirements = requirements    # требования смен после изменения
+        self.unavailable = unavailable      # все известные пары (оператор, смена) недоступности
+        self.changed_genes = changed_genes  # индексы генов, получивших новых операторов
+        self.value = value                  # вклад переназначенных слотов в фитнес
+
+
+# Плоский геном -> слоты по сменам (для одного оператора на смену — по одному слоту)
+def split_slots(genome, requirements):
+    slots, index = [], 0
+    for required in requirements:
+        slots.append(list(genome[index:index + required]))
+        index += required
+    return slots
+
+
+def check_shift(problem, shift, kind="Смена"):
+    if not 0 <= shift < problem.num_shifts:
+        raise ValueError(f"{kind} {shift} вне расписания: допустимы 0..{problem.num_shifts - 1}")
+
+
+# Освобождает слоты, затронутые изменением (None — свободный слот).
+# При изменении требования назначенные операторы остаются в пределах нового
+# числа, свободными становятся только добавленные слоты
+def apply_change(problem, slots, requirements, unavailable, change):
+    if isinstance(change, OperatorUnavailable):
+        if not 0 <= change.operator < problem.num_operators:
+            raise ValueError(f"Оператор {change.operator} вне экземпляра: допустимы 0..{problem.num_operators - 1}")
+        check_shift(problem, change.first_shift, "Первая смена")
+        check_shift(problem, change.last_shift, "Последняя смена")
+        if change.first_shift > change.last_shift:
+            raise ValueError(f"Первая смена {change.first_shift} позже последней {change.last_shift}")
+        for shift in range(change.first_shift, change.last_shift + 1):
+            unavailable.add((change.operator, shift))
+            slots[shift] = [None if op == change.operator else op for op in slots[shift]]
+    elif isinstance(change, ShiftSkillsChanged):
+        check_shift(problem, change.shift)
+        problem = problem.with_shift_skills(change.shift, change.skills)
+        slots[change.shift] = [None] * len(slots[change.shift])
+    elif isinstance(change, RequirementChanged):
+        check_shift(problem, change.shift)
+        if change.required < 0:
+            raise ValueError(f"Отрицательное требование смены {change.shift}: {change.required}")
+        requirements[change.shift] = change.required
+        kept = slots[change.shift][:change.required]
+        slots[change.shift] = kept + [None] * (change.required - len(kept))
+    else:
+        raise TypeError(f"Неизвестное изменение расписания: {type(change).__name__}")
+    return problem
+
+
+def repair(problem, genome, change, requirements=None, max_shifts=3, shifts_per_day=None, unavailable=(),
+           preference_weight=1, invalid_penalty=5, overload_penalty=5):
+    requirements = list(requirements or [1] * problem.num_shifts)
+    unavailable = set(unavailable)
+    slots = split_slots(genome, requirements)
+    problem = apply_change(problem, slots, requirements, unavailable, change)
+
+    free = [shift_slots.count(None) for shift_slots in slots]
+    load = [0] * problem.num_operators
+    occupied = set()
+    for shift, shift_slots in enumerate(slots):
+        for operator in shift_slots:
+            if operator is None:
+                continue
+            load[operator] += 1
+            occupied.add((operator, shift))
+            if shifts_per_day:
+                day = shift // shifts_per_day
+                occupied.update((operator, other) for other in range(day * shifts_per_day,
+                                                                      min((day + 1) * shifts_per_day,
+                                                                          problem.num_shifts)))
+    capacities = [max(0, max_shifts - count) for count in load]
+
+    penalties = (preference_weight, invalid_penalty, overload_penalty)
+    try:
+        schedule, value = flow.assignment_flow(problem, free, capacities, *penalties, shifts_per_day,
+                                               forbidden=unavailable, occupied=occupied)
+    except ValueError:
+        schedule, value = flow.assignment_flow(problem, free, capacities, *penalties, shifts_per_day,
+                                               forbidden=unavailable, occupied=occupied, soft_repeats=True)
+
+    new_genome, changed = [], []
+    for shift, shift_slots in enumerate(slots):
+        assigned = iter(schedule[shift])
+        for operator in shift_slots:
+            if operator is None:
+                changed.append(len(new_genome))
+                operator = next(assigned)
+            new_genome.append(operator)
+    return RepairResult(new_genome, problem, requirements, unavailable, changed, value)
@@ -0,0 +1,274 @@
+import csv
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import bitcrew
+from delta_eval import DeltaEvaluator
+import instances
+import population_eval
+from problem import ProblemInstance
+import variation
+
+# Загрузка выгрузок расписания (CSV или JSON) с компиляцией в бинарный файл
+# экземпляра (см. instances.py). Разбор выполняется один раз: рядом с выгрузкой
+# сохраняется файл <выгрузка>.blessins, который при следующих запусках и в
+# рабочих процессах открывается через memory map. Файл пересобирается, если
+# изменился хэш содержимого исходных файлов. В скрипт экземпляр подставляется
+# прямо из битовых матриц (use_roster, apply_instance), без обратного перевода
+# в словари таблиц; так загружают выгрузки сервис (service.py) и benchmark.py.
+#
+# JSON:
+#   {"shifts_per_day": 3,
+#    "operators": [{"id": 0, "skills": [0, 1], "preferences": [0, 5]}, ...],
+#    "shifts": [{"id": 0, "skills": [0, 2], "required": 1}, ...]}
+# CSV — два файла, списки через ";":
+#   операторы: id,skills,preferences
+#   смены:     id,skills,required
+
+CACHE_SUFFIX = ".blessins"
+FORMAT_VERSION = 1
+
+
+def source_hash(paths):
+    digest = hashlib.sha256(f"roster-v{FORMAT_VERSION}".encode())
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_list(text):
+    return [int(item) for item in text.replace(",", ";").split(";") if item.strip()]
+
+
+# Записи упорядочиваются по id; id должны быть номерами 0..n-1
+def ordered(records, kind):
+    by_id = {int(record["id"]): record for record in records}
+    if sorted(by_id) != list(range(len(records))):
+        raise ValueError(f"{kind}: id должны быть различными номерами от 0 до {len(records) - 1}")
+    return [by_id[index] for index in range(len(records))]
+
+
+def read_json_roster(path):
+    with open(path) as f:
+        return parse_json_roster(json.load(f))
+
+
+# Номера в строках таблицы — от 0 до width-1 (width None — без верхней границы)
+def check_indices(rows, width, kind):
+    for index, row in enumerate(rows):
+        bad = [item for item in row if item < 0 or width is not None and item >= width]
+        if bad:
+            limit = f", допустимы 0..{width - 1}" if width is not None else ""
+            raise ValueError(f"{kind} {index}: недопустимые номера {bad}{limit}")
+    return rows
+
+
+def parse_json_roster(data):
+    operators = ordered(data["operators"], "операторы")
+    shifts = ordered(data["shifts"], "смены")
+    return (
+        check_indices([operator["skills"] for operator in operators], None, "Навыки оператора"),
+        check_indices([operator.get("preferences", []) for operator in operators], len(shifts),
+                      "Предпочтения оператора"),
+        check_indices([shift["skills"] for shift in shifts], None, "Навыки смены"),
+        [shift.get("required", 1) for shift in shifts],
+        data.get("shifts_per_day", 3),
+    )
+
+
+# Таблицы скрипта -> выгрузка JSON в том же формате (обратно к parse_json_roster).
+# Предпочтения несуществующих смен отбрасываются, как и в ProblemInstance
+def module_roster(module):
+    preferences = module.PREFERENCES
+    requirements = getattr(module, "SHIFT_OPERATOR_REQUIREMENTS", [1])
+    return {
+        "shifts_per_day": getattr(module, "SHIFTS_PER_DAY", 1),
+        "operators": [{"id": op, "skills": list(module.OPERATOR_SKILLS[op]),
+                       "preferences": [shift for shift in (preferences.get(op, []) if isinstance(preferences, dict)
+                                                           else preferences[op])
+                                       if 0 <= shift < module.NUM_SHIFTS]}
+                      for op in range(module.NUM_OPERATORS)],
+        "shifts": [{"id": shift, "skills": list(module.SHIFT_TYPES[shift]),
+                    "required": requirements[shift % len(requirements)]}
+                   for shift in range(module.NUM_SHIFTS)],
+    }
+
+
+def read_csv_rows(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def read_csv_roster(operators_path, shifts_path, shifts_per_day=3):
+    operators = ordered(read_csv_rows(operators_path), "операторы")
+    shifts = ordered(read_csv_rows(shifts_path), "смены")
+    return (
+        [parse_list(operator["skills"]) for operator in operators],
+        [parse_list(operator.get("preferences") or "") for operator in operators],
+        [parse_list(shift["skills"]) for shift in shifts],
+        [int(shift.get("required") or 1) for shift in shifts],
+        shifts_per_day,
+    )
+
+
+def bit_rows(rows, width, kind="Строка"):
+    check_indices(rows, width, kind)
+    bits = np.zeros((len(rows), width), dtype=bool)
+    for index, row in enumerate(rows):
+        bits[index, row] = True
+    return bits
+
+
+def pack(bits):
+    return np.packbits(bits, axis=1, bitorder="little")
+
+
+# Оператор допущен к смене, если у него нет ни одного недостающего навыка смены
+def eligibility_matrix(operator_skills, shift_skills):
+    missing = shift_skills.sum(axis=1) - operator_skills.astype(np.int32) @ shift_skills.T.astype(np.int32)
+    return missing == 0
+
+
+def build_instance(operator_skills, preferences, shift_skills, requirements, shifts_per_day):
+    num_skills = 1 + max((skill for row in operator_skills + shift_skills for skill in row), default=-1)
+    num_operators, num_shifts = len(operator_skills), len(shift_skills)
+    operator_bits = bit_rows(operator_skills, num_skills, "Навыки оператора")
+    shift_bits = bit_rows(shift_skills, num_skills, "Навыки смены")
+    return instances.Instance(
+        num_operators, num_skills, num_shifts, shifts_per_day,
+        operator_skills=pack(operator_bits),
+        preferences=pack(bit_rows(preferences, num_shifts, "Предпочтения оператора")),
+        shift_skills=pack(shift_bits),
+        shift_requirements=np.asarray(requirements, dtype=np.uint16),
+        eligibility=pack(eligibility_matrix(operator_bits, shift_bits)),
+    )
+
+
+def read_roster(path, shifts_path=None, shifts_per_day=3):
+    if shifts_path is None:
+        return read_json_roster(path)
+    return read_csv_roster(path, shifts_path, shifts_per_day)
+
+
+# Запись во временный файл и атомарная замена: параллельные процессы
+# никогда не увидят наполовину записанный экземпляр
+def compile_roster(path, shifts_path=None, cache_path=None, shifts_per_day=3):
+    sources = [path] if shifts_path is None else [path, shifts_path]
+    cache_path = cache_path or path + CACHE_SUFFIX
+    instance = build_instance(*read_roster(path, shifts_path, shifts_per_day))
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    instances.save_instance(instance, temp_path, {"source_hash": source_hash(sources)})
+    os.replace(temp_path, cache_path)
+    return cache_path
+
+
+# Экземпляр из выгрузки: JSON (один файл) или CSV (файлы операторов и смен).
+# Скомпилированный файл используется, пока хэш исходных файлов не изменился.
+def load_roster(path, shifts_path=None, cache_path=None, shifts_per_day=3):
+    sources = [path] if shifts_path is None else [path, shifts_path]
+    cache_path = cache_path or path + CACHE_SUFFIX
+    try:
+        header, _ = instances.read_header(cache_path)
+        fresh = header.get("source_hash") == source_hash(sources)
+    except (OSError, ValueError):
+        fresh = False
+    if not fresh:
+        compile_roster(path, shifts_path, cache_path, shifts_per_day)
+    return instances.load_instance(cache_path)
+
+
+# Таблицы в формате скриптов: OPERATOR_SKILLS, PREFERENCES, SHIFT_TYPES
+# и SHIFT_OPERATOR_REQUIREMENTS
+def to_tables(instance):
+    operator_skills, preferences, shift_types = instances.to_tables(instance)
+    requirements = instance.shift_requirements
+    if requirements is None:
+        requirements = np.ones(instance.num_shifts, dtype=np.uint16)
+    return operator_skills, preferences, shift_types, requirements.tolist()
+
+
+# Подставляет таблицы в модуль скрипта: размеры, производные структуры и
+# регистрации toolbox, зависящие от размеров. requirements (если у скрипта есть
+# SHIFT_OPERATOR_REQUIREMENTS) по умолчанию — прежний недельный шаблон скрипта,
+# повторённый на все смены. Класс особи берётся из module.INDIVIDUAL, а не из
+# creator: там он принадлежит последнему импортированному скрипту.
+def apply_tables(module, operator_skills, preferences, shift_types, requirements=None, max_shifts=None,
+                 shifts_per_day=None):
+    module.OPERATOR_SKILLS, module.PREFERENCES, module.SHIFT_TYPES = operator_skills, preferences, shift_types
+    problem = ProblemInstance(len(operator_skills), len(shift_types), operator_skills, preferences, shift_types)
+    return apply_problem(module, problem, requirements, max_shifts, shifts_per_day)
+
+
+# Матрица допустимости экземпляра; у сгенерированных (instances.py) её нет — считается по навыкам
+def instance_eligibility(instance):
+    if instance.eligibility is not None:
+        return np.asarray(instance.eligibility)
+    return pack(eligibility_matrix(instances.unpack_rows(instance.operator_skills, instance.num_skills),
+                                   instances.unpack_rows(instance.shift_skills, instance.num_skills)))
+
+
+# Подставляет в модуль экземпляр из упакованных битов (load_roster, build_instance,
+# instances.generate_instance): PROBLEM и матрицы оценки строятся прямо из битовых
+# строк. Таблицы-словари OPERATOR_SKILLS, PREFERENCES и SHIFT_TYPES не строятся —
+# решателю нужны только PROBLEM и матрицы.
+def apply_instance(module, instance, max_shifts=None):
+    eligibility = instance_eligibility(instance)
+    problem = ProblemInstance.from_bits(instance.num_operators, instance.num_shifts, instance.operator_skills,
+                                        instance.shift_skills, instance.preferences, eligibility)
+    lookup = population_eval.lookup_tables_from_bits(instance.preferences, eligibility, instance.num_shifts)
+    requirements = instance.shift_requirements
+    module.OPERATOR_SKILLS = module.PREFERENCES = module.SHIFT_TYPES = None
+    return apply_problem(module, problem, None if requirements is None else requirements.tolist(), max_shifts,
+                         instance.shifts_per_day, lookup)
+
+
+# Выгрузка (JSON или CSV, см. load_roster) -> модуль скрипта; скомпилированный
+# файл открывается через memory map и переиспользуется между запусками и процессами
+def use_roster(module, path, shifts_path=None, cache_path=None, shifts_per_day=3, max_shifts=None):
+    return apply_instance(module, load_roster(path, shifts_path, cache_path, shifts_per_day), max_shifts)
+
+
+# Общая часть apply_tables и apply_instance: размеры, производные структуры и toolbox.
+# lookup — готовые матрицы (предпочтения, допустимость) для пакетной оценки
+def apply_problem(module, problem, requirements=None, max_shifts=None, shifts_per_day=None, lookup=None):
+    shifts_per_day = shifts_per_day or getattr(module, "SHIFTS_PER_DAY", 1)
+    num_shifts = problem.num_shifts
+    module.NUM_OPERATORS = problem.num_operators
+    module.NUM_SHIFTS = num_shifts
+    if hasattr(module, "SHIFTS_PER_DAY"):
+        module.SHIFTS_PER_DAY = shifts_per_day
+    if max_shifts is not None:
+        module.MAX_SHIFTS_PER_OPERATOR = max_shifts
+    module.PROBLEM = problem
+    genome_length = num_shifts
+
+    if hasattr(module, "PREFERENCE_MATRIX"):
+        lookup = lookup or population_eval.build_lookup_tables(problem)
+        module.PREFERENCE_MATRIX, module.SKILL_MATRIX = lookup
+    if hasattr(module, "DELTA_EVALUATOR"):
+        module.DELTA_EVALUATOR = DeltaEvaluator(module.PROBLEM, module.SHIFTS_PER_DAY,
+                                                module.MAX_SHIFTS_PER_OPERATOR, module.DELTA_EVALUATOR.score,
+                                                lookup, module.DELTA_EVALUATOR.max_changes)
+    if hasattr(module, "CREW_MASKS"):
+        module.CREW_MASKS = bitcrew.CrewMasks(module.PROBLEM)
+    if hasattr(module, "SHIFT_OPERATOR_REQUIREMENTS"):
+        if requirements is None:
+            pattern = module.SHIFT_OPERATOR_REQUIREMENTS[:7]
+            requirements = [pattern[shift % len(pattern)] for shift in range(num_shifts)]
+        module.SHIFT_OPERATOR_REQUIREMENTS = list(requirements)
+        module.TOTAL_ASSIGNMENTS = genome_length = sum(module.SHIFT_OPERATOR_REQUIREMENTS)
+
+    if hasattr(module, "GENE_SHIFTS"):
+        if hasattr(module, "SHIFT_OPERATOR_REQUIREMENTS"):
+            module.GENE_SHIFTS = variation.slot_shifts(module.SHIFT_OPERATOR_REQUIREMENTS)
+        else:
+            module.GENE_SHIFTS = tuple(range(genome_length))
+        variation.register_eligible(module.toolbox, module.INDIVIDUAL, module.PROBLEM, module.GENE_SHIFTS,
+                                    shifts_per_day, module.EXPLORATION_RATE,
+                                    max_shifts=module.MAX_SHIFTS_PER_OPERATOR, warm_start=module.WARM_START_FRACTION)
+    return module
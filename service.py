@@ -0,0 +1,405 @@
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import multiprocessing
+import random
+import time
+from contextlib import nullcontext
+
+from deap import tools
+
+from engine import GenerationEngine, fitness_stats
+from fitness_cache import cached_evaluation, default_cache_size
+import roster
+from termination import TerminationPolicy
+
+# Локальный сервис расписаний на asyncio. Протокол — JSON по строкам
+# (одно сообщение на строку) через Unix-сокет или TCP на localhost:
+#   {"op": "submit", "model": "atg3", "solver": "ga", "params": {...},
+#    "instance": {...}, "watch": true}      -> {"job": 1, "state": "queued"}
+#   {"op": "watch", "job": 1}               -> поток событий progress до итогового
+#   {"op": "status", "job": 1}              -> состояние, последний прогресс, результат
+#   {"op": "cancel", "job": 1}
+#   {"op": "jobs"}
+# instance — выгрузка в формате JSON из roster.py; roster — путь к файлу выгрузки
+# на этой машине (JSON или CSV операторов, для CSV roster_shifts — файл смен):
+# её скомпилированная копия открывается через memory map и переиспользуется всеми
+# задачами (см. roster.load_roster). Без них используется экземпляр, встроенный
+# в скрипт, и он возвращается в result.instance (atg3 генерирует экземпляр заново
+# в каждом процессе). params: ngen, population, cxpb, mutpb, seed,
+# cache_size, max_shifts, progress_interval, termination (аргументы TerminationPolicy).
+# Задачи ставятся в очередь и выполняются не более чем workers одновременно,
+# каждая в отдельном свежем процессе: скрипты хранят экземпляр в глобальных
+# таблицах модуля, и подстановка экземпляра одной задачи не должна влиять на
+# другие. Отмена запущенной задачи завершает её процесс. Прогресс приходит из
+# процесса по каналу (multiprocessing.Pipe), который читается циклом событий
+# без отдельных потоков. Сеть не нужна: сервис и клиент работают на одной машине.
+# Завершённые задачи хранятся до MAX_FINISHED_JOBS последних, более старые
+# удаляются при постановке новых.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 2
+PROGRESS_INTERVAL = 10
+MAX_FINISHED_JOBS = 100
+
+# Скрипт -> (cxpb, mutpb, размер популяции, число поколений) из его main
+MODELS = {
+    "bless": (1, 1, 300, 450),
+    "best_fitness": (1, 1, 300, 450),
+    "sevenshifts": (1, 1, 300, 100),
+    "sevenshiftsgenetic": (0.7, 0.3, 200, 100),
+    "atg3": (1, 1, 300, 100),
+    "alltogether": (1, 1, 300, 100),
+}
+SOLVERS = ("ga", "greedy")
+# Скрипты с жадным планировщиком greedy_scheduler
+GREEDY_MODELS = ("atg3",)
+FINAL_STATES = ("done", "failed", "cancelled")
+
+
+# Прогресс ГА для engine.run (интерфейс телеметрии): каждые interval поколений
+# в канал уходят средний и лучший фитнес и число оценок
+class ProgressReporter:
+    def __init__(self, send, interval=PROGRESS_INTERVAL):
+        self.send = send
+        self.interval = interval
+        self.evaluations = 0
+
+    def phase(self, name):
+        return nullcontext()
+
+    def resume(self, next_gen):
+        pass
+
+    def record(self, gen, population, evaluations, cache_stats=None):
+        self.evaluations += evaluations
+        if (gen + 1) % self.interval == 0:
+            mean, best = fitness_stats(population)
+            self.send({"generation": gen, "avg": mean, "max": best, "evaluations": self.evaluations})
+
+
+def apply_instance(module, data, max_shifts=None):
+    roster.apply_instance(module, roster.build_instance(*roster.parse_json_roster(data)), max_shifts)
+
+
+# Выполняет задачу в процессе-исполнителе; send — отправка событий прогресса
+def solve(request, send):
+    module = importlib.import_module(request["model"])
+    params = request.get("params") or {}
+    instance = {}
+    if request.get("roster"):
+        roster.use_roster(module, request["roster"], request.get("roster_shifts"), max_shifts=params.get("max_shifts"))
+    elif request.get("instance"):
+        apply_instance(module, request["instance"], params.get("max_shifts"))
+    else:
+        instance = {"instance": roster.module_roster(module)}
+    if params.get("seed") is not None:
+        random.seed(params["seed"])
+    start = time.perf_counter()
+
+    if request.get("solver", "ga") == "greedy":
+        best = module.greedy_scheduler()
+        fitness = module.evaluate(best)
+        summary = {}
+    else:
+        cxpb, mutpb, population_size, ngen = MODELS[request["model"]]
+        toolbox = module.toolbox
+        population = toolbox.population(n=params.get("population", population_size))
+        reporter = ProgressReporter(send, params.get("progress_interval", PROGRESS_INTERVAL))
+        termination = TerminationPolicy(**params.get("termination", {}))
+        engine = GenerationEngine()
+        with cached_evaluation(toolbox, params.get("cache_size", default_cache_size(toolbox))) as cache:
+            population = engine.run(population, toolbox, params.get("cxpb", cxpb), params.get("mutpb", mutpb),
+                                    params.get("ngen", ngen), telemetry=reporter, termination=termination,
+                                    cache=cache)
+        best = tools.selBest(population, 1)[0]
+        fitness = best.fitness.values
+        summary = {"generations": termination.generation + 1, "evaluations": engine.evaluations,
+                   "reason": termination.reason}
+
+    result = {"schedule": list(best), "fitness": list(fitness), "elapsed": time.perf_counter() - start, **summary,
+              **instance}
+    if hasattr(module, "reshape_schedule"):
+        result["shifts"] = module.reshape_schedule(best)
+    return result
+
+
+def _worker_main(conn):
+    request = conn.recv()
+    try:
+        conn.send(("done", solve(request, lambda event: conn.send(("progress", event)))))
+    except Exception as exc:
+        conn.send(("failed", f"{type(exc).__name__}: {exc}"))
+    finally:
+        conn.close()
+
+
+def validate(request):
+    if request.get("model") not in MODELS:
+        raise ValueError(f"Неизвестная модель: {request.get('model')}; доступны: {', '.join(MODELS)}")
+    solver = request.get("solver", "ga")
+    if solver not in SOLVERS:
+        raise ValueError(f"Неизвестный решатель: {solver}")
+    if solver == "greedy" and request["model"] not in GREEDY_MODELS:
+        raise ValueError(f"Жадный планировщик есть только у {', '.join(GREEDY_MODELS)}")
+    if not isinstance(request.get("params") or {}, dict) or not isinstance(request.get("instance") or {}, dict):
+        raise ValueError("params и instance должны быть объектами JSON")
+    if request.get("roster") is not None and (not isinstance(request["roster"], str) or request.get("instance")):
+        raise ValueError("roster — путь к файлу выгрузки, вместе с instance не задаётся")
+    if (request.get("params") or {}).get("ngen", 1) < 1:
+        raise ValueError("ngen должно быть положительным")
+
+
+class Job:
+    def __init__(self, job_id, request):
+        self.id = job_id
+        self.request = request
+        self.state = "queued"
+        self.events = []
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.process = None
+        self.cancel_requested = False
+        self.updated = asyncio.Event()
+
+    @property
+    def finished(self):
+        return self.state in FINAL_STATES
+
+    # Событие для наблюдателей: итоговое событие — последнее в списке
+    def publish(self, event):
+        self.events.append(dict(event, job=self.id))
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+    def set_progress(self, progress):
+        self.progress = progress
+        self.publish(dict(progress, event="progress"))
+
+    def finish(self, state, result=None, error=None):
+        self.state, self.result, self.error = state, result, error
+        self.publish({"event": state, "result": result, "error": error})
+
+    def describe(self):
+        return {"job": self.id, "state": self.state, "model": self.request["model"],
+                "solver": self.request.get("solver", "ga"), "progress": self.progress,
+                "result": self.result, "error": self.error}
+
+
+class SchedulingService:
+    def __init__(self, workers=DEFAULT_WORKERS, max_finished=MAX_FINISHED_JOBS):
+        self.workers = workers
+        self.max_finished = max_finished
+        self.jobs = {}
+        self.ids = itertools.count(1)
+        self.queue = asyncio.Queue()
+        self.slots = []
+        self.context = multiprocessing.get_context("spawn")
+
+    def start(self):
+        self.slots = [asyncio.create_task(self._slot()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for job in self.jobs.values():
+            if not job.finished:
+                self.cancel(job.id)
+        for slot in self.slots:
+            slot.cancel()
+        await asyncio.gather(*self.slots, return_exceptions=True)
+
+    def submit(self, request):
+        validate(request)
+        self.prune()
+        job = Job(next(self.ids), request)
+        self.jobs[job.id] = job
+        self.queue.put_nowait(job)
+        return job
+
+    # Остаются только max_finished последних завершённых задач; наблюдатели
+    # удалённой задачи дочитывают её события по своей ссылке
+    def prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        if job_id not in self.jobs:
+            raise ValueError(f"Нет задачи {job_id}")
+        return self.jobs[job_id]
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job.state == "queued":
+            job.finish("cancelled")
+        elif job.state == "running":
+            job.cancel_requested = True
+            job.process.terminate()
+        return job
+
+    # События задачи с номера start до итогового
+    async def watch(self, job, start=0):
+        index = start
+        while True:
+            updated = job.updated
+            if index == len(job.events):
+                await updated.wait()
+            event = job.events[index]
+            index += 1
+            yield event
+            if event["event"] in FINAL_STATES:
+                return
+
+    async def _slot(self):
+        while True:
+            job = await self.queue.get()
+            if job.state == "queued":
+                await self._run(job)
+
+    async def _run(self, job):
+        loop = asyncio.get_running_loop()
+        conn, child_conn = self.context.Pipe()
+        job.process = self.context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        job.process.start()
+        child_conn.close()
+        job.state = "running"
+        job.publish({"event": "running"})
+        conn.send(job.request)
+
+        messages = asyncio.Queue()
+
+        def receive():
+            try:
+                while conn.poll():
+                    messages.put_nowait(conn.recv())
+            except (EOFError, OSError):
+                loop.remove_reader(conn.fileno())
+                messages.put_nowait(("exit", None))
+
+        loop.add_reader(conn.fileno(), receive)
+        try:
+            while True:
+                kind, payload = await messages.get()
+                if kind == "progress":
+                    job.set_progress(payload)
+                elif kind == "done":
+                    job.finish("done", result=payload)
+                    break
+                elif kind == "failed":
+                    job.finish("failed", error=payload)
+                    break
+                else:
+                    if job.cancel_requested:
+                        job.finish("cancelled")
+                    else:
+                        job.finish("failed", error=f"Процесс завершился с кодом {job.process.exitcode}")
+                    break
+        finally:
+            loop.remove_reader(conn.fileno())
+            conn.close()
+            await loop.run_in_executor(None, job.process.join)
+
+    async def send(self, writer, message):
+        writer.write((json.dumps(message, ensure_ascii=False) + "\n").encode())
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                try:
+                    await self.dispatch(json.loads(line), writer)
+                except KeyError as exc:
+                    await self.send(writer, {"error": f"Нет поля {exc.args[0]}"})
+                except (ValueError, TypeError) as exc:
+                    await self.send(writer, {"error": str(exc)})
+        # Разрыв соединения клиентом или остановка сервиса посреди watch
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request, writer):
+        op = request.get("op")
+        if op == "submit":
+            job = self.submit(request)
+            await self.send(writer, {"job": job.id, "state": job.state})
+            if request.get("watch"):
+                async for event in self.watch(job):
+                    await self.send(writer, event)
+        elif op == "watch":
+            async for event in self.watch(self.get(request["job"])):
+                await self.send(writer, event)
+        elif op == "status":
+            await self.send(writer, self.get(request["job"]).describe())
+        elif op == "cancel":
+            await self.send(writer, self.cancel(request["job"]).describe())
+        elif op == "jobs":
+            await self.send(writer, {"jobs": [job.describe() for job in self.jobs.values()]})
+        else:
+            raise ValueError(f"Неизвестная операция: {op}")
+
+
+async def serve(path=None, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS, ready=None):
+    service = SchedulingService(workers)
+    service.start()
+    if path:
+        server = await asyncio.start_unix_server(service.handle, path)
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+    if ready is not None:
+        ready.set_result(server)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+# Клиент протокола: call — один ответ, stream — события до итогового
+class ServiceClient:
+    def __init__(self, path=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def connect(self):
+        if self.path:
+            self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        return self
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+    async def call(self, message):
+        self.writer.write((json.dumps(message) + "\n").encode())
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def stream(self, message):
+        response = await self.call(message)
+        while True:
+            yield response
+            if "error" in response or response.get("event") in FINAL_STATES:
+                return
+            response = json.loads(await self.reader.readline())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный сервис расписаний")
+    parser.add_argument("--socket", help="путь Unix-сокета (по умолчанию — TCP на localhost)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+    asyncio.run(serve(args.socket, args.host, args.port, args.workers))
+
+
+if __name__ == "__main__":
+    main()
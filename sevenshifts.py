@@ -1,6 +1,19 @@
+import array
 import random
-import matplotlib.pyplot as plt
-from deap import base, creator, tools, algorithms
+from deap import base, creator, tools
+
+from engine import GenerationEngine
+import flow
+import genome
+import islands
+import parallel
+from fitness_cache import DEFAULT_CACHE_SIZE, cached_evaluation, format_cache_stats, total_stats
+from problem import ProblemInstance
+import repair
+import rendering
+import staffing
+from termination import TerminationPolicy
+import variation
 
 # Конфигурация задачи
 NUM_OPERATORS = 10
@@ -40,12 +53,15 @@ SHIFT_TYPES = [
     [4, 0]
 ]
 
+# Таблицы навыков и предпочтений, скомпилированные в битовые маски (см. problem.py)
+PROBLEM = ProblemInstance(NUM_OPERATORS, NUM_SHIFTS, OPERATOR_SKILLS, PREFERENCES, SHIFT_TYPES)
+
 # Вспомогательные функции
 def prefers_shift(operator, shift):
-    return shift in PREFERENCES.get(operator, [])
+    return PROBLEM.prefers_shift(operator, shift)
 
 def can_perform_shift(operator, shift):
-    return all(skill in OPERATOR_SKILLS[operator] for skill in SHIFT_TYPES[shift])
+    return PROBLEM.can_perform_shift(operator, shift)
 
 def reshape_schedule(flat_schedule):
     schedule = []
@@ -86,18 +102,52 @@ TOTAL_ASSIGNMENTS = sum(SHIFT_OPERATOR_REQUIREMENTS)
 
 creator.create("FitnessMax", base.Fitness, weights=(1.0,))
 creator.create("Individual", list, fitness=creator.FitnessMax)
+creator.create("ArrayIndividual", array.array, typecode=genome.TYPECODE, fitness=creator.FitnessMax)
+INDIVIDUAL = creator.Individual
+ARRAY_INDIVIDUAL = creator.ArrayIndividual
 
 toolbox = base.Toolbox()
-toolbox.register("attr_int", random.randint, 0, NUM_OPERATORS - 1)
-toolbox.register("individual", tools.initRepeat, creator.Individual, toolbox.attr_int, TOTAL_ASSIGNMENTS)
-toolbox.register("population", tools.initRepeat, list, toolbox.individual)
-toolbox.register("mate", tools.cxTwoPoint)
-toolbox.register("mutate", tools.mutFlipBit, indpb=0.05)
+# Гены берутся из операторов, допущенных к смене; кроссовер режет по границам дней;
+# доля WARM_START_FRACTION стартовой популяции — жадные расписания (см. variation.py)
+EXPLORATION_RATE = 0.1
+WARM_START_FRACTION = 0.1
+GENE_SHIFTS = variation.slot_shifts(SHIFT_OPERATOR_REQUIREMENTS)
+variation.register_eligible(toolbox, INDIVIDUAL, PROBLEM, GENE_SHIFTS, 1, EXPLORATION_RATE,
+                            max_shifts=MAX_SHIFTS_PER_OPERATOR, warm_start=WARM_START_FRACTION)
 toolbox.register("select", tools.selTournament, tournsize=3)
 toolbox.register("evaluate", evaluate)
 
+# Оценка списка особей; в параллельном режиме подменяется пулом (см. parallel.py)
+def evaluate_many(individuals):
+    return list(map(evaluate, individuals))
+
+toolbox.register("evaluate_many", evaluate_many)
+
+# Компактный геном uint16 с копированием буфера вместо deepcopy (см. genome.py)
+def use_array_genome():
+    genome.register_array_genome(toolbox, ARRAY_INDIVIDUAL, PROBLEM, GENE_SHIFTS, 1,
+                                 exploration=EXPLORATION_RATE, max_shifts=MAX_SHIFTS_PER_OPERATOR,
+                                 warm_start=WARM_START_FRACTION)
+
+# Требования смен из прогноза звонков (Erlang C, см. staffing.py): calls и
+# handle_time — интервалы x очереди, смена занимает intervals_per_shift интервалов.
+# Длина генома и операторы вариации пересобираются, поэтому компактный геном
+# (use_array_genome) включается после
+def use_forecast(calls, handle_time, intervals_per_shift, **kwargs):
+    global SHIFT_OPERATOR_REQUIREMENTS, TOTAL_ASSIGNMENTS, GENE_SHIFTS
+    requirements = staffing.requirements_from_forecast(calls, handle_time, intervals_per_shift, **kwargs)
+    if len(requirements) != NUM_SHIFTS:
+        raise ValueError(f"Прогноз покрывает {len(requirements)} смен, в задаче их {NUM_SHIFTS}")
+    SHIFT_OPERATOR_REQUIREMENTS = requirements
+    TOTAL_ASSIGNMENTS = sum(requirements)
+    GENE_SHIFTS = variation.slot_shifts(requirements)
+    variation.register_eligible(toolbox, INDIVIDUAL, PROBLEM, GENE_SHIFTS, 1, EXPLORATION_RATE,
+                                max_shifts=MAX_SHIFTS_PER_OPERATOR, warm_start=WARM_START_FRACTION)
+    return requirements
+
 # Визуализация
 def visualize_schedule(flat_schedule):
+    plt = rendering.pyplot()
     schedule = reshape_schedule(flat_schedule)
     fig, ax = plt.subplots()
     colors = plt.get_cmap("tab10")
@@ -114,9 +164,10 @@ def visualize_schedule(flat_schedule):
     ax.set_ylabel("Смены")
     ax.set_title("Распределение операторов по сменам")
     plt.tight_layout()
-    plt.show()
+    rendering.show("visualize_schedule")
 
 def plot_fitness_dynamics(avg_fitness, max_fitness, label_prefix=""):
+    plt = rendering.pyplot()
     plt.plot(avg_fitness, label=f"{label_prefix}Средняя")
     plt.plot(max_fitness, label=f"{label_prefix}Макс")
     plt.xlabel("Поколение")
@@ -124,27 +175,61 @@ def plot_fitness_dynamics(avg_fitness, max_fitness, label_prefix=""):
     plt.title("Динамика обучения ГА")
     plt.legend()
     plt.grid(True)
-    plt.show()
+    rendering.show("plot_fitness_dynamics")
 
-def run_experiment(cxpb, mutpb, ngen=100):
-    population = toolbox.population(n=300)
+def run_experiment(cxpb, mutpb, ngen=100, parallel_eval=False, processes=None,
+                   cache_size=DEFAULT_CACHE_SIZE, seed=None, termination=None, checkpointer=None,
+                   resume_from=None, array_genome=False, engine=None):
+    if seed is not None:
+        random.seed(seed)
     avg_fitness_history = []
     max_fitness_history = []
-    for gen in range(ngen):
-        offspring = algorithms.varAnd(population, toolbox, cxpb=cxpb, mutpb=mutpb)
-        fits = list(map(toolbox.evaluate, offspring))
-        for ind, fit in zip(offspring, fits):
-            ind.fitness.values = fit
-        population = toolbox.select(offspring, k=len(population))
-        fitnesses = [ind.fitness.values[0] for ind in population]
-        avg_fitness_history.append(sum(fitnesses) / len(fitnesses))
-        max_fitness_history.append(max(fitnesses))
+    termination = termination or TerminationPolicy()
+    termination.start()
+    engine = engine or GenerationEngine()
+    # Компактный геном только на этот запуск (см. genome.py)
+    with genome.array_genome_scope(toolbox, array_genome, use_array_genome), \
+            parallel.parallel_evaluation(toolbox, __name__, parallel_eval, processes), \
+            cached_evaluation(toolbox, cache_size) as cache:
+        population = toolbox.population(n=300)
+        population = engine.run(population, toolbox, cxpb, mutpb, ngen, termination=termination,
+                                checkpointer=checkpointer, resume_from=resume_from, cache=cache,
+                                avg_history=avg_fitness_history, max_history=max_fitness_history)
     best = tools.selBest(population, 1)[0]
     return best, avg_fitness_history, max_fitness_history
 
-def main():
+# Точное решение потоком минимальной стоимости и верхняя граница фитнеса (см. flow.py)
+def exact_scheduler():
+    return flow.solve_assignment(PROBLEM, SHIFT_OPERATOR_REQUIREMENTS, MAX_SHIFTS_PER_OPERATOR)
+
+# Починка расписания после изменения (недоступность оператора, новые навыки
+# смены, новое число операторов на смену): переназначаются только затронутые
+# слоты (см. repair.py). Требования смен после изменения — в result.requirements.
+def repair_schedule(flat_schedule, change, requirements=None, unavailable=()):
+    return repair.repair(PROBLEM, flat_schedule, change, requirements or SHIFT_OPERATOR_REQUIREMENTS,
+                         max_shifts=MAX_SHIFTS_PER_OPERATOR, unavailable=unavailable)
+
+# Островная модель: num_islands подпопуляций в отдельных процессах с миграцией
+# лучших особей каждые migration_interval поколений (см. islands.py)
+def run_island_experiment(cxpb, mutpb, ngen=100, num_islands=4, migration_interval=10, migrants=5,
+                          topology="ring", seed=42):
+    return islands.run_islands(__name__, cxpb, mutpb, ngen, num_islands, 300,
+                               migration_interval, migrants, topology, seed)
+
+def main(parallel_eval=False, processes=None, cache_size=DEFAULT_CACHE_SIZE, termination=None,
+         array_genome=False, engine=None):
     random.seed(42)
-    best, avg_hist, max_hist = run_experiment(cxpb=1, mutpb=1)
+    exact = exact_scheduler()
+    print(f"Точное решение: {exact.value}, верхняя граница фитнеса: {exact.upper_bound}")
+    # ГА останавливается, как только достигает верхней границы фитнеса
+    termination = termination or TerminationPolicy(target_fitness=exact.upper_bound)
+    engine = engine or GenerationEngine()
+    best, avg_hist, max_hist = run_experiment(cxpb=1, mutpb=1, parallel_eval=parallel_eval, processes=processes,
+                                              cache_size=cache_size, termination=termination,
+                                              array_genome=array_genome, engine=engine)
+    print(termination.report())
+    if engine.cache_history:
+        print(f"Итого {format_cache_stats(total_stats(engine.cache_history))}")
     print("Лучший индивидуум:", reshape_schedule(best))
     visualize_schedule(best)
     plot_fitness_dynamics(avg_hist, max_hist)
@@ -1,7 +1,15 @@
 import random
-import matplotlib.pyplot as plt
-from deap import base, creator, tools, algorithms
+from deap import base, creator, tools
 from collections import defaultdict
+from contextlib import contextmanager
+
+import bitcrew
+from engine import GenerationEngine
+import parallel
+from fitness_cache import DEFAULT_CACHE_SIZE, cached_evaluation, format_cache_stats, total_stats
+from problem import ProblemInstance
+import rendering
+from termination import TerminationPolicy
 
 # Конфигурация
 NUM_OPERATORS = 10
@@ -40,16 +48,23 @@ SHIFT_TYPES = [
     [0, 3]
 ]
 
+# Таблицы навыков и предпочтений, скомпилированные в битовые маски (см. problem.py)
+PROBLEM = ProblemInstance(NUM_OPERATORS, NUM_SHIFTS, OPERATOR_SKILLS, PREFERENCES, SHIFT_TYPES)
+
 # Функции
 def prefers_shift(operator, shift):
-    return shift in PREFERENCES.get(operator, [])
+    return PROBLEM.prefers_shift(operator, shift)
 
 def can_perform_shift(operator, shift):
-    return all(skill in OPERATOR_SKILLS[operator] for skill in SHIFT_TYPES[shift])
+    return PROBLEM.can_perform_shift(operator, shift)
 
 # Генетическое кодирование: индивидуум — список списков операторов на каждую смену
 creator.create("FitnessMax", base.Fitness, weights=(1.0,))
 creator.create("Individual", list, fitness=creator.FitnessMax)
+# Битовое кодирование: ген смены — маска бригады (см. bitcrew.py)
+creator.create("CrewIndividual", list, fitness=creator.FitnessMax)
+INDIVIDUAL = creator.Individual
+CREW_INDIVIDUAL = creator.CrewIndividual
 
 toolbox = base.Toolbox()
 
@@ -58,7 +73,7 @@ def generate_individual():
     for shift in range(NUM_SHIFTS):
         ops = random.sample(range(NUM_OPERATORS), random.randint(1, 5))
         individual.append(ops)
-    return creator.Individual(individual)
+    return INDIVIDUAL(individual)
 
 toolbox.register("individual", generate_individual)
 toolbox.register("population", tools.initRepeat, list, toolbox.individual)
@@ -89,6 +104,18 @@ def evaluate(individual):
     return (fitness,)
 
 toolbox.register("evaluate", evaluate)
+
+CREW_MASKS = bitcrew.CrewMasks(PROBLEM)
+
+# evaluate для масок бригад: те же веса, подсчёты через popcount
+def evaluate_crews(individual):
+    fitness = 0
+    for crew_size, preferred, eligible in bitcrew.crew_counts(individual, CREW_MASKS):
+        fitness += 2 * preferred + eligible - 3 * (crew_size - eligible)
+        if crew_size > 6:
+            fitness -= crew_size - 6
+    fitness -= bitcrew.overload(individual, MAX_SHIFTS_PER_OPERATOR) * 5
+    return (fitness,)
 toolbox.register("mate", tools.cxTwoPoint)
 def mutate(individual):
     shift = random.randint(0, NUM_SHIFTS - 1)
@@ -103,8 +130,40 @@ def mutate(individual):
 toolbox.register("mutate", mutate)
 toolbox.register("select", tools.selTournament, tournsize=3)
 
+# Оценка списка особей; в параллельном режиме подменяется пулом (см. parallel.py)
+def evaluate_many(individuals):
+    if individuals and isinstance(individuals[0], CREW_INDIVIDUAL):
+        return list(map(evaluate_crews, individuals))
+    return list(map(evaluate, individuals))
+
+toolbox.register("evaluate_many", evaluate_many)
+
+# Переключает toolbox на маски бригад: кроссовер и мутация — битовые операции
+def use_bitset_genome():
+    toolbox.register("individual", bitcrew.init_crews, CREW_INDIVIDUAL, NUM_OPERATORS, NUM_SHIFTS)
+    toolbox.register("population", tools.initRepeat, list, toolbox.individual)
+    toolbox.register("evaluate", evaluate_crews)
+    toolbox.register("mate", bitcrew.cx_two_point_bits, num_operators=NUM_OPERATORS)
+    toolbox.register("mutate", bitcrew.mut_crew, num_operators=NUM_OPERATORS)
+
+# Маски бригад только на время запуска: на выходе операторы toolbox возвращаются
+# как есть, и следующий main() снова работает со списками операторов
+BITSET_OPERATORS = ("individual", "population", "evaluate", "mate", "mutate")
+
+@contextmanager
+def bitset_genome_scope(enabled):
+    saved = {name: getattr(toolbox, name) for name in BITSET_OPERATORS}
+    try:
+        if enabled:
+            use_bitset_genome()
+        yield
+    finally:
+        for name, function in saved.items():
+            setattr(toolbox, name, function)
+
 # Визуализация расписания
 def visualize_schedule_tabular(schedule):
+    plt = rendering.pyplot()
     fig, ax = plt.subplots()
     colors = plt.get_cmap("tab10")
 
@@ -125,10 +184,11 @@ def visualize_schedule_tabular(schedule):
     ax.set_title("Распределение операторов по сменам (таблично)")
     plt.grid(False)
     plt.tight_layout()
-    plt.show()
+    rendering.show("visualize_schedule_tabular")
 
 
 def plot_fitness_dynamics(avg_fitness, max_fitness):
+    plt = rendering.pyplot()
     plt.plot(avg_fitness, label="Средний фитнес")
     plt.plot(max_fitness, label="Максимальный фитнес")
     plt.xlabel("Поколение")
@@ -136,31 +196,36 @@ def plot_fitness_dynamics(avg_fitness, max_fitness):
     plt.title("Динамика обучения ГА")
     plt.legend()
     plt.grid(True)
-    plt.show()
+    rendering.show("plot_fitness_dynamics")
 
 # Основной запуск
-def main():
+def main(parallel_eval=False, processes=None, cache_size=DEFAULT_CACHE_SIZE, termination=None,
+         checkpointer=None, resume_from=None, engine=None, bitset_genome=False):
     random.seed(142)
-    population = toolbox.population(n=200)
     NGEN = 100
     CXPB, MUTPB = 0.7, 0.3
     avg_fitness_history = []
     max_fitness_history = []
-
-    for gen in range(NGEN):
-        offspring = algorithms.varAnd(population, toolbox, cxpb=CXPB, mutpb=MUTPB)
-        for ind in offspring:
-            ind.fitness.values = toolbox.evaluate(ind)
-        population = toolbox.select(offspring, k=len(population))
-
-        fitnesses = [ind.fitness.values[0] for ind in population]
-        avg_fitness_history.append(sum(fitnesses) / len(fitnesses))
-        max_fitness_history.append(max(fitnesses))
-
+    termination = termination or TerminationPolicy()
+    termination.start()
+    engine = engine or GenerationEngine()
+
+    with bitset_genome_scope(bitset_genome), \
+            parallel.parallel_evaluation(toolbox, __name__, parallel_eval, processes), \
+            cached_evaluation(toolbox, cache_size) as cache:
+        population = toolbox.population(n=200)
+        population = engine.run(population, toolbox, CXPB, MUTPB, NGEN, termination=termination,
+                                checkpointer=checkpointer, resume_from=resume_from, cache=cache,
+                                avg_history=avg_fitness_history, max_history=max_fitness_history)
+
+    print(termination.report())
+    if engine.cache_history:
+        print(f"Итого {format_cache_stats(total_stats(engine.cache_history))}")
     best = tools.selBest(population, 1)[0]
-    print("Лучшее расписание:", best)
+    schedule = bitcrew.to_crews(best) if bitset_genome else best
+    print("Лучшее расписание:", schedule)
     print("Фитнес:", best.fitness.values[0])
-    visualize_schedule_tabular(best)
+    visualize_schedule_tabular(schedule)
     plot_fitness_dynamics(avg_fitness_history, max_fitness_history)
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+import math
+
+import numpy as np
+
+# Расчёт штата по прогнозу звонков (Erlang C) и свёртка в требования смен
+# SHIFT_OPERATOR_REQUIREMENTS. Вход — массивы прогнозов интервалы x очереди:
+# число звонков за интервал и среднее время обработки (AHT, секунды).
+# Для каждой ячейки ищется наименьшее число операторов N > A (A — нагрузка
+# в эрлангах), при котором уровень сервиса
+#   SL = 1 - C(N, A) * exp(-(N - A) * T / AHT)
+# не ниже цели (доля звонков, принятых за T секунд), а занятость A / N не выше
+# max_occupancy. C считается через устойчивую рекуррентность Эрланга B
+#   B(0) = 1,  B(n) = A B(n-1) / (n + A B(n-1)),  C(n) = n B / (n - A (1 - B)),
+# без факториалов и степеней. Рекуррентность идёт сразу по всем ячейкам
+# (векторно по n), а одинаковые пары (A, AHT) считаются один раз: прогнозы
+# повторяются по дням и очередям. Ячейки упорядочены по нагрузке, поэтому
+# нижняя граница штата тоже упорядочена: уровень сервиса на шаге n проверяется
+# только для среза ячеек, которым уже хватает n операторов, а начало среза
+# сдвигается по мере того, как штат для ячеек найден.
+
+INTERVAL_SECONDS = 900
+DEFAULT_SERVICE_LEVEL = 0.8
+DEFAULT_ANSWER_SECONDS = 20
+DEFAULT_MAX_OCCUPANCY = 1.0
+
+
+# Нагрузка в эрлангах
+def offered_load(calls, handle_time, interval=INTERVAL_SECONDS):
+    return np.asarray(calls, dtype=np.float64) * np.asarray(handle_time, dtype=np.float64) / interval
+
+
+# Вероятность ожидания C(N, A) для N > A (при N <= A очередь бесконечна — 1)
+def erlang_c(agents, load):
+    agents, load = np.broadcast_arrays(np.asarray(agents, dtype=np.int64), np.asarray(load, dtype=np.float64))
+    blocking = np.ones(agents.shape)
+    for n in range(1, int(agents.max(initial=0)) + 1):
+        active = agents >= n
+        step = load[active] * blocking[active]
+        blocking[active] = step / (n + step)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = agents * blocking / (agents - load * (1 - blocking))
+    return np.where(agents > load, result, 1.0)
+
+
+def service_level(agents, load, handle_time, answer_time=DEFAULT_ANSWER_SECONDS):
+    agents = np.asarray(agents, dtype=np.int64)
+    load = np.asarray(load, dtype=np.float64)
+    waiting = erlang_c(agents, load)
+    return np.where(agents > load,
+                    1 - waiting * np.exp(-(agents - load) * answer_time / np.asarray(handle_time, dtype=np.float64)),
+                    0.0)
+
+
+# Наименьшее число операторов на ячейку (форма calls после broadcasting с handle_time).
+# shrinkage — доля оплаченного времени вне линии (перерывы, обучение)
+def required_agents(calls, handle_time, target=DEFAULT_SERVICE_LEVEL, answer_time=DEFAULT_ANSWER_SECONDS,
+                    interval=INTERVAL_SECONDS, max_occupancy=DEFAULT_MAX_OCCUPANCY, shrinkage=0.0):
+    if not 0 < target < 1:
+        raise ValueError(f"Цель уровня сервиса должна быть в (0, 1), задано {target}")
+    if not 0 < max_occupancy <= 1 or not 0 <= shrinkage < 1:
+        raise ValueError("max_occupancy должна быть в (0, 1], shrinkage — в [0, 1)")
+    calls, handle_time = np.broadcast_arrays(np.asarray(calls, dtype=np.float64),
+                                             np.asarray(handle_time, dtype=np.float64))
+    if not math.isfinite(answer_time):
+        raise ValueError(f"Время ответа должно быть конечным, задано {answer_time}")
+    load = offered_load(calls, handle_time, interval)
+    # NaN и inf не проходят проверку уровня сервиса ни при каком N — цикл не закончился бы
+    if not np.isfinite(load).all():
+        raise ValueError("Число звонков и время обработки должны быть конечными")
+    if (load < 0).any():
+        raise ValueError("Число звонков и время обработки не могут быть отрицательными")
+
+    # Ячейки по возрастанию нагрузки; соседние одинаковые пары (A, AHT) склеиваются
+    order = np.argsort(load, axis=None)
+    sorted_load, sorted_time = load.reshape(-1)[order], handle_time.reshape(-1)[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (sorted_load[1:] != sorted_load[:-1]) | (sorted_time[1:] != sorted_time[:-1])
+    cell_load, cell_time = sorted_load[first], sorted_time[first]
+    num_cells = len(cell_load)
+    agents = np.zeros(num_cells, dtype=np.int64)
+    # Нижняя граница: N > A и A / N <= max_occupancy
+    lower = np.maximum(np.floor(cell_load) + 1, np.ceil(cell_load / max_occupancy - 1e-9))
+    blocking = np.ones(num_cells)
+    # Ячейки без нагрузки операторов не требуют
+    start = int(np.searchsorted(cell_load, 0, side="right"))
+    n = 0
+    while start < num_cells:
+        n += 1
+        step = cell_load[start:] * blocking[start:]
+        blocking[start:] = step / (n + step)
+        stop = int(np.searchsorted(lower, n, side="right"))
+        if stop <= start:
+            continue
+        a, b = cell_load[start:stop], blocking[start:stop]
+        waiting = n * b / (n - a * (1 - b))
+        level = 1 - waiting * np.exp(-(n - a) * answer_time / cell_time[start:stop])
+        found = agents[start:stop]
+        found[(level >= target) & (found == 0)] = n
+        settled = found > 0
+        start += len(settled) if settled.all() else int(settled.argmin())
+
+    if shrinkage:
+        agents = np.ceil(agents / (1 - shrinkage) - 1e-9).astype(np.int64)
+    result = np.empty(len(order), dtype=np.int64)
+    result[order] = agents[np.cumsum(first) - 1]
+    return result.reshape(load.shape)
+
+
+# Свёртка интервалов в смены: штат интервала — сумма по очередям (без учёта
+# взаимозаменяемости операторов между очередями), требование смены — пик по
+# её интервалам. Интервалы идут подряд, смена занимает intervals_per_shift из них.
+def shift_requirements(agents, intervals_per_shift):
+    agents = np.asarray(agents)
+    per_interval = agents.sum(axis=1) if agents.ndim == 2 else agents
+    if len(per_interval) % intervals_per_shift:
+        raise ValueError(f"Число интервалов ({len(per_interval)}) не делится на длину смены ({intervals_per_shift})")
+    return per_interval.reshape(-1, intervals_per_shift).max(axis=1).astype(int).tolist()
+
+
+# Прогноз -> требования смен в формате SHIFT_OPERATOR_REQUIREMENTS
+def requirements_from_forecast(calls, handle_time, intervals_per_shift, **kwargs):
+    return shift_requirements(required_agents(calls, handle_time, **kwargs), intervals_per_shift)
+
+
+# Число интервалов в смене заданной длины
+def shift_intervals(shift_hours, interval=INTERVAL_SECONDS):
+    count = shift_hours * 3600 / interval
+    if count != math.floor(count):
+        raise ValueError(f"Смена {shift_hours} ч не делится на интервалы по {interval} с")
+    return int(count)
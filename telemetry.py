@@ -0,0 +1,162 @@
+import csv
+import io
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from deap import tools
+
+from fitness_cache import format_cache_stats, genome_key, total_stats
+
+# Телеметрия поколений вместо печати лучшей особи на каждом шаге. Запись
+# поколения: лучший, средний фитнес и его разброс, число оценок, разнообразие
+# популяции (доля уникальных геномов), время по фазам и статистика кэша.
+# Записи буферизуются и пишутся в JSONL или CSV; вывод на консоль зависит от verbosity:
+#   0 — ничего, 1 — одна итоговая сводка при close (по умолчанию),
+#   2 — краткая сводка каждые interval поколений, 3 — сводка и лучшая особь.
+# interval задаёт шаг выборки поколений. При продолжении с контрольной точки
+# (resume) файл дописывается, а записи поколений после точки отбрасываются.
+
+PHASES = ("variation", "evaluation", "selection", "stats")
+CSV_FIELDS = ("gen", "best", "mean", "std", "evaluations", "diversity",
+              *(f"time_{phase}" for phase in PHASES), "time_total",
+              "cache_hits", "cache_misses", "cache_evictions")
+
+
+def fitness_summary(population):
+    values = np.array([ind.fitness.values for ind in population], dtype=float)
+    best = tools.selBest(population, 1)[0]
+    mean, std = values.mean(axis=0), values.std(axis=0)
+    # Для однокритериального фитнеса — числа, для многокритериального — списки
+    if values.shape[1] == 1:
+        return best, best.fitness.values[0], float(mean[0]), float(std[0])
+    return best, list(best.fitness.values), mean.tolist(), std.tolist()
+
+
+def rounded(value, digits=2):
+    if isinstance(value, list):
+        return [round(item, digits) for item in value]
+    return round(value, digits)
+
+
+def diversity(population):
+    return len({genome_key(ind) for ind in population}) / len(population)
+
+
+class TelemetrySink:
+    def __init__(self, path=None, fmt="jsonl", interval=1, verbosity=1, buffer_size=100):
+        if fmt not in ("jsonl", "csv"):
+            raise ValueError(f"Неподдерживаемый формат телеметрии: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.interval = interval
+        self.verbosity = verbosity
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.phase_times = dict.fromkeys(PHASES, 0.0)
+        self.generation_start = time.perf_counter()
+        self.header_written = False
+        self.last_gen = None
+        self.last_population = None
+        self.evaluations = 0
+        self.cache_history = []
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + time.perf_counter() - start
+
+    @property
+    def enabled(self):
+        return self.path is not None or self.verbosity >= 2
+
+    # Продолжение запуска с поколения next_gen: записи поколений после
+    # контрольной точки отбрасываются, новые дописываются в тот же файл
+    def resume(self, next_gen):
+        if self.path is None or not os.path.exists(self.path):
+            return
+        with open(self.path, newline="") as f:
+            if self.fmt == "jsonl":
+                records = [json.loads(line) for line in f if line.strip()]
+            else:
+                records = list(csv.DictReader(f))
+        self.buffer = [record for record in records if int(record["gen"]) < next_gen]
+        self.header_written = False
+        if self.buffer:
+            self.flush()
+        else:
+            open(self.path, "w").close()
+
+    # Вызывается в конце каждого поколения; cache_stats — итог поколения кэша
+    # (FitnessCache.end_generation). Время фаз сбрасывается всегда, даже если
+    # поколение не попадает в выборку.
+    def record(self, gen, population, evaluations, cache_stats=None):
+        self.last_gen, self.last_population = gen, population
+        self.evaluations += evaluations
+        if cache_stats:
+            self.cache_history.append(cache_stats)
+        phase_times, self.phase_times = self.phase_times, dict.fromkeys(PHASES, 0.0)
+        now = time.perf_counter()
+        total, self.generation_start = now - self.generation_start, now
+        if not self.enabled or gen % self.interval:
+            return None
+
+        best_ind, best, mean, std = fitness_summary(population)
+        record = {
+            "gen": gen,
+            "best": best,
+            "mean": mean,
+            "std": std,
+            "evaluations": evaluations,
+            "diversity": diversity(population),
+            **{f"time_{phase}": elapsed for phase, elapsed in phase_times.items()},
+            "time_total": total,
+        }
+        if cache_stats:
+            record.update(cache_hits=cache_stats["hits"], cache_misses=cache_stats["misses"],
+                          cache_evictions=cache_stats["evictions"])
+
+        if self.verbosity >= 2:
+            print(f"Поколение {gen}: лучший {best}, средний {rounded(mean)}, разнообразие {record['diversity']:.2f}")
+        if self.verbosity >= 2 and cache_stats:
+            print(f"Поколение {gen}: {format_cache_stats(cache_stats)}")
+        if self.verbosity >= 3:
+            print(f"Поколение {gen}: Лучший результат: {best_ind}")
+
+        if self.path is not None:
+            self.buffer.append(record)
+            if len(self.buffer) >= self.buffer_size:
+                self.flush()
+        return record
+
+    def flush(self):
+        if self.path is None or not self.buffer:
+            return
+        if self.fmt == "jsonl":
+            text = "".join(json.dumps(record) + "\n" for record in self.buffer)
+        else:
+            out = io.StringIO()
+            writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+            if not self.header_written:
+                writer.writeheader()
+            writer.writerows(self.buffer)
+            text = out.getvalue()
+        # Первый сброс перезаписывает файл, последующие дописывают
+        with open(self.path, "a" if self.header_written else "w", newline="") as f:
+            f.write(text)
+        self.header_written = True
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        if self.verbosity == 1 and self.last_population:
+            _, best, mean, _ = fitness_summary(self.last_population)
+            print(f"Поколений: {self.last_gen + 1}, лучший {best}, средний {rounded(mean)}, "
+                  f"разнообразие {diversity(self.last_population):.2f}, оценок {self.evaluations}")
+            if self.cache_history:
+                print(f"Итого {format_cache_stats(total_stats(self.cache_history))}")
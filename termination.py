@@ -0,0 +1,117 @@
+import time
+
+import numpy as np
+from deap import tools
+
+# Общая политика останова для циклов поколений. Критерии (любой можно не задавать):
+#   best_window      — лучший фитнес не улучшался best_window поколений
+#   mean_window      — средний фитнес популяции не улучшался mean_window поколений
+#   min_delta        — минимальное улучшение первого критерия, которое считается прогрессом
+#   time_budget      — бюджет времени в секундах с начала цикла
+#   max_evaluations  — максимальное число оценок особей
+#   target_fitness   — целевой фитнес (число или кортеж, сравнение как у фитнеса DEAP)
+# Если ни один критерий не сработал, цикл доходит до своего числа поколений.
+
+REASONS = {
+    "generations": "достигнуто заданное число поколений",
+    "target": "достигнут целевой фитнес",
+    "best_stagnation": "лучший фитнес не улучшается",
+    "mean_stagnation": "средний фитнес не улучшается",
+    "time_budget": "исчерпан бюджет времени",
+    "max_evaluations": "исчерпан лимит оценок",
+}
+
+
+# Фитнесы сравниваются по взвешенным значениям (wvalues), поэтому больше — всегда лучше
+def improved(new, old, min_delta):
+    if old is None:
+        return True
+    if min_delta:
+        return new[0] > old[0] + min_delta
+    return new > old
+
+
+class TerminationPolicy:
+    def __init__(self, best_window=None, mean_window=None, min_delta=0.0, time_budget=None,
+                 max_evaluations=None, target_fitness=None):
+        self.best_window = best_window
+        self.mean_window = mean_window
+        self.min_delta = min_delta
+        self.time_budget = time_budget
+        self.max_evaluations = max_evaluations
+        self.target_fitness = target_fitness
+        self.start()
+
+    # Сбрасывает состояние; вызывается перед циклом поколений
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.evaluations = 0
+        self.generation = None
+        self.elapsed = 0.0
+        self.reason = "generations"
+        self.best = None
+        self.best_generation = 0
+        self.mean = None
+        self.mean_generation = 0
+
+    def target_reached(self, best):
+        if self.target_fitness is None:
+            return False
+        target = self.target_fitness
+        if not isinstance(target, (tuple, list)):
+            target = (target,)
+        weighted = tuple(value * weight for value, weight in zip(target, best.fitness.weights))
+        return best.fitness.wvalues[:len(weighted)] >= weighted
+
+    # Вызывается в конце каждого поколения; True — цикл нужно остановить
+    def should_stop(self, gen, population, evaluations):
+        self.generation = gen
+        self.evaluations += evaluations
+        self.elapsed = time.perf_counter() - self.start_time
+        best = tools.selBest(population, 1)[0]
+        mean = (float(np.mean([ind.fitness.wvalues[0] for ind in population])),)
+
+        if improved(best.fitness.wvalues, self.best, self.min_delta):
+            self.best, self.best_generation = best.fitness.wvalues, gen
+        if improved(mean, self.mean, self.min_delta):
+            self.mean, self.mean_generation = mean, gen
+
+        if self.target_reached(best):
+            self.reason = "target"
+        elif self.best_window is not None and gen - self.best_generation >= self.best_window:
+            self.reason = "best_stagnation"
+        elif self.mean_window is not None and gen - self.mean_generation >= self.mean_window:
+            self.reason = "mean_stagnation"
+        elif self.time_budget is not None and self.elapsed >= self.time_budget:
+            self.reason = "time_budget"
+        elif self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            self.reason = "max_evaluations"
+        else:
+            return False
+        return True
+
+    # Состояние для контрольной точки (см. checkpoint.py)
+    def state(self):
+        return {"evaluations": int(self.evaluations), "elapsed": self.elapsed,
+                "best": [float(value) for value in self.best] if self.best is not None else None,
+                "best_generation": self.best_generation,
+                "mean": [float(value) for value in self.mean] if self.mean is not None else None,
+                "mean_generation": self.mean_generation}
+
+    # Продолжение после контрольной точки: бюджет времени отсчитывается
+    # с учётом уже прошедшего времени
+    def restore(self, state):
+        self.evaluations = state["evaluations"]
+        self.elapsed = state["elapsed"]
+        self.start_time = time.perf_counter() - self.elapsed
+        self.best = tuple(state["best"]) if state["best"] is not None else None
+        self.best_generation = state["best_generation"]
+        self.mean = tuple(state["mean"]) if state["mean"] is not None else None
+        self.mean_generation = state["mean_generation"]
+
+    def stopped_early(self):
+        return self.reason != "generations"
+
+    def report(self):
+        return (f"Остановка на поколении {self.generation}: {REASONS[self.reason]} "
+                f"(оценок: {self.evaluations}, время: {self.elapsed:.2f} с)")
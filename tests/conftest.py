@@ -0,0 +1,11 @@
+import pytest
+
+import rendering
+
+
+# Графики сохраняются во временный каталог вместо окна plt.show()
+@pytest.fixture
+def headless(tmp_path):
+    rendering.configure(output_dir=str(tmp_path))
+    yield tmp_path
+    rendering.configure()
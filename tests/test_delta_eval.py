@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+import best_fitness
+import bless
+from delta_eval import DeltaEvaluator
+from termination import TerminationPolicy
+
+
+# Кроссовер пишет срезами: журнал получает только изменённые позиции,
+# а инкрементальная оценка совпадает с полной
+def test_slice_write_is_journaled():
+    random.seed(1)
+    evaluator = DeltaEvaluator(bless.PROBLEM, bless.SHIFTS_PER_DAY, bless.MAX_SHIFTS_PER_OPERATOR,
+                               bless.DELTA_EVALUATOR.score)
+    first, second = bless.toolbox.population(n=2)
+    evaluator.evaluate_many([first, second])
+    common = [shift for shift in range(3, 9) if first[shift] == second[shift]]
+    first[3:9], second[3:9] = second[3:9], first[3:9]
+    assert first.delta_state is not None
+    assert sorted(first.delta_state.changes) == [shift for shift in range(3, 9) if shift not in common]
+    assert [evaluator(first), evaluator(second)] == [bless.evaluate(first), bless.evaluate(second)]
+    assert evaluator.delta_evaluations == 2
+
+
+@pytest.mark.parametrize("module", [bless, best_fitness])
+def test_main_loop_uses_delta(headless, monkeypatch, module):
+    best = []
+    monkeypatch.setattr(module, "visualize_schedule", best.append)
+    before = module.DELTA_EVALUATOR.delta_evaluations
+    module.main(cache_size=0, delta_eval=True, termination=TerminationPolicy(max_evaluations=3000))
+    assert module.DELTA_EVALUATOR.delta_evaluations > before
+    assert best[0].fitness.values == module.evaluate(best[0])
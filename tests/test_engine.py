@@ -0,0 +1,71 @@
+import pytest
+
+import alltogether
+import best_fitness
+import checkpoint
+import pareto
+import sevenshifts
+from checkpoint import Checkpointer
+from engine import GenerationEngine
+from termination import TerminationPolicy
+
+
+# Контрольная точка с элитами, продолжение без элитизма
+def test_resume_without_elitism(tmp_path):
+    path = str(tmp_path / "run.npz")
+    checkpointer = Checkpointer(path, interval=2)
+    sevenshifts.run_experiment(1, 1, ngen=4, seed=1, checkpointer=checkpointer)
+    checkpointer.close()
+    engine = GenerationEngine(elitism=0)
+    best, _, _ = sevenshifts.run_experiment(1, 1, ngen=6, resume_from=path, engine=engine)
+    assert best.fitness.valid
+    assert engine.elites() == []
+
+
+# Любая ошибка фоновой записи доходит до цикла, а close не зависает
+def test_checkpoint_write_error_raised(tmp_path, monkeypatch):
+    def broken(path, snapshot):
+        raise TypeError("снимок не сериализуется")
+
+    monkeypatch.setattr(checkpoint, "write_checkpoint", broken)
+    checkpointer = Checkpointer(str(tmp_path / "run.npz"), interval=1)
+    with pytest.raises(TypeError):
+        sevenshifts.run_experiment(1, 1, ngen=4, seed=1, checkpointer=checkpointer)
+    with pytest.raises(TypeError):
+        checkpointer.close()
+    with pytest.raises(ValueError):
+        checkpointer.save(0, [])
+
+
+# Кэш по запросу: статистика поколений доходит до движка
+def test_run_experiment_reports_cache():
+    engine = GenerationEngine()
+    alltogether.run_experiment(1, 1, ngen=3, seed=1, cache_size=1000, engine=engine)
+    assert len(engine.cache_history) == 3
+    alltogether.run_experiment(1, 1, ngen=3, seed=1, engine=engine)
+    assert engine.cache_history == []
+
+
+# Повторный запуск тем же движком начинает профиль заново
+def test_profiler_reset_between_runs():
+    engine = GenerationEngine()
+    sevenshifts.run_experiment(1, 1, ngen=3, seed=1, engine=engine)
+    sevenshifts.run_experiment(1, 1, ngen=2, seed=1, engine=engine)
+    assert engine.profiler.counters["generations"] == 2
+    assert engine.profiler.calls["evaluation"] == 2
+
+
+# Режим Парето: родители varAnd — из турнира по рангу и скученности
+def test_pareto_parents_from_tournament(headless, monkeypatch):
+    sizes = []
+    select_parents = best_fitness.toolbox.select_parents
+    monkeypatch.setattr(best_fitness.toolbox, "select_parents",
+                        lambda individuals, k: sizes.append(k) or select_parents(individuals, k))
+    best_fitness.main(pareto_mode=True, termination=TerminationPolicy(max_evaluations=1500))
+    assert sizes and set(sizes) == {300}
+
+    population = best_fitness.toolbox.population(n=7)
+    for ind in population:
+        ind.fitness.values = best_fitness.evaluate(ind)
+    parents = pareto.sel_parents(population, 10)
+    assert len(parents) == 10 and all(hasattr(ind.fitness, "crowding_dist") for ind in population)
@@ -0,0 +1,87 @@
+import itertools
+
+import pytest
+
+import flow
+import repair
+from problem import ProblemInstance
+
+SHIFTS_PER_DAY = 3
+NUM_SHIFTS = 6
+
+
+# Два оператора на дни по три смены: без повторов в дне расписания нет
+def short_staffed(num_operators=2):
+    return ProblemInstance(num_operators, NUM_SHIFTS, {op: [0] for op in range(num_operators)},
+                           {0: [0, 1, 3], 1: [2, 5]}, {shift: [0] for shift in range(NUM_SHIFTS)})
+
+
+# Фитнес atg3.py: один оператор на смену, штраф 1 за день с повтором
+def day_fitness(problem, genome, max_shifts):
+    fitness = -sum(len(set(genome[day:day + SHIFTS_PER_DAY])) < SHIFTS_PER_DAY
+                   for day in range(0, NUM_SHIFTS, SHIFTS_PER_DAY))
+    for shift, operator in enumerate(genome):
+        fitness += problem.prefers_shift(operator, shift)
+        fitness -= 5 * (not problem.can_perform_shift(operator, shift))
+    for operator in range(problem.num_operators):
+        fitness -= 5 * max(0, genome.count(operator) - max_shifts)
+    return fitness
+
+
+def test_fewer_operators_than_shifts_per_day():
+    problem = short_staffed()
+    solution = flow.solve_assignment(problem, max_shifts=3, shifts_per_day=SHIFTS_PER_DAY, day_penalty=1)
+    genome = solution.genome()
+    best = max(day_fitness(problem, list(candidate), 3)
+               for candidate in itertools.product(range(problem.num_operators), repeat=NUM_SHIFTS))
+    assert len(genome) == NUM_SHIFTS
+    assert solution.value == day_fitness(problem, genome, 3) == best
+    assert solution.value <= solution.upper_bound
+
+
+def test_requirement_above_operators_is_penalized():
+    problem = short_staffed()
+    requirements = [3, 1, 1, 1, 1, 1]
+    solution = flow.solve_assignment(problem, requirements, max_shifts=5)
+    assert [len(operators) for operators in solution.schedule] == requirements
+    assert sorted(set(solution.schedule[0])) == [0, 1]
+    assert solution.value <= solution.upper_bound
+
+
+def test_hard_repeats_still_rejected():
+    with pytest.raises(ValueError):
+        flow.solve_assignment(short_staffed(), max_shifts=3, shifts_per_day=SHIFTS_PER_DAY)
+
+
+def test_repair_with_one_operator_left():
+    problem = short_staffed()
+    genome = flow.solve_assignment(problem, max_shifts=3, shifts_per_day=SHIFTS_PER_DAY,
+                                   day_penalty=1).genome()
+    change = repair.OperatorUnavailable(1, 0, NUM_SHIFTS - 1)
+    result = repair.repair(problem, genome, change, max_shifts=NUM_SHIFTS, shifts_per_day=SHIFTS_PER_DAY)
+    assert result.genome == [0] * NUM_SHIFTS
+
+
+# Изменение требования сохраняет уже назначенных операторов смены
+def test_requirement_change_keeps_assignees():
+    problem = short_staffed()
+    genome = flow.solve_assignment(problem, max_shifts=3, shifts_per_day=SHIFTS_PER_DAY,
+                                   day_penalty=1).genome()
+    grown = repair.repair(problem, genome, repair.RequirementChanged(0, 2), max_shifts=NUM_SHIFTS)
+    assert grown.genome[0] == genome[0] and grown.changed_genes == [1]
+    assert grown.genome[2:] == genome[1:]
+
+    shrunk = repair.repair(problem, grown.genome, repair.RequirementChanged(0, 1), grown.requirements,
+                           max_shifts=NUM_SHIFTS)
+    assert shrunk.genome == [grown.genome[0]] + grown.genome[2:] and shrunk.changed_genes == []
+
+
+@pytest.mark.parametrize("change", [repair.OperatorUnavailable(0, 2, NUM_SHIFTS),
+                                    repair.OperatorUnavailable(0, 3, 2),
+                                    repair.OperatorUnavailable(2, 0, 1),
+                                    repair.RequirementChanged(NUM_SHIFTS, 1),
+                                    repair.RequirementChanged(0, -1),
+                                    repair.ShiftSkillsChanged(-1, [0])])
+def test_change_out_of_range(change):
+    with pytest.raises(ValueError):
+        repair.repair(short_staffed(), [0, 1] * (NUM_SHIFTS // 2), change)
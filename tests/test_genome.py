@@ -0,0 +1,33 @@
+import array
+
+import pytest
+
+import bless
+import genome
+import sevenshifts
+from termination import TerminationPolicy
+
+
+def short_run():
+    return TerminationPolicy(max_evaluations=1000)
+
+
+def test_array_genome_is_scoped_to_run():
+    best, _, _ = sevenshifts.run_experiment(1, 1, ngen=3, seed=1, array_genome=True)
+    assert isinstance(best, array.array)
+    assert not genome.registered_array_genome(sevenshifts.toolbox)
+    best, _, _ = sevenshifts.run_experiment(1, 1, ngen=3, seed=1)
+    assert not isinstance(best, array.array)
+
+
+def test_list_run_after_array_run(headless):
+    bless.main(array_genome=True, termination=short_run())
+    bless.main(delta_eval=True, termination=short_run())
+    assert not genome.registered_array_genome(bless.toolbox)
+
+
+def test_delta_eval_checks_registered_genome(headless):
+    with genome.array_genome_scope(bless.toolbox, True, bless.use_array_genome):
+        with pytest.raises(ValueError):
+            bless.main(delta_eval=True, termination=short_run())
+        assert genome.registered_array_genome(bless.toolbox)
@@ -0,0 +1,62 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import best_fitness
+import bless
+import instances
+import population_eval
+import roster
+import sevenshifts
+from problem import ProblemInstance
+
+
+# Импорт другого скрипта перенастраивает creator.Individual; подстановка
+# экземпляра в best_fitness должна строить особей его собственного класса
+def test_apply_tables_keeps_script_individual():
+    assert sevenshifts.INDIVIDUAL is not best_fitness.INDIVIDUAL
+    data = roster.module_roster(best_fitness)
+    tables = roster.to_tables(roster.build_instance(*roster.parse_json_roster(data)))
+    roster.apply_tables(best_fitness, *tables[:3])
+    individual = best_fitness.toolbox.individual()
+    assert isinstance(individual, best_fitness.INDIVIDUAL)
+    individual.fitness.values = best_fitness.evaluate(individual)
+    assert len(individual.fitness.values) == 4
+
+
+# Снимок глобальных таблиц и toolbox скрипта на время теста
+@pytest.fixture
+def restore_module():
+    saved, registered = dict(vars(bless)), dict(vars(bless.toolbox))
+    yield bless
+    vars(bless).update(saved)
+    vars(bless.toolbox).update(registered)
+
+
+def test_problem_from_bits_matches_tables():
+    instance = instances.generate_instance(40, 12, weeks=2, seed=3)
+    operator_skills, preferences, shift_types = instances.to_tables(instance)
+    expected = ProblemInstance(instance.num_operators, instance.num_shifts, operator_skills, preferences, shift_types)
+    eligibility = roster.instance_eligibility(instance)
+    problem = ProblemInstance.from_bits(instance.num_operators, instance.num_shifts, instance.operator_skills,
+                                        instance.shift_skills, instance.preferences, eligibility)
+    assert vars(problem) == vars(expected)
+    lookup = population_eval.lookup_tables_from_bits(instance.preferences, eligibility, instance.num_shifts)
+    for actual, table in zip(lookup, population_eval.build_lookup_tables(expected)):
+        assert np.array_equal(actual, table)
+
+
+def test_use_roster(tmp_path, restore_module):
+    path = tmp_path / "roster.json"
+    path.write_text(json.dumps(roster.module_roster(bless)))
+    preferred, eligible = bless.PROBLEM.preferred_shifts, bless.PROBLEM.eligible_shifts
+    for _ in range(2):
+        roster.use_roster(bless, str(path))
+        assert os.path.exists(str(path) + roster.CACHE_SUFFIX)
+        assert bless.PROBLEM.eligible_shifts == eligible
+        full = (1 << bless.NUM_SHIFTS) - 1
+        assert bless.PROBLEM.preferred_shifts == [mask & full for mask in preferred]
+    individual = bless.toolbox.individual()
+    assert bless.evaluate_many([individual]) == [bless.evaluate(individual)]
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import roster
+import service
+
+
+async def exercise(path):
+    loop = asyncio.get_running_loop()
+    errors = []
+    loop.set_exception_handler(lambda loop, context: errors.append(context))
+    ready = loop.create_future()
+    server = asyncio.create_task(service.serve(path, workers=1, ready=ready))
+    await ready
+
+    client = await service.ServiceClient(path).connect()
+    submit = {"op": "submit", "model": "sevenshifts", "watch": True,
+              "params": {"ngen": 4, "seed": 1, "progress_interval": 1}}
+    events = [event async for event in client.stream(submit)]
+    assert events[0]["state"] == "queued"
+    assert [event["generation"] for event in events if event.get("event") == "progress"] == [0, 1, 2, 3]
+    result = events[-1]["result"]
+    assert events[-1]["event"] == "done"
+    assert len(result["instance"]["shifts"]) == len(result["shifts"])
+
+    status = await client.call({"op": "status", "job": events[0]["job"]})
+    assert status["state"] == "done" and status["result"] == result
+
+    # Случайный экземпляр atg3 возвращается с результатом и воспроизводит его
+    greedy = {"op": "submit", "model": "atg3", "solver": "greedy", "params": {"seed": 1}, "watch": True}
+    first = [event async for event in client.stream(greedy)][-1]["result"]
+    again = [event async for event in client.stream(dict(greedy, instance=first["instance"]))][-1]["result"]
+    assert (again["schedule"], again["fitness"]) == (first["schedule"], first["fitness"])
+
+    # Встроенные экземпляры bless и best_fitness (с предпочтениями вне диапазона смен) тоже
+    for model in ("bless", "best_fitness"):
+        ga = {"op": "submit", "model": model, "params": {"seed": 1, "ngen": 3, "population": 20}, "watch": True}
+        first = [event async for event in client.stream(ga)][-1]
+        again = [event async for event in client.stream(dict(ga, instance=first["result"]["instance"]))][-1]
+        assert first["event"] == again["event"] == "done", again
+        assert (again["result"]["schedule"], again["result"]["fitness"]) == \
+            (first["result"]["schedule"], first["result"]["fitness"])
+
+    # Выгрузка-файл: компилируется один раз и открывается исполнителями через memory map
+    roster_path = os.path.join(os.path.dirname(path), "roster.json")
+    with open(roster_path, "w") as f:
+        json.dump(first["result"]["instance"], f)
+    for _ in range(2):
+        job = {"op": "submit", "model": "best_fitness", "roster": roster_path, "watch": True,
+               "params": {"seed": 1, "ngen": 3, "population": 20}}
+        event = [event async for event in client.stream(job)][-1]
+        assert event["result"]["fitness"] == first["result"]["fitness"]
+    assert os.path.exists(roster_path + roster.CACHE_SUFFIX)
+
+    # Долгая задача: отмена после первого прогресса завершает процесс
+    long_job = await client.call({"op": "submit", "model": "sevenshifts", "params": {"ngen": 100000}})
+    watcher = await service.ServiceClient(path).connect()
+    async for event in watcher.stream({"op": "watch", "job": long_job["job"]}):
+        if event["event"] == "progress":
+            break
+    cancelled = await client.call({"op": "cancel", "job": long_job["job"]})
+    assert cancelled["state"] == "running"
+    while (await client.call({"op": "status", "job": long_job["job"]}))["state"] == "running":
+        await asyncio.sleep(0.05)
+    assert (await client.call({"op": "status", "job": long_job["job"]}))["state"] == "cancelled"
+
+    # Наблюдатель остаётся подключённым: обработчик его соединения отменяется
+    # при остановке цикла событий
+    queued = await client.call({"op": "submit", "model": "sevenshifts", "params": {"ngen": 100000}})
+    asyncio.create_task(watcher.call({"op": "watch", "job": queued["job"]}))
+    await asyncio.sleep(0.1)
+    await client.close()
+    server.cancel()
+    await asyncio.gather(server, return_exceptions=True)
+    return errors
+
+
+def test_submit_progress_cancel_status(tmp_path):
+    errors = asyncio.run(exercise(str(tmp_path / "service.sock")))
+    assert errors == []
+
+
+def test_finished_jobs_pruned():
+    async def run():
+        scheduler = service.SchedulingService(max_finished=2)
+        for _ in range(4):
+            scheduler.cancel(scheduler.submit({"model": "sevenshifts"}).id)
+        last = scheduler.submit({"model": "sevenshifts"})
+        assert sorted(scheduler.jobs) == [3, 4, last.id]
+
+    asyncio.run(run())
+
+
+def test_bad_preference_rejected():
+    data = {"operators": [{"id": 0, "skills": [0], "preferences": [0, 2]}],
+            "shifts": [{"id": 0, "skills": [0]}, {"id": 1, "skills": [0]}]}
+    with pytest.raises(ValueError, match="Предпочтения оператора 0"):
+        roster.parse_json_roster(data)
+    with pytest.raises(ValueError):
+        roster.build_instance([[0]], [[2]], [[0], [0]], [1, 1], 3)
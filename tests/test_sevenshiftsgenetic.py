@@ -0,0 +1,10 @@
+import sevenshiftsgenetic
+from termination import TerminationPolicy
+
+
+# Запуск с масками бригад не должен оставлять toolbox переключённым
+def test_bitset_then_list_run(headless):
+    sevenshiftsgenetic.main(bitset_genome=True, termination=TerminationPolicy(max_evaluations=1000))
+    sevenshiftsgenetic.main(termination=TerminationPolicy(max_evaluations=1000))
+    assert sevenshiftsgenetic.toolbox.evaluate.func is sevenshiftsgenetic.evaluate
+    assert isinstance(sevenshiftsgenetic.toolbox.individual(), list)
@@ -0,0 +1,25 @@
+import math
+
+import pytest
+
+import staffing
+
+
+@pytest.mark.parametrize("calls, handle_time", [
+    ([10, math.nan], 180),
+    ([10, math.inf], 180),
+    ([10, 20], [180, math.nan]),
+])
+def test_non_finite_forecast_rejected(calls, handle_time):
+    with pytest.raises(ValueError):
+        staffing.required_agents(calls, handle_time)
+
+
+def test_non_finite_answer_time_rejected():
+    with pytest.raises(ValueError):
+        staffing.required_agents([10], 180, answer_time=math.nan)
+
+
+def test_known_staffing():
+    # 100 звонков по 180 с за 15 минут — 20 эрланг; 80/20 требует 24 операторов
+    assert staffing.required_agents([100], 180).tolist() == [24]
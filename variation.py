@@ -0,0 +1,124 @@
+import random
+
+from deap import tools
+
+# Операторы инициализации, мутации и кроссовера с учётом допустимости.
+# Геном — список номеров операторов; gene_shifts[i] — смена, к которой
+# относится ген i (для bless.py это сама смена, для sevenshifts.py — смена
+# слота назначения). Новые значения генов берутся из операторов, способных
+# выполнить смену (PROBLEM.eligible_operators); с вероятностью exploration —
+# из всех операторов, чтобы поиск не замыкался на допустимой области.
+
+DEFAULT_EXPLORATION = 0.1
+DEFAULT_INDPB = 0.05
+DEFAULT_PERTURBATION = 0.1
+
+
+# Смена каждого слота при заданном числе операторов на смену
+def slot_shifts(requirements):
+    return tuple(shift for shift, count in enumerate(requirements) for _ in range(count))
+
+
+# Индексы генов, с которых начинается новый день: допустимые точки разреза
+def day_boundaries(gene_shifts, shifts_per_day):
+    return tuple(index for index in range(1, len(gene_shifts))
+                 if gene_shifts[index] // shifts_per_day != gene_shifts[index - 1] // shifts_per_day)
+
+
+def draw_operator(problem, shift, exploration):
+    eligible = problem.eligible_operators[shift]
+    if not eligible or random.random() < exploration:
+        return random.randrange(problem.num_operators)
+    return random.choice(eligible)
+
+
+def init_eligible(container, problem, gene_shifts, exploration=DEFAULT_EXPLORATION):
+    return container(draw_operator(problem, shift, exploration) for shift in gene_shifts)
+
+
+# Замена гена допустимым оператором с вероятностью indpb. Запись идёт
+# по индексу, поэтому изменения видны инкрементальной оценке (delta_eval.py)
+def mut_eligible(individual, problem, gene_shifts, indpb=DEFAULT_INDPB, exploration=DEFAULT_EXPLORATION):
+    for index, shift in enumerate(gene_shifts):
+        if random.random() < indpb:
+            individual[index] = draw_operator(problem, shift, exploration)
+    return individual,
+
+
+# Двухточечный кроссовер с разрезами только на границах дней: день
+# переходит к потомку целиком
+def cx_day_aligned(ind1, ind2, boundaries):
+    points = boundaries + (len(ind1),)
+    if len(points) < 2:
+        return ind1, ind2
+    start, end = sorted(random.sample(points, 2))
+    ind1[start:end], ind2[start:end] = ind2[start:end], ind1[start:end]
+    return ind1, ind2
+
+
+# Жадное расписание в духе atg3.greedy_scheduler: каждому гену — допущенный
+# оператор, лучший по ключу (не превышен лимит, ещё не работает в этот день,
+# предпочитает смену, меньше загружен); равные кандидаты выбираются случайно
+def greedy_genome(container, problem, gene_shifts, shifts_per_day, max_shifts=None):
+    if max_shifts is None:
+        max_shifts = len(gene_shifts)
+    load = [0] * problem.num_operators
+    in_shift, in_day = set(), set()
+    genome = []
+    for shift in gene_shifts:
+        day = shift // shifts_per_day
+        candidates = [op for op in problem.eligible_operators[shift] if (op, shift) not in in_shift]
+        if candidates:
+            operator = min(candidates, key=lambda op: (load[op] >= max_shifts, (op, day) in in_day,
+                                                       not problem.prefers_shift(op, shift), load[op],
+                                                       random.random()))
+        else:
+            operator = random.randrange(problem.num_operators)
+        load[operator] += 1
+        in_shift.add((operator, shift))
+        in_day.add((operator, day))
+        genome.append(operator)
+    return container(genome)
+
+
+# Стартовая популяция: решения прошлой недели (prior_solutions), доля
+# heuristic_fraction жадных расписаний, возмущённых мутацией с вероятностью
+# perturbation на ген (первое — без возмущения), остальное — individual().
+# Операторы прошлых решений, которых больше нет, заменяются допущенными.
+def warm_population(n, individual, container, problem, gene_shifts, shifts_per_day, max_shifts,
+                    heuristic_fraction, prior_solutions=(), perturbation=DEFAULT_PERTURBATION,
+                    exploration=DEFAULT_EXPLORATION):
+    population = []
+    for prior in list(prior_solutions)[:n]:
+        if len(prior) != len(gene_shifts):
+            raise ValueError(f"Длина прошлого решения {len(prior)} не совпадает с длиной генома {len(gene_shifts)}")
+        population.append(container(operator if 0 <= operator < problem.num_operators
+                                    else draw_operator(problem, shift, exploration)
+                                    for operator, shift in zip(prior, gene_shifts)))
+
+    for index in range(min(n - len(population), round(heuristic_fraction * n))):
+        genome = greedy_genome(container, problem, gene_shifts, shifts_per_day, max_shifts)
+        if index:
+            mut_eligible(genome, problem, gene_shifts, perturbation, exploration)
+        population.append(genome)
+
+    population.extend(individual() for _ in range(n - len(population)))
+    return population
+
+
+# Регистрирует individual, population, mutate и mate в toolbox скрипта.
+# При warm_start > 0 популяция начинается с доли жадных расписаний
+# (warm_population); toolbox.population(n, prior_solutions=...) добавляет
+# решения прошлой недели.
+def register_eligible(toolbox, container, problem, gene_shifts, shifts_per_day,
+                      exploration=DEFAULT_EXPLORATION, indpb=DEFAULT_INDPB, max_shifts=None, warm_start=0.0):
+    toolbox.register("individual", init_eligible, container, problem, gene_shifts, exploration)
+    if warm_start or max_shifts is not None:
+        toolbox.register("population", warm_population, individual=toolbox.individual, container=container,
+                         problem=problem, gene_shifts=gene_shifts, shifts_per_day=shifts_per_day,
+                         max_shifts=max_shifts, heuristic_fraction=warm_start, exploration=exploration)
+    else:
+        toolbox.register("population", tools.initRepeat, list, toolbox.individual)
+    toolbox.register("mutate", mut_eligible, problem=problem, gene_shifts=gene_shifts, indpb=indpb,
+                     exploration=exploration)
+    toolbox.register("mate", cx_day_aligned, boundaries=day_boundaries(gene_shifts, shifts_per_day))